@@ -10,13 +10,39 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import os
+import re
+
+from collections import Counter
+from urllib.parse import urlencode
+
 from ansible.module_utils.connection import Connection
 from ansible.plugins.action import ActionBase
-from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
-    AnsibleArgSpecValidator,
+from ansible_collections.cisco.dme.plugins.module_utils.dme import (
+    COUNT_PARAMS,
+    DmeRequest,
+    DmeSnapshot,
+    count_from_response,
+    dme_attributes,
+    dme_class_names,
+    dme_filter,
+    dme_order_by,
+    filter_and,
 )
-from ansible_collections.cisco.dme.plugins.module_utils.dme import DmeRequest
-from ansible_collections.cisco.dme.plugins.modules.dme_command import DOCUMENTATION
+from ansible_collections.cisco.dme.plugins.modules.dme_command import ARGUMENT_SPEC
+from ansible_collections.cisco.dme.plugins.plugin_utils.profiling import profiled
+
+# Options of dn queries that select the objects to count, the others only
+# shape the objects returned
+MO_COUNT_OPTIONS = (
+    "entry",
+    "query_target",
+    "target_subtree_class",
+    "query_target_filter",
+)
+
+# Attributes every rsp-prop-include=naming-only response still carries
+NAMING_ATTRIBUTES = frozenset(("dn",))
 
 
 class ActionModule(ActionBase):
@@ -37,12 +63,21 @@ class ActionModule(ActionBase):
         self.api_object_search = ""
         self.module_class_return = "class"
         self.module_mo_return = "mo"
+        self.module_classes_return = "classes"
+        self.module_mos_return = "mos"
+        self.host = None
+        self.incremental = None
 
     def _check_argspec(self):
+        # ansible.utils pulls in several helpers only needed here
+        from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
+            AnsibleArgSpecValidator,
+        )
+
         aav = AnsibleArgSpecValidator(
             data=self._task.args,
-            schema=DOCUMENTATION,
-            schema_format="doc",
+            schema={"argument_spec": ARGUMENT_SPEC},
+            schema_format="argspec",
             name=self._task.action,
         )
         valid, errors, self._task.args = aav.validate()
@@ -59,23 +94,232 @@ class ActionModule(ActionBase):
             read_class: Dictionary containing class query parameters
 
         Returns:
-            Tuple of (api_response, code)
+            Tuple of (api_response, code), the api_response is the number of
+            objects with count_only
         """
+        if read_class.get("count_only"):
+            if read_class.get("incremental"):
+                raise ValueError("count_only cannot be combined with incremental")
+            self.api_object, params = self.count_request(read_class)
+            code, count = dme_request.get_count(self.api_object, params=params)
+            return count, code
+
+        self.api_object = self.class_url(read_class)
+
+        if read_class.get("incremental"):
+            return self.sync_class(dme_request, read_class)
+        return self.fetch_class(dme_request, read_class)
+
+    def class_url(self, read_class):
+        """Return the API URL of a class query."""
         payload = read_class.get("entry")
         if not payload:
             raise ValueError("Class entry is required for class-based queries")
 
-        self.api_object = f"/api/node/class/{payload}.json"
+        url = f"/api/node/class/{payload}.json"
+
+        query_params = []
+
+        if self.prop_include(read_class):
+            query_params.append(f"rsp-prop-include={self.prop_include(read_class)}")
 
-        if read_class.get("rsp_prop_include"):
-            self.api_object = f"{self.api_object}?rsp-prop-include={read_class.get('rsp_prop_include')}"
+        if read_class.get("rsp_subtree"):
+            query_params.append(f"rsp-subtree={read_class.get('rsp_subtree')}")
+
+        if query_params:
+            url = f"{url}?{'&'.join(query_params)}"
+        return url
+
+    def attributes(self, query):
+        """
+        Return the attributes the connection trims the objects of a query to.
+
+        Args:
+            query: Dictionary containing class or DN query parameters
+
+        Returns:
+            List of attribute names, None when the objects are returned whole
+        """
+        if not query.get("attributes"):
+            return None
+        attributes = dme_attributes(query["attributes"])
+        if query.get("incremental"):
+            # The snapshot is keyed by dn and advanced by modTs
+            attributes.extend(
+                name for name in ("dn", "modTs") if name not in attributes
+            )
+        return attributes
+
+    def prop_include(self, query):
+        """
+        Return the rsp-prop-include of a query.
+
+        DME cannot select single attributes, but when only naming attributes
+        are asked for, naming-only spares the device sending the others.
+        """
+        if query.get("rsp_prop_include"):
+            return query.get("rsp_prop_include")
+        attributes = self.attributes(query)
+        if attributes and all(
+            attribute.rpartition(".")[2] in NAMING_ATTRIBUTES
+            for attribute in attributes
+        ):
+            return "naming-only"
+        return None
+
+    def query_params(self, query):
+        """
+        Return the filter, subtree class and ordering parameters of a query.
+
+        They are validated here, so that a malformed filter fails the task
+        instead of being sent to the device.
+
+        Args:
+            query: Dictionary containing class or DN query parameters
+
+        Returns:
+            Dictionary of query parameters
+        """
+        params = {}
+        if query.get("rsp_subtree_class"):
+            params["rsp-subtree-class"] = dme_class_names(query["rsp_subtree_class"])
+        if query.get("rsp_subtree_filter"):
+            params["rsp-subtree-filter"] = dme_filter(query["rsp_subtree_filter"])
+        if query.get("query_target_filter"):
+            params["query-target-filter"] = dme_filter(query["query_target_filter"])
+        if query.get("order_by"):
+            params["order-by"] = dme_order_by(query["order_by"])
+        return params
+
+    def fetch_class(self, dme_request, read_class, params=None):
+        """
+        Fetch the objects of a DME class, in pages when requested.
+
+        Args:
+            dme_request: DmeRequest instance for making API calls
+            read_class: Dictionary containing class query parameters
+            params: Query parameters replacing those of read_class, e.g. a
+                query-target-filter
+
+        Returns:
+            Tuple of (api_response, code)
+        """
+        payload = read_class.get("entry")
+        params = dict(self.query_params(read_class), **(params or {}))
+        attributes = self.attributes(read_class)
+        kwargs = {"attributes": attributes} if attributes else {}
+        page_size = read_class.get("page_size") or read_class.get("max_objects")
+        if page_size:
+            # Pages are requested in the order asked for, or a stable one
+            order_by = params.pop("order-by", f"{payload}.dn")
+            # The pages are merged into one result, totalCount keeps the
+            # number of objects the device reported for the whole class
+            api_response = {"imdata": [], "totalCount": "0"}
+            for code, page in dme_request.get_pages(
+                self.api_object,
+                page_size,
+                order_by,
+                max_objects=read_class.get("max_objects"),
+                params=params or None,
+                **kwargs,
+            ):
+                if code >= 400:
+                    return page, code
+                api_response["imdata"].extend(page.get("imdata", []))
+                api_response["totalCount"] = page.get(
+                    "totalCount",
+                    api_response["totalCount"],
+                )
+            return api_response, 200
 
         code, api_response = dme_request.get(
             self.api_object,
             data="",
+            params=params or None,
+            **kwargs,
         )
         return api_response, code
 
+    def snapshot_path(self, read_class):
+        """Return the snapshot file of the class for the current host."""
+        host = re.sub(r"[^\w.-]", "_", self.host or "localhost")
+        return os.path.join(
+            os.path.expanduser(read_class.get("snapshot_dir")),
+            f"{host}_{read_class.get('entry')}.json",
+        )
+
+    def sync_class(self, dme_request, read_class):
+        """
+        Bring the local snapshot of a DME class up to date.
+
+        Only objects modified since the snapshot's high-water mark are fetched.
+        Deleted objects do not show up in that delta, so the merged snapshot
+        is checked against the device's object count and fetched in full when
+        they differ.
+
+        Args:
+            dme_request: DmeRequest instance for making API calls
+            read_class: Dictionary containing class query parameters
+
+        Returns:
+            Tuple of (api_response, code)
+        """
+        payload = read_class.get("entry")
+        if read_class.get("rsp_prop_include") == "config-only":
+            raise ValueError(
+                "incremental requires modTs, which rsp_prop_include=config-only omits",
+            )
+        for option in ("max_objects", "page_size"):
+            if read_class.get(option):
+                # A truncated fetch never matches the device's object count
+                raise ValueError(
+                    f"incremental fetches the whole class and cannot be combined with {option}",
+                )
+        if read_class.get("rsp_subtree") in ("children", "full"):
+            # Changes to children do not advance the modTs of their parent
+            raise ValueError(
+                "incremental cannot be combined with rsp_subtree, changes to children "
+                "do not update the modTs of the fetched objects",
+            )
+
+        snapshot = DmeSnapshot.load(self.snapshot_path(read_class))
+        query_filter = snapshot.query_filter(payload)
+        full_sync = query_filter is None
+
+        # Objects outside the task's own filter are neither fetched nor counted
+        user_filter = self.query_params(read_class).get("query-target-filter")
+        params = None
+        if query_filter:
+            params = {"query-target-filter": filter_and(user_filter, query_filter)}
+        api_response, code = self.fetch_class(dme_request, read_class, params)
+        if code >= 400:
+            return api_response, code
+        fetched = snapshot.merge(api_response.get("imdata", []))
+
+        if not full_sync:
+            count_code, count = dme_request.get_count(
+                self.api_object,
+                params={"query-target-filter": user_filter} if user_filter else None,
+            )
+            if count_code >= 400:
+                return count, count_code
+            if count != len(snapshot.objects):
+                full_sync = True
+                api_response, code = self.fetch_class(dme_request, read_class)
+                if code >= 400:
+                    return api_response, code
+                fetched = snapshot.replace(api_response.get("imdata", []))
+
+        snapshot.save()
+        self.incremental = {
+            "full_sync": full_sync,
+            "fetched": fetched,
+            "mark": snapshot.mark,
+            "snapshot": snapshot.path,
+        }
+        imdata = snapshot.imdata
+        return {"imdata": imdata, "totalCount": str(len(imdata))}, 200
+
     def configure_mo_api(self, dme_request, read_dn):
         """
         Configure and execute DME managed object API request.
@@ -85,19 +329,37 @@ class ActionModule(ActionBase):
             read_dn: Dictionary containing distinguished name query parameters
 
         Returns:
-            Tuple of (api_response, code)
+            Tuple of (api_response, code), the api_response is the number of
+            objects with count_only
         """
+        if read_dn.get("count_only"):
+            self.api_object, params = self.count_request(read_dn, mo=True)
+            code, count = dme_request.get_count(self.api_object, params=params)
+            return count, code
+
+        self.api_object = self.mo_url(read_dn)
+        attributes = self.attributes(read_dn)
+
+        code, api_response = dme_request.get(
+            self.api_object,
+            data="",
+            **({"attributes": attributes} if attributes else {}),
+        )
+        return api_response, code
+
+    def mo_url(self, read_dn):
+        """Return the API URL of a managed object query."""
         payload = read_dn.get("entry")
         if not payload:
             raise ValueError("DN entry is required for managed object queries")
 
-        self.api_object = f"/api/mo/{payload}.json"
+        url = f"/api/mo/{payload}.json"
 
         # Build query parameters properly
         query_params = []
 
-        if read_dn.get("rsp_prop_include"):
-            query_params.append(f"rsp-prop-include={read_dn.get('rsp_prop_include')}")
+        if self.prop_include(read_dn):
+            query_params.append(f"rsp-prop-include={self.prop_include(read_dn)}")
 
         if read_dn.get("rsp_subtree"):
             query_params.append(f"rsp-subtree={read_dn.get('rsp_subtree')}")
@@ -107,18 +369,129 @@ class ActionModule(ActionBase):
 
         if read_dn.get("target_subtree_class"):
             query_params.append(
-                f"target-subtree-class={read_dn.get('target_subtree_class')}",
+                "target-subtree-class="
+                f"{dme_class_names(read_dn.get('target_subtree_class'))}",
             )
 
+        pushdown = self.query_params(read_dn)
+        if pushdown:
+            query_params.append(urlencode(pushdown))
+
         if query_params:
-            self.api_object = f"{self.api_object}?{'&'.join(query_params)}"
+            url = f"{url}?{'&'.join(query_params)}"
+        return url
 
-        code, api_response = dme_request.get(
-            self.api_object,
-            data="",
+    def count_request(self, query, mo=False):
+        """
+        Return the URL and parameters counting the objects of a query.
+
+        Options that only shape the objects returned, such as rsp_subtree or
+        order_by, do not change the count and are left out.
+
+        Args:
+            query: Dictionary containing class or DN query parameters
+            mo: Whether query is a DN query
+
+        Returns:
+            Tuple of (url, params) for DmeRequest.get_count
+        """
+        if mo:
+            return self.mo_url({key: query.get(key) for key in MO_COUNT_OPTIONS}), None
+
+        query_filter = self.query_params(query).get("query-target-filter")
+        params = {"query-target-filter": query_filter} if query_filter else None
+        return self.class_url({"entry": query.get("entry")}), params
+
+    def read_entries(self, dme_request, read_classes, read_dns):
+        """
+        Fetch several class and DN queries.
+
+        Single-request queries, counts included, are handed to the
+        connection in one batch, which sends them concurrently. Paged class
+        queries need one request per page and are fetched one after another
+        afterwards.
+
+        Args:
+            dme_request: DmeRequest instance for making API calls
+            read_classes: List of dictionaries containing class query parameters
+            read_dns: List of dictionaries containing distinguished name query
+                parameters
+
+        Returns:
+            Tuple of (classes, mos), the api_responses or counts keyed by
+            entry
+        """
+        for option, queries in (("read_classes", read_classes), ("read_dns", read_dns)):
+            counts = Counter(query.get("entry") for query in queries)
+            duplicates = sorted(entry for entry, count in counts.items() if count > 1)
+            if duplicates:
+                raise ValueError(
+                    f"{option} lists {', '.join(duplicates)} more than once",
+                )
+
+        classes = dict.fromkeys(read_class.get("entry") for read_class in read_classes)
+        mos = dict.fromkeys(read_dn.get("entry") for read_dn in read_dns)
+
+        batch = []
+        paged = []
+        for read_class in read_classes:
+            entry = read_class.get("entry")
+            if read_class.get("count_only"):
+                url, params = self.count_request(read_class)
+                params = dict(params or {}, **COUNT_PARAMS)
+                batch.append((classes, entry, url, params, None, True))
+            elif read_class.get("page_size") or read_class.get("max_objects"):
+                paged.append(read_class)
+            else:
+                batch.append(
+                    (
+                        classes,
+                        entry,
+                        self.class_url(read_class),
+                        self.query_params(read_class) or None,
+                        self.attributes(read_class),
+                        False,
+                    ),
+                )
+        for read_dn in read_dns:
+            entry = read_dn.get("entry")
+            if read_dn.get("count_only"):
+                url, _ = self.count_request(read_dn, mo=True)
+                batch.append((mos, entry, url, dict(COUNT_PARAMS), None, True))
+            else:
+                batch.append(
+                    (
+                        mos,
+                        entry,
+                        self.mo_url(read_dn),
+                        None,
+                        self.attributes(read_dn),
+                        False,
+                    ),
+                )
+
+        responses = dme_request.get_many(
+            [(url, params, attributes) for _, _, url, params, attributes, _ in batch],
         )
-        return api_response, code
+        for (results, entry, url, _, _, count_only), (code, api_response) in zip(
+            batch,
+            responses,
+        ):
+            if count_only and code < 400:
+                api_response = count_from_response(api_response)
+                if api_response is None:
+                    raise ValueError(f"No object count in the response of GET {url}")
+            results[entry] = api_response
+
+        for read_class in paged:
+            self.api_object = self.class_url(read_class)
+            classes[read_class.get("entry")], _ = self.fetch_class(
+                dme_request,
+                read_class,
+            )
+        return classes, mos
 
+    @profiled
     def run(self, tmp=None, task_vars=None):
         self._supports_check_mode = False
         self._result = super(ActionModule, self).run(tmp, task_vars)
@@ -129,6 +502,7 @@ class ActionModule(ActionBase):
         if self._result.get("failed"):
             return self._result
 
+        self.host = (task_vars or {}).get("inventory_hostname")
         conn = Connection(self._connection.socket_path)
         conn_request = DmeRequest(
             connection=conn,
@@ -145,6 +519,8 @@ class ActionModule(ActionBase):
                 conn_request,
                 self.ask.get("read_class"),
             )
+            if self.incremental:
+                self._result["incremental"] = self.incremental
         if self.ask.get("read_dn"):
             (
                 self._result[self.module_mo_return],
@@ -154,4 +530,19 @@ class ActionModule(ActionBase):
                 self.ask.get("read_dn"),
             )
 
+        if self.ask.get("read_classes") or self.ask.get("read_dns"):
+            classes, mos = self.read_entries(
+                conn_request,
+                self.ask.get("read_classes") or [],
+                self.ask.get("read_dns") or [],
+            )
+            if self.ask.get("read_classes"):
+                self._result[self.module_classes_return] = classes
+            if self.ask.get("read_dns"):
+                self._result[self.module_mos_return] = mos
+
+        metrics = conn_request.metrics()
+        if metrics is not None:
+            self._result["dme_metrics"] = metrics
+
         return self._result
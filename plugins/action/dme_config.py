@@ -12,11 +12,9 @@ __metaclass__ = type
 
 from ansible.module_utils.connection import Connection
 from ansible.plugins.action import ActionBase
-from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
-    AnsibleArgSpecValidator,
-)
 from ansible_collections.cisco.dme.plugins.module_utils.dme import DmeRequest
-from ansible_collections.cisco.dme.plugins.modules.dme_config import DOCUMENTATION
+from ansible_collections.cisco.dme.plugins.modules.dme_config import ARGUMENT_SPEC
+from ansible_collections.cisco.dme.plugins.plugin_utils.profiling import profiled
 
 
 class ActionModule(ActionBase):
@@ -34,10 +32,15 @@ class ActionModule(ActionBase):
         self.api_object = "/api/mo/sys.json"
 
     def _check_argspec(self):
+        # ansible.utils pulls in several helpers only needed here
+        from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
+            AnsibleArgSpecValidator,
+        )
+
         aav = AnsibleArgSpecValidator(
             data=self._task.args,
-            schema=DOCUMENTATION,
-            schema_format="doc",
+            schema={"argument_spec": ARGUMENT_SPEC},
+            schema_format="argspec",
             name=self._task.action,
         )
         valid, errors, self._task.args = aav.validate()
@@ -65,6 +68,7 @@ class ActionModule(ActionBase):
         )
         return api_response, True
 
+    @profiled
     def run(self, tmp=None, task_vars=None):
         self._supports_check_mode = False
         self._result = super(ActionModule, self).run(tmp, task_vars)
@@ -90,4 +94,8 @@ class ActionModule(ActionBase):
                 self._task.args["config"],
             )
 
+        metrics = conn_request.metrics()
+        if metrics is not None:
+            self._result["dme_metrics"] = metrics
+
         return self._result
@@ -12,11 +12,9 @@ __metaclass__ = type
 
 from ansible.module_utils.connection import Connection
 from ansible.plugins.action import ActionBase
-from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
-    AnsibleArgSpecValidator,
-)
 from ansible_collections.cisco.dme.plugins.module_utils.dme import DmeRequest
-from ansible_collections.cisco.dme.plugins.modules.dme_validate import DOCUMENTATION
+from ansible_collections.cisco.dme.plugins.modules.dme_validate import ARGUMENT_SPEC
+from ansible_collections.cisco.dme.plugins.plugin_utils.profiling import profiled
 
 
 class ActionModule(ActionBase):
@@ -57,10 +55,15 @@ class ActionModule(ActionBase):
         return lines
 
     def _check_argspec(self):
+        # ansible.utils pulls in several helpers only needed here
+        from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
+            AnsibleArgSpecValidator,
+        )
+
         aav = AnsibleArgSpecValidator(
             data=self._task.args,
-            schema=DOCUMENTATION,
-            schema_format="doc",
+            schema={"argument_spec": ARGUMENT_SPEC},
+            schema_format="argspec",
             name=self._task.action,
         )
         valid, errors, self._task.args = aav.validate()
@@ -107,7 +110,7 @@ class ActionModule(ActionBase):
             payload: JSON-RPC formatted payload
 
         Returns:
-            Tuple of (api_response, code)
+            Tuple of (api_response, code). Error codes fail the task.
         """
         if not payload:
             raise ValueError("RPC payload is required for validation")
@@ -116,8 +119,18 @@ class ActionModule(ActionBase):
             self.api_object,
             data=payload,
         )
+        if code >= 400:
+            self._result["failed"] = True
+            self._result["msg"] = (
+                "Validation request to {0} failed with code {1}: {2}".format(
+                    self.api_object,
+                    code,
+                    api_response,
+                )
+            )
         return api_response, code
 
+    @profiled
     def run(self, tmp=None, task_vars=None):
         self._supports_check_mode = False
         self._result = super(ActionModule, self).run(tmp, task_vars)
@@ -160,6 +173,8 @@ class ActionModule(ActionBase):
             conn_request,
             payloads,
         )
+        if self._result.get("failed"):
+            return self._result
 
         self._result["model"] = model_response.get("dme_data", {})
         errorMap = model_response.pop("errors", {})
@@ -179,4 +194,8 @@ class ActionModule(ActionBase):
             self._result["valid"] = True
             self._result["changed"] = True
 
+        metrics = conn_request.metrics()
+        if metrics is not None:
+            self._result["dme_metrics"] = metrics
+
         return self._result
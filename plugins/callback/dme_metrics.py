@@ -0,0 +1,280 @@
+# (c) 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+author: Sagar Paul (@KB-perByte)
+name: dme_metrics
+type: aggregate
+short_description: Summarize the DME request metrics of a playbook run
+description:
+- Collects the C(dme_metrics) of every C(cisco.dme.dme_command), C(cisco.dme.dme_config)
+  and C(cisco.dme.dme_validate) result and prints one summary at the end of the
+  playbook run. The summary lists the slowest hosts and endpoints, the bytes moved
+  and the number of logins, retries and cached responses.
+- Tasks only return C(dme_metrics) when the C(metrics) option of the C(cisco.dme.dme)
+  httpapi plugin is enabled, for example with C(ANSIBLE_DME_METRICS=true).
+- MO queries are grouped per endpoint with bracketed DN parts such as interface names
+  replaced by C([*]), so C(sys/intf/phys-[eth1/1]) and C(sys/intf/phys-[eth1/2]) count
+  as one endpoint.
+version_added: 1.1.0
+requirements:
+- enable in configuration, for example C(callbacks_enabled = cisco.dme.dme_metrics)
+options:
+  top:
+    description: Number of hosts and endpoints listed in the summary.
+    type: int
+    default: 10
+    env:
+    - name: ANSIBLE_DME_METRICS_TOP
+    ini:
+    - section: callback_dme_metrics
+      key: top
+  output_file:
+    description:
+    - File to write the full summary to as JSON, in addition to printing it.
+    - Unlike the printed summary, it holds every host and endpoint.
+    type: path
+    env:
+    - name: ANSIBLE_DME_METRICS_OUTPUT_FILE
+    ini:
+    - section: callback_dme_metrics
+      key: output_file
+"""
+
+import json
+import math
+import re
+
+from collections import defaultdict
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.callback import CallbackBase
+
+LOGIN_PATH = "/api/aaaLogin.json"
+
+BRACKETED_RE = re.compile(r"\[[^\]]*\]")
+MO_PATH_RE = re.compile(r"^/api/(?:node/)?mo/")
+
+
+def endpoint(request):
+    """
+    Return the endpoint a request is grouped under.
+
+    Bracketed parts of MO query DNs name individual objects, such as
+    interfaces, and are replaced so that one endpoint covers all of them.
+    """
+    path = request.get("path") or ""
+    if MO_PATH_RE.match(path):
+        path = BRACKETED_RE.sub("[*]", path)
+    return "{0} {1}".format(request.get("method"), path)
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[max(int(math.ceil(percent / 100.0 * len(values))) - 1, 0)]
+
+
+def build_report(tasks):
+    """
+    Aggregate the dme_metrics of task results.
+
+    Args:
+        tasks: Iterable of (host, dme_metrics) tuples
+
+    Returns:
+        Dictionary with the run totals and the hosts and endpoints, each
+        sorted slowest first
+    """
+    totals = dict.fromkeys(
+        (
+            "tasks",
+            "requests",
+            "request_bytes",
+            "response_bytes",
+            "retries",
+            "cached",
+            "errors",
+            "logins",
+        ),
+        0,
+    )
+    totals["time"] = 0.0
+    hosts = {}
+    endpoint_times = defaultdict(list)
+    endpoint_bytes = defaultdict(int)
+
+    for host, metrics in tasks:
+        host_stats = hosts.setdefault(
+            host,
+            {"host": host, "tasks": 0, "requests": 0, "time": 0.0, "rpc_time": 0.0},
+        )
+        host_stats["tasks"] += 1
+        host_stats["rpc_time"] += metrics.get("rpc_time") or 0.0
+        totals["tasks"] += 1
+
+        for request in metrics.get("requests") or []:
+            total_time = request.get("total_time") or 0.0
+            moved = (request.get("request_bytes") or 0) + (
+                request.get("response_bytes") or 0
+            )
+            host_stats["requests"] += 1
+            host_stats["time"] += total_time
+            totals["requests"] += 1
+            totals["time"] += total_time
+            totals["request_bytes"] += request.get("request_bytes") or 0
+            totals["response_bytes"] += request.get("response_bytes") or 0
+            totals["retries"] += request.get("retries") or 0
+            totals["cached"] += 1 if request.get("cached") else 0
+            status = request.get("status")
+            totals["errors"] += 1 if status is None or status >= 400 else 0
+            if request.get("path") == LOGIN_PATH:
+                totals["logins"] += 1
+
+            name = endpoint(request)
+            endpoint_times[name].append(total_time)
+            endpoint_bytes[name] += moved
+
+    endpoints = []
+    for name, times in endpoint_times.items():
+        times.sort()
+        endpoints.append(
+            {
+                "endpoint": name,
+                "requests": len(times),
+                "time": sum(times),
+                "p50": percentile(times, 50),
+                "p99": percentile(times, 99),
+                "max": times[-1],
+                "bytes": endpoint_bytes[name],
+            },
+        )
+
+    return {
+        "totals": totals,
+        "hosts": sorted(hosts.values(), key=lambda stats: -stats["time"]),
+        "endpoints": sorted(endpoints, key=lambda stats: -stats["p99"]),
+    }
+
+
+def format_bytes(count):
+    """Return count bytes in a human readable unit."""
+    if count < 1024:
+        return "{0} B".format(count)
+    for unit in ("KB", "MB", "GB"):
+        count /= 1024.0
+        if count < 1024 or unit == "GB":
+            return "{0:.1f} {1}".format(count, unit)
+
+
+def format_report(report, top):
+    """Return the lines of the printed summary."""
+    totals = report["totals"]
+    lines = [
+        "{0} requests in {1} tasks, {2:.2f}s, {3} sent, {4} received".format(
+            totals["requests"],
+            totals["tasks"],
+            totals["time"],
+            format_bytes(totals["request_bytes"]),
+            format_bytes(totals["response_bytes"]),
+        ),
+        "logins: {0}, retries: {1}, cached responses: {2}, errors: {3}".format(
+            totals["logins"],
+            totals["retries"],
+            totals["cached"],
+            totals["errors"],
+        ),
+    ]
+
+    if report["hosts"]:
+        lines.extend(("", "Slowest hosts (request time, connection wait time):"))
+        for stats in report["hosts"][:top]:
+            lines.append(
+                "  {0:<30} {1:>9.2f}s {2:>9.2f}s {3:>6} requests".format(
+                    stats["host"],
+                    stats["time"],
+                    stats["rpc_time"],
+                    stats["requests"],
+                ),
+            )
+
+    if report["endpoints"]:
+        lines.extend(
+            (
+                "",
+                "Slowest endpoints (p99):",
+                "  {0:<50} {1:>8} {2:>8} {3:>8} {4:>8} {5:>10}".format(
+                    "endpoint",
+                    "requests",
+                    "p50",
+                    "p99",
+                    "max",
+                    "bytes",
+                ),
+            ),
+        )
+        for stats in report["endpoints"][:top]:
+            lines.append(
+                "  {0:<50} {1:>8} {2:>7.3f}s {3:>7.3f}s {4:>7.3f}s {5:>10}".format(
+                    stats["endpoint"],
+                    stats["requests"],
+                    stats["p50"],
+                    stats["p99"],
+                    stats["max"],
+                    format_bytes(stats["bytes"]),
+                ),
+            )
+    return lines
+
+
+class CallbackModule(CallbackBase):
+    """Aggregate the DME request metrics of all hosts into one summary."""
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "cisco.dme.dme_metrics"
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self._tasks = []
+
+    def _collect(self, result):
+        host = result._host.get_name()
+        task_result = result._result
+        for item in task_result.get("results") or [task_result]:
+            if isinstance(item, dict) and isinstance(item.get("dme_metrics"), dict):
+                self._tasks.append((host, item["dme_metrics"]))
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._collect(result)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self._tasks:
+            return
+
+        report = build_report(self._tasks)
+        self._display.banner("DME METRICS")
+        for line in format_report(report, self.get_option("top")):
+            self._display.display(line)
+
+        output_file = self.get_option("output_file")
+        if output_file:
+            try:
+                with open(output_file, "w") as report_file:
+                    json.dump(report, report_file, indent=2)
+            except (IOError, OSError) as e:
+                self._display.warning(
+                    "Unable to write DME metrics to {0}: {1}".format(
+                        output_file,
+                        to_text(e),
+                    ),
+                )
@@ -13,32 +13,506 @@ description:
 - This HttpApi plugin provides methods to connect to Cisco Nxos Data Management Engine (DME) over
   a HTTP(S)-based api.
 version_added: 1.0.0
+options:
+  token_cache:
+    type: bool
+    description:
+    - Whether to keep the DME login token in an on-disk cache on the controller.
+    - A persistent connection that is restarted for the same host, port and user
+      reuses the cached token instead of logging in again, as long as it has not expired.
+    - Cached tokens are not logged out when the persistent connection closes.
+    default: false
+    env:
+    - name: ANSIBLE_DME_TOKEN_CACHE
+    vars:
+    - name: ansible_httpapi_dme_token_cache
+  token_cache_dir:
+    type: path
+    description:
+    - Directory holding the cached DME login tokens.
+    - The directory is created with C(0700) permissions and every token file with C(0600).
+    default: ~/.ansible/dme_tokens
+    env:
+    - name: ANSIBLE_DME_TOKEN_CACHE_DIR
+    vars:
+    - name: ansible_httpapi_dme_token_cache_dir
+  token_refresh_margin:
+    type: int
+    description:
+    - Number of seconds before the DME login token expires at which it is renewed
+      through C(/api/aaaRefresh.json).
+    - The refresh happens lazily, right before the next request that would otherwise
+      be sent with an expiring token.
+    default: 60
+    vars:
+    - name: ansible_httpapi_dme_token_refresh_margin
+  compression:
+    type: bool
+    description:
+    - Whether to ask the device for gzip or deflate compressed responses.
+    - Set to C(false) for platforms that do not handle the C(Accept-Encoding) header.
+    default: true
+    vars:
+    - name: ansible_httpapi_dme_compression
+  request_compression_threshold:
+    type: int
+    description:
+    - Request bodies of at least this many bytes are sent gzip compressed,
+      for example large C(dme_config) payloads.
+    - Only used when I(compression=true). C(0) disables request compression.
+    default: 0
+    vars:
+    - name: ansible_httpapi_dme_request_compression_threshold
+  retries:
+    type: int
+    description:
+    - Number of times a request is retried after a transient failure.
+    - Requests of any method are retried on HTTP 429 and 503. GET requests are
+      also retried on HTTP 502 and 504 and when the connection to the device fails.
+    - Retries wait with jittered exponential backoff, or for the C(Retry-After)
+      interval when the device sends one.
+    - No retry is started later than 5 seconds before the persistent connection's
+      C(persistent_command_timeout), the last response is returned instead.
+    default: 3
+    vars:
+    - name: ansible_httpapi_dme_retries
+  retry_backoff:
+    type: float
+    description:
+    - Base delay in seconds of the exponential backoff between retries.
+    default: 0.5
+    vars:
+    - name: ansible_httpapi_dme_retry_backoff
+  circuit_breaker_threshold:
+    type: int
+    description:
+    - Number of consecutive failed requests after which requests to the host fail
+      immediately for I(circuit_breaker_cooldown) seconds.
+    - C(0) disables the circuit breaker.
+    default: 5
+    vars:
+    - name: ansible_httpapi_dme_circuit_breaker_threshold
+  circuit_breaker_cooldown:
+    type: int
+    description:
+    - Number of seconds requests fail fast once the circuit breaker opened. The first
+      request after the cooldown is sent to the device and closes the breaker again
+      when it succeeds.
+    default: 60
+    vars:
+    - name: ansible_httpapi_dme_circuit_breaker_cooldown
+  response_cache:
+    type: bool
+    description:
+    - Whether to cache the responses of GET requests in the persistent connection.
+    - Entries are keyed by URL and query parameters. Writes through the connection
+      (for example C(dme_config)) evict every cached DN under or above the written
+      subtree and every cached class query, since a class query may return objects
+      anywhere under the written subtree.
+    default: false
+    vars:
+    - name: ansible_httpapi_dme_response_cache
+  response_cache_ttl:
+    type: int
+    description:
+    - Number of seconds a cached response is served before it is fetched again.
+    default: 30
+    vars:
+    - name: ansible_httpapi_dme_response_cache_ttl
+  response_cache_max_bytes:
+    type: int
+    description:
+    - Upper bound for the summed response body sizes held in the response cache.
+      The least recently used entries are evicted first.
+    default: 67108864
+    vars:
+    - name: ansible_httpapi_dme_response_cache_max_bytes
+  subscriptions:
+    type: bool
+    description:
+    - Whether to subscribe to changes of the cached MO and class queries.
+    - Cached queries are sent with C(subscription=yes) and the device pushes change
+      events over a websocket tied to the login token. An event evicts the entries
+      of its subscription and every cached entry for the changed DN and class, so
+      changes made outside the connection, for example from the CLI, are not served
+      from the cache.
+    - Entries of a live subscription stay cached beyond I(response_cache_ttl). The
+      subscriptions are refreshed through C(/api/subscriptionRefresh.json) before
+      the next request once they are half way to expiring; entries of expired
+      subscriptions are evicted.
+    - Only used when I(response_cache=true). The websocket honours the connection's
+      C(use_ssl) and C(validate_certs) settings but not a proxy.
+    default: false
+    vars:
+    - name: ansible_httpapi_dme_subscriptions
+  metrics:
+    type: bool
+    description:
+    - Whether to record timings and sizes of every DME request and return them in
+      the C(dme_metrics) key of the C(dme_command), C(dme_config) and C(dme_validate)
+      results.
+    - The connection to the device is opened anew for every request, so
+      I(send_time) includes name resolution, the TCP and TLS handshakes, the time
+      the device needs to answer and the transfer of the response.
+    default: false
+    env:
+    - name: ANSIBLE_DME_METRICS
+    vars:
+    - name: ansible_httpapi_dme_metrics
+  trace_file:
+    type: path
+    description:
+    - File to append one JSON line per DME request to, for analysing latencies
+      offline, for example per endpoint across all hosts of a run.
+    - Every line holds the start I(time) as a Unix timestamp, the I(host), the
+      request I(method), I(path) and query I(params), the response I(status) and
+      the sizes and timings also returned with I(metrics).
+    - The persistent connections of all hosts can share one file, every line is
+      appended with a single write. The file is created with C(0600) permissions.
+    env:
+    - name: ANSIBLE_DME_TRACE_FILE
+    vars:
+    - name: ansible_httpapi_dme_trace_file
+  max_concurrent_requests:
+    type: int
+    description:
+    - Maximum number of requests sent to the device at the same time when a task
+      hands the persistent connection several queries at once, for example the
+      I(read_classes) and I(read_dns) of C(dme_command).
+    - C(1) sends them one after another.
+    default: 4
+    vars:
+    - name: ansible_httpapi_dme_max_concurrent_requests
 """
 
-import base64
+import gzip
 import hashlib
 import json
+import os
+import random
+import re
+import threading
 import time
+import zlib
 
-from ansible.errors import AnsibleAuthenticationFailure
+from collections import OrderedDict, deque
+from io import BytesIO
+
+from ansible.errors import AnsibleAuthenticationFailure, AnsibleConnectionFailure
 from ansible.module_utils.basic import to_bytes, to_text
 from ansible.module_utils.six.moves.urllib.error import HTTPError
-from ansible.module_utils.six.moves.urllib.parse import urlencode
+from ansible.module_utils.six.moves.urllib.parse import (
+    parse_qsl,
+    unquote,
+    urlencode,
+    urlsplit,
+)
 from ansible_collections.ansible.netcommon.plugins.plugin_utils.httpapi_base import (
     HttpApiBase,
 )
+from ansible_collections.cisco.dme.plugins.module_utils.dme import (
+    json_dumps,
+    json_loads,
+    project_attributes,
+)
 
 BASE_HEADERS = {
     "Content-Type": "application/json",
     "Accept": "application/json",
 }
 
+JSONRPC_HEADERS = {
+    "Content-Type": "application/json-rpc",
+    "Accept": "application/json",
+}
+
+COMPRESSION_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+}
+
 LOGIN_URL = "/api/aaaLogin.json"
 LOGOUT_URL = "/api/aaaLogout.json"
+REFRESH_URL = "/api/aaaRefresh.json"
+SUBSCRIPTION_REFRESH_URL = "/api/subscriptionRefresh.json"
+EVENT_SOCKET_PATH = "/socket"
+
+# DME drops subscriptions that are not refreshed within this many seconds.
+SUBSCRIPTION_TIMEOUT = 60
+
+# Status codes that mean the request was not processed and may be resent,
+# and those that are only safe to resend for idempotent GET requests.
+RETRY_STATUS_CODES = (429, 503)
+RETRY_IDEMPOTENT_STATUS_CODES = (502, 504)
+RETRY_MAX_DELAY = 30
+
+# Retries stop this many seconds before persistent_command_timeout, which
+# defaults to DEFAULT_COMMAND_TIMEOUT, so the last response still reaches
+# the task instead of the command timing out.
+DEFAULT_COMMAND_TIMEOUT = 30
+RETRY_TIMEOUT_MARGIN = 5
+
+MO_URL_RE = re.compile(r"^/api/(?:node/)?mo/(?P<dn>.+)\.json$")
+CLASS_URL_RE = re.compile(r"^/api/(?:node/)?class/(?:.+/)?(?P<cls>[^/]+)\.json$")
+
+# Metrics of requests nobody collects are dropped beyond this many
+METRICS_MAX_RECORDS = 10000
+
+# DME expects a token to be refreshed within this many seconds when the
+# login response does not carry refreshTimeoutSeconds.
+DEFAULT_TOKEN_TIMEOUT = 600
+
+
+class _ResponseCache(object):
+    """
+    LRU cache of GET responses with a TTL and a bound on the cached bytes.
+
+    Every entry remembers the DN (MO queries) or class (class queries) it was
+    read from, so that writes and change events can evict the entries they
+    may have made stale.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+
+    @staticmethod
+    def key(url):
+        split = urlsplit(url)
+        return "{0}?{1}".format(split.path, urlencode(sorted(parse_qsl(split.query))))
+
+    def get(self, url):
+        key = self.key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry["value"]
+
+    def put(self, url, value, size, ttl, max_bytes, subscription=None):
+        if size > max_bytes:
+            return
+
+        split = urlsplit(url)
+        mo_match = MO_URL_RE.match(split.path)
+        class_match = CLASS_URL_RE.match(split.path)
+        entry = {
+            "value": value,
+            "size": size,
+            "expires_at": time.time() + ttl,
+            "dn": unquote(mo_match.group("dn")) if mo_match else None,
+            "cls": class_match.group("cls") if class_match else None,
+            # Queries returning children may hold objects of any class
+            "subtree": any(
+                param in ("rsp-subtree", "query-target")
+                for param, _ in parse_qsl(split.query)
+            ),
+            "subscription": subscription,
+        }
+
+        key = self.key(url)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = entry
+            self._size += size
+            while self._size > max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def invalidate(self, dns=(), classes=None):
+        """
+        Evict the entries a write to dns touching classes may have changed.
+
+        MO entries are evicted when their DN is equal to, under or above one
+        of dns. Class entries are evicted when their class is in classes or
+        they include subtree objects, or always when classes is None, as for
+        writes, which may change objects of any class under dns. Entries that
+        are neither are always evicted.
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["dn"] is not None:
+                    stale = any(_dn_overlaps(entry["dn"], dn) for dn in dns)
+                elif entry["cls"] is not None:
+                    stale = (
+                        classes is None or entry["subtree"] or entry["cls"] in classes
+                    )
+                else:
+                    stale = True
+                if stale:
+                    self._evict(key)
+
+    def subscriptions(self):
+        """Return the subscription ids of the cached entries."""
+        with self._lock:
+            return set(
+                entry["subscription"]
+                for entry in self._entries.values()
+                if entry["subscription"] is not None
+            )
+
+    def extend_subscription(self, subscription, expires_at):
+        """Keep the entries of subscription cached until expires_at."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["subscription"] == subscription:
+                    entry["expires_at"] = expires_at
+
+    def invalidate_subscription(self, subscription):
+        """Evict the entries of subscription."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["subscription"] == subscription:
+                    self._evict(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self, key):
+        self._size -= self._entries.pop(key)["size"]
+
+
+def _dn_overlaps(dn, other):
+    """Return True when dn and other are equal or one contains the other."""
+    return dn == other or dn.startswith(other + "/") or other.startswith(dn + "/")
+
+
+def _written_scope(dn, payload, dns=None):
+    """
+    Collect the DNs affected by writing payload at dn.
+
+    Objects naming their own dn narrow the scope to that subtree, objects
+    without one are attributed to their parent's DN.
+    """
+    dns = set() if dns is None else dns
+    if not isinstance(payload, dict):
+        return dns
+
+    for mo in payload.values():
+        if not isinstance(mo, dict):
+            continue
+        mo_dn = (mo.get("attributes") or {}).get("dn") or dn
+        dns.add(mo_dn)
+        for child in mo.get("children") or []:
+            _written_scope(mo_dn, child, dns)
+    return dns
 
 
 class HttpApi(HttpApiBase):
 
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._auth_token = None
+        self._token_expires_at = None
+        self._token_from_cache = False
+        self._consecutive_failures = 0
+        self._circuit_open_until = None
+        self._auth_lock = threading.RLock()
+        # Login cookie each thread's current request was sent with
+        self._request_auth = threading.local()
+        # Retry deadline shared by the requests of a send_requests call
+        self._batch_deadline = None
+        self._response_cache = _ResponseCache()
+        self._options_digest = None
+        self._event_socket = None
+        self._event_dispatcher = None
+        self._event_count = 0
+        self._subscriptions = {}
+        self._metrics = deque(maxlen=METRICS_MAX_RECORDS)
+
+    def sync_options(self, digest, var_options=None):
+        """
+        Apply var_options to the connection unless they are applied already.
+
+        Called without var_options, only reports whether the options with
+        digest are the ones in use, so that callers can skip sending the
+        variables.
+
+        Returns:
+            True when the connection runs with the options of digest
+        """
+        if var_options is None:
+            return digest == self._options_digest
+
+        self.connection.set_options(var_options=var_options)
+        self._options_digest = digest
+        return True
+
+    def pop_metrics(self):
+        """
+        Return the metrics recorded since the previous call and forget them.
+
+        Returns:
+            List with one dictionary per request, in the order the requests
+            completed
+        """
+        metrics = []
+        while self._metrics:
+            metrics.append(self._metrics.popleft())
+        return metrics
+
+    def _start_metrics(self, request_method, url):
+        """
+        Return a new metrics record for a request.
+
+        Returns None when neither metrics nor a trace file are enabled.
+        """
+        if not (self.get_option("metrics") or self.get_option("trace_file")):
+            return None
+        split = urlsplit(url)
+        return {
+            "method": request_method,
+            "path": split.path,
+            "params": dict(parse_qsl(split.query)),
+            "status": None,
+            "cached": False,
+            "retries": 0,
+            "request_bytes": 0,
+            "response_bytes": 0,
+            "send_time": 0.0,
+            "decompress_time": 0.0,
+            "decode_time": 0.0,
+            "total_time": 0.0,
+            "started": time.perf_counter(),
+        }
+
+    def _finish_metrics(self, metrics, status):
+        if metrics is None:
+            return
+        metrics["status"] = status
+        metrics["total_time"] = time.perf_counter() - metrics.pop("started")
+        if self.get_option("metrics"):
+            self._metrics.append(metrics)
+        if self.get_option("trace_file"):
+            self._write_trace(metrics)
+
+    def _write_trace(self, metrics):
+        """Append metrics as a JSON line to the trace file."""
+        trace = dict(
+            metrics,
+            time=time.time() - metrics["total_time"],
+            host=self.connection.get_option("host"),
+        )
+        path = os.path.expanduser(self.get_option("trace_file"))
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                # A single write keeps lines of concurrent connections whole
+                os.write(fd, json_dumps(trace) + b"\n")
+            finally:
+                os.close(fd)
+        except OSError as e:
+            self.connection.queue_message(
+                "warning",
+                "Unable to write DME trace file {0}: {1}".format(path, to_text(e)),
+            )
+
     def send_request(
         self,
         request_method,
@@ -46,8 +520,27 @@ class HttpApi(HttpApiBase):
         params=None,
         data=None,
         headers=None,
+        attributes=None,
     ):
+        """
+        Send a REST request to the device.
 
+        The objects of a successful response are trimmed to attributes when
+        given, so only those cross the connection socket. Cached responses
+        are kept whole.
+        """
+        code, response = self._send_rest_request(
+            request_method,
+            url,
+            params,
+            data,
+            headers,
+        )
+        if attributes and 200 <= code < 300:
+            response = project_attributes(response, attributes)
+        return code, response
+
+    def _send_rest_request(self, request_method, url, params, data, headers):
         params = params if params else {}
         headers = headers if headers else BASE_HEADERS
         data = data if data else {}
@@ -57,22 +550,335 @@ class HttpApi(HttpApiBase):
             for param in params:
                 if params[param] is not None:
                     params_with_val[param] = params[param]
-            url = "{0}?{1}".format(url, urlencode(params_with_val))
+            url = "{0}{1}{2}".format(
+                url,
+                "&" if "?" in url else "?",
+                urlencode(params_with_val),
+            )
+
+        if self._subscriptions:
+            with self._auth_lock:
+                self._refresh_subscriptions()
+
+        if request_method == "GET":
+            if self.get_option("response_cache"):
+                cached = self._response_cache.get(url)
+                if cached is not None:
+                    self.connection.queue_message(
+                        "vvvv",
+                        "DME API REST: %s %s served from cache" % (request_method, url),
+                    )
+                    metrics = self._start_metrics(request_method, url)
+                    if metrics is not None:
+                        metrics["cached"] = True
+                        self._finish_metrics(metrics, cached[0])
+                    return cached
+
+            return self._send_get_request(url, data, headers)
+
+        try:
+            code, response, _ = self._send_request(request_method, url, data, headers)
+        finally:
+            self._invalidate_cached_responses(url, data)
+        return code, response
+
+    def send_requests(self, requests):
+        """
+        Send several requests, up to max_concurrent_requests at a time.
+
+        ansible-connection serves one call at a time, so requests that
+        should overlap have to be handed over together. Each runs through
+        send_request and gets the response cache, retries and metrics of a
+        single request.
+
+        The whole call has to finish within the persistent connection's
+        command timeout. Requests are only started in the first half of the
+        retry budget and all retries share its deadline, requests that were
+        not started in time are left for the next call.
+
+        Args:
+            requests: List of dictionaries of send_request arguments
+
+        Returns:
+            List of (code, response) tuples in the order of requests, None
+            for requests that were not sent
+
+        Raises:
+            The error of the first failed request, once all requests finished
+        """
+        budget = self._retry_budget()
+        started = time.time()
+        start_deadline = started + budget / 2
+        self._batch_deadline = started + budget
+
+        def send(index):
+            # The first request is always sent, so every call makes progress
+            if index and time.time() > start_deadline:
+                return None
+            return self.send_request(**requests[index])
+
+        try:
+            workers = min(
+                self.get_option("max_concurrent_requests") or 1,
+                len(requests),
+            )
+            if workers <= 1:
+                return [send(index) for index in range(len(requests))]
+
+            # Only tasks sending several queries at once need the thread pool
+            from concurrent.futures import ThreadPoolExecutor
+
+            with self._auth_lock:
+                # Log in before the workers start, instead of in each of them
+                self.connection._connect()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(send, index) for index in range(len(requests))
+                ]
+            return [future.result() for future in futures]
+        finally:
+            self._batch_deadline = None
+
+    def _send_get_request(self, url, data, headers):
+        if not self.get_option("response_cache"):
+            code, response, _ = self._send_request("GET", url, data, headers)
+            return code, response
+
+        subscribe = self._subscribe_to(url)
+        request_url = url
+        if subscribe:
+            request_url = "{0}{1}subscription=yes".format(
+                url,
+                "&" if "?" in url else "?",
+            )
+        events_before = self._event_count
+
+        code, response, size = self._send_request("GET", request_url, data, headers)
+        if not 200 <= code < 300:
+            return code, response
+
+        ttl = self.get_option("response_cache_ttl")
+        subscription = None
+        if subscribe and isinstance(response, dict):
+            subscription = response.get("subscriptionId")
+            # An event that arrived while the request was in flight may
+            # already describe a change the response does not contain
+            if subscription is not None and self._event_count != events_before:
+                return code, response
+            if subscription is not None:
+                subscription = to_text(subscription)
+                ttl = SUBSCRIPTION_TIMEOUT
+                self._subscriptions.setdefault(subscription, time.time())
+
+        self._response_cache.put(
+            url,
+            (code, response),
+            size,
+            ttl,
+            self.get_option("response_cache_max_bytes"),
+            subscription=subscription,
+        )
+        return code, response
+
+    def _subscribe_to(self, url):
+        """
+        Return True when changes to the query of url should be subscribed to.
+
+        Opens the event websocket on first use. Subscriptions are skipped when
+        the websocket cannot be opened.
+        """
+        if not self.get_option("subscriptions") or not self._auth_token:
+            return False
+        path = urlsplit(url).path
+        if not (MO_URL_RE.match(path) or CLASS_URL_RE.match(path)):
+            return False
+        with self._auth_lock:
+            if self._event_socket is None or self._event_socket.closed:
+                self._open_event_socket()
+            return self._event_socket is not None
+
+    def _open_event_socket(self):
+        # Only connections with subscriptions enabled need the websocket client
+        from ansible_collections.cisco.dme.plugins.plugin_utils.websocket import (
+            WebSocket,
+            WebSocketError,
+        )
+
+        options = self.connection.get_options()
+        use_ssl = options.get("use_ssl")
+        use_ssl = True if use_ssl is None else use_ssl
+        port = options.get("port") or (443 if use_ssl else 80)
+        try:
+            event_socket = WebSocket.connect(
+                options.get("host"),
+                port,
+                EVENT_SOCKET_PATH + self._auth_token,
+                use_ssl=use_ssl,
+                validate_certs=options.get("validate_certs", True),
+                timeout=options.get("persistent_command_timeout")
+                or DEFAULT_COMMAND_TIMEOUT,
+            )
+        except (OSError, WebSocketError) as e:
+            self.connection.queue_message(
+                "warning",
+                "Unable to open the DME event websocket, not subscribing "
+                "to changes: {0}".format(to_text(e)),
+            )
+            self._event_socket = None
+            return
+
+        self._event_socket = event_socket
+        self._event_dispatcher = threading.Thread(
+            target=self._dispatch_events,
+            args=(event_socket,),
+            name="dme-events",
+        )
+        self._event_dispatcher.daemon = True
+        self._event_dispatcher.start()
+        self.connection.queue_message("vvvv", "opened DME event websocket")
+
+    def _dispatch_events(self, event_socket):
+        """
+        Apply the change events pushed over event_socket to the response cache.
+
+        Runs in its own thread until the websocket closes. Once it closed, no
+        further events arrive, so every subscribed entry is evicted.
+        """
+        while True:
+            message = event_socket.recv()
+            if message is None:
+                break
+            self._event_count += 1
+            try:
+                event = json_loads(message)
+            except ValueError:
+                continue
+            self._apply_event(event)
+
+        for subscription in self._response_cache.subscriptions():
+            self._response_cache.invalidate_subscription(subscription)
+
+    def _apply_event(self, event):
+        if not isinstance(event, dict):
+            return
+
+        subscriptions = event.get("subscriptionId") or []
+        if not isinstance(subscriptions, list):
+            subscriptions = [subscriptions]
+        for subscription in subscriptions:
+            self._response_cache.invalidate_subscription(to_text(subscription))
+
+        dns = set()
+        classes = set()
+        for mo in event.get("imdata") or []:
+            if not isinstance(mo, dict):
+                continue
+            for cls, body in mo.items():
+                classes.add(cls)
+                dn = ((body or {}).get("attributes") or {}).get("dn")
+                if dn:
+                    dns.add(dn)
+        if dns or classes:
+            self._response_cache.invalidate(dns=dns, classes=classes)
+
+    def _refresh_subscriptions(self):
+        """
+        Refresh the subscriptions of cached entries before DME drops them.
+
+        Subscriptions without cached entries are forgotten, entries of
+        subscriptions that already expired or fail to refresh are evicted.
+        """
+        live = self._response_cache.subscriptions()
+        now = time.time()
+        for subscription, refreshed_at in list(self._subscriptions.items()):
+            if subscription not in live:
+                del self._subscriptions[subscription]
+                continue
+            if now < refreshed_at + SUBSCRIPTION_TIMEOUT / 2:
+                continue
+
+            refreshed = False
+            if now < refreshed_at + SUBSCRIPTION_TIMEOUT:
+                try:
+                    response, response_data = self.connection.send(
+                        "{0}?{1}".format(
+                            SUBSCRIPTION_REFRESH_URL,
+                            urlencode({"id": subscription}),
+                        ),
+                        None,
+                        method="GET",
+                        headers=BASE_HEADERS,
+                    )
+                    response_data.close()
+                    refreshed = response.getcode() < 400
+                except (HTTPError, AnsibleConnectionFailure, OSError):
+                    pass
+
+            if refreshed:
+                self._subscriptions[subscription] = now
+                self._response_cache.extend_subscription(
+                    subscription,
+                    now + SUBSCRIPTION_TIMEOUT,
+                )
+            else:
+                del self._subscriptions[subscription]
+                self._response_cache.invalidate_subscription(subscription)
+
+    def _close_event_socket(self):
+        if self._event_socket is not None:
+            self._event_socket.close()
+            self._event_socket = None
+        self._subscriptions = {}
+
+    def _send_request(self, request_method, url, data, headers):
+        metrics = self._start_metrics(request_method, url)
+        status = None
         try:
             self._display_request(request_method)
 
-            response, response_data = self.connection.send(
+            response, response_data = self._send(
+                request_method,
                 url,
-                to_bytes(json.dumps(data)),
-                method=request_method,
-                headers=headers,
+                json_dumps(data),
+                headers,
+                metrics,
             )
             value = self._get_response_value(response_data)
+            status = response.getcode()
+
+            decode_started = time.perf_counter()
+            response_json = self._response_to_json(value)
+            if metrics is not None:
+                metrics["decode_time"] = time.perf_counter() - decode_started
 
         except HTTPError as e:
-            error = json.loads(e.read())
-            return e.code, error
-        return response.getcode(), self._response_to_json(value)
+            status = e.code
+            return e.code, self._read_http_error(e), 0
+        finally:
+            self._finish_metrics(metrics, status)
+        return status, response_json, len(value)
+
+    def _invalidate_cached_responses(self, url, data):
+        """
+        Evict cached responses a write to url with data may have changed.
+
+        Writes without a payload that names its objects, such as a DELETE,
+        are scoped to the DN in the URL. Every cached class query is evicted,
+        the DNs of the objects it returned are not known, and any of them may
+        be under the written subtree, whatever classes the payload names.
+        """
+        path = urlsplit(url).path
+        if path.startswith("/api/aaa"):
+            return
+
+        mo_match = MO_URL_RE.match(path)
+        if not mo_match:
+            self._response_cache.clear()
+            return
+
+        url_dn = unquote(mo_match.group("dn"))
+        dns = _written_scope(url_dn, data)
+        self._response_cache.invalidate(dns=dns or {url_dn})
 
     def send_validate_request(
         self,
@@ -85,35 +891,11 @@ class HttpApi(HttpApiBase):
         """
         Send validation request using JSON-RPC protocol.
 
-        Note: This method uses direct requests due to the need for JSON-RPC protocol
-        which is different from the standard REST API. This should be refactored
-        to use Ansible's connection framework when possible.
-        """
-        connection_options = self.connection.get_options()
-        username = connection_options.get("remote_user")
-        password = connection_options.get("password")
-
-        if not username or not password:
-            raise AnsibleAuthenticationFailure("Username and password are required")
-
-        credentials = f"{username}:{password}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        self.session_key = encoded_credentials
-        self._auth_header = f"Basic {encoded_credentials}"
-
-        # Generate a dynamic CSRF token instead of using hardcoded value
-        csrf_token = hashlib.md5(f"{username}{time.time()}".encode()).hexdigest()[:16]
-
-        headers = {
-            "Authorization": self._auth_header,
-            "Content-Type": "application/json-rpc",
-            "Host": self.connection.get_options().get("host")
-            + ":"
-            + to_text(self.connection.get_options().get("port")),
-            "Origin": self.connection._url,
-            "Referer": self.connection._url + "/",
-            "anticsrf": csrf_token,
-        }
+        The JSON-RPC endpoint is served by the same web server as the DME REST
+        API, so the request goes through the persistent connection and shares
+        its authentication cookie, timeout, proxy and certificate settings.
+        """
+        headers = headers if headers else JSONRPC_HEADERS
         params = params if params else {}
         data = data if data else {}
 
@@ -122,52 +904,242 @@ class HttpApi(HttpApiBase):
             for param in params:
                 if params[param] is not None:
                     params_with_val[param] = params[param]
-            url = "{0}?{1}".format(url, urlencode(params_with_val))
+            url = "{0}{1}{2}".format(
+                url,
+                "&" if "?" in url else "?",
+                urlencode(params_with_val),
+            )
 
+        metrics = self._start_metrics(request_method, url)
+        code = None
         try:
             self._display_request(request_method)
 
-            # TODO: Refactor to use Ansible's connection framework
-            # This direct requests usage should be replaced with proper connection handling
-            import requests
-            from requests.packages.urllib3.exceptions import InsecureRequestWarning
+            response, response_data = self._send(
+                request_method,
+                url,
+                json_dumps(data),
+                headers,
+                metrics,
+            )
+            code = response.getcode()
+            decode_started = time.perf_counter()
+            json_response = self._response_to_json(
+                self._get_response_value(response_data),
+            )
+            if code >= 400:
+                return code, json_response
 
-            session = requests.Session()
+            try:
+                error_map = {}
+                for data_idx in range(len(json_response)):
+                    if json_response[data_idx].get("error"):
+                        error_map[data_idx] = ""
 
-            # Respect SSL verification settings from connection options
-            validate_certs = connection_options.get("validate_certs", True)
-            session.verify = validate_certs
+                dme_data = json_loads(json_response[-1]["result"]["msg"])
+            except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+                raise AnsibleAuthenticationFailure(f"Invalid response format: {str(e)}")
+            if metrics is not None:
+                metrics["decode_time"] = time.perf_counter() - decode_started
 
-            if not validate_certs:
-                # Suppress only the specific warning about unverified HTTPS requests
-                requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+        except HTTPError as e:
+            code = e.code
+            return e.code, self._read_http_error(e)
+        finally:
+            self._finish_metrics(metrics, code)
 
-            response_data = session.post(
-                self.connection._url + "/ins",
-                data=to_bytes(json.dumps(data)),
-                headers=headers,
-                timeout=30,
+        return code, {
+            "dme_data": dme_data,
+            "errors": error_map,
+        }
+
+    def _send(self, request_method, url, body, headers, metrics=None):
+        """
+        Send a request over the persistent connection.
+
+        Renews the login token when needed, negotiates compression and returns
+        the response together with its decompressed body buffer. Sizes and
+        timings are added to metrics when given.
+        """
+        with self._auth_lock:
+            self._refresh_token_if_needed()
+            self._request_auth.value = self.connection._auth
+
+        send_kwargs = {}
+        if self.get_option("compression"):
+            headers = dict(headers, **COMPRESSION_HEADERS)
+            # Both gzip and deflate are decoded here, not only open_url's gzip
+            send_kwargs["decompress"] = False
+
+            threshold = self.get_option("request_compression_threshold")
+            if threshold and request_method != "GET" and len(body) >= threshold:
+                body = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+
+        if metrics is not None:
+            metrics["request_bytes"] = len(body)
+
+        response, response_data = self._send_with_retry(
+            request_method,
+            url,
+            body,
+            headers,
+            send_kwargs,
+            metrics,
+        )
+        if metrics is not None:
+            with response_data.getbuffer() as view:
+                metrics["response_bytes"] = view.nbytes
+        if send_kwargs:
+            decompress_started = time.perf_counter()
+            response_data = self._decompress(response, response_data)
+            if metrics is not None:
+                metrics["decompress_time"] = time.perf_counter() - decompress_started
+        return response, response_data
+
+    def _send_with_retry(
+        self,
+        request_method,
+        url,
+        body,
+        headers,
+        send_kwargs,
+        metrics=None,
+    ):
+        """
+        Send a request, retrying transient failures with backoff.
+
+        Retries stop once the next attempt would start later than the retry
+        budget allows, so the task still gets an answer before the persistent
+        connection's command timeout. Consecutive failed requests are counted
+        per host; once the circuit breaker threshold is reached, requests fail
+        immediately until the cooldown has passed.
+        """
+        self._check_circuit_breaker()
+
+        retries = self.get_option("retries")
+        # Requests sent together share the deadline of their call
+        deadline = self._batch_deadline or time.time() + self._retry_budget()
+        attempt = 0
+        while True:
+            if metrics is not None:
+                metrics["retries"] = attempt
+            send_started = time.perf_counter()
+            try:
+                response, response_data = self.connection.send(
+                    url,
+                    body,
+                    method=request_method,
+                    headers=headers,
+                    **send_kwargs,
+                )
+            except HTTPError:
+                raise
+            except (AnsibleConnectionFailure, OSError):
+                if request_method == "GET" and attempt < retries:
+                    attempt += 1
+                    if self._retry_sleep(attempt, deadline):
+                        continue
+                self._record_failure()
+                raise
+            finally:
+                if metrics is not None:
+                    metrics["send_time"] += time.perf_counter() - send_started
+
+            code = response.getcode()
+            retryable = code in RETRY_STATUS_CODES or (
+                request_method == "GET" and code in RETRY_IDEMPOTENT_STATUS_CODES
             )
-            response_data.raise_for_status()
+            if retryable and attempt < retries:
+                attempt += 1
+                retry_after = response.info().get("Retry-After")
+                if self._retry_sleep(attempt, deadline, retry_after):
+                    continue
+            break
 
-            error_map = {}
-            json_response = response_data.json()
-            for data_idx in range(len(json_response)):
-                if json_response[data_idx].get("error"):
-                    error_map[data_idx] = ""
+        if code >= 500 or code in RETRY_STATUS_CODES:
+            self._record_failure()
+        else:
+            self._record_success()
+        return response, response_data
 
-        except requests.exceptions.RequestException as e:
-            raise AnsibleAuthenticationFailure(f"Request failed: {str(e)}")
-        except (ValueError, KeyError) as e:
-            raise AnsibleAuthenticationFailure(f"Invalid response format: {str(e)}")
-        except HTTPError as e:
-            error = json.loads(e.read())
-            return e.code, error
+    def _retry_budget(self):
+        """Return the number of seconds a request may spend on retries."""
+        command_timeout = (
+            self.connection.get_option("persistent_command_timeout")
+            or DEFAULT_COMMAND_TIMEOUT
+        )
+        return max(command_timeout - RETRY_TIMEOUT_MARGIN, 0)
 
-        return 200, {
-            "dme_data": json.loads(json_response[-1]["result"]["msg"]),
-            "errors": error_map,
-        }
+    def _retry_sleep(self, attempt, deadline, retry_after=None):
+        """
+        Wait before the next attempt.
+
+        Returns False without waiting when the delay would run past deadline.
+        """
+        delay = random.uniform(0, self.get_option("retry_backoff") * 2 ** (attempt - 1))
+        if retry_after and to_text(retry_after).strip().isdigit():
+            delay = float(retry_after)
+        delay = min(delay, RETRY_MAX_DELAY)
+        if time.time() + delay >= deadline:
+            self.connection.queue_message(
+                "vvvv",
+                "not retrying DME request, the retry budget is exhausted",
+            )
+            return False
+
+        self.connection.queue_message(
+            "vvvv",
+            "retrying DME request in %.2f seconds (attempt %d)" % (delay, attempt),
+        )
+        time.sleep(delay)
+        return True
+
+    def _check_circuit_breaker(self):
+        if self._circuit_open_until is None:
+            return
+
+        remaining = self._circuit_open_until - time.time()
+        if remaining > 0:
+            raise AnsibleConnectionFailure(
+                "Circuit breaker open for {0} after {1} consecutive failed requests, "
+                "failing fast for another {2:.0f} seconds".format(
+                    self.connection.get_option("host"),
+                    self._consecutive_failures,
+                    remaining,
+                ),
+            )
+
+    def _record_failure(self):
+        self._consecutive_failures += 1
+        threshold = self.get_option("circuit_breaker_threshold")
+        if threshold and self._consecutive_failures >= threshold:
+            self._circuit_open_until = time.time() + self.get_option(
+                "circuit_breaker_cooldown",
+            )
+
+    def _record_success(self):
+        self._consecutive_failures = 0
+        self._circuit_open_until = None
+
+    def _decompress(self, response, response_data):
+        encoding = (response.info().get("Content-Encoding") or "").lower()
+        if encoding not in ("gzip", "deflate"):
+            return response_data
+
+        with response_data.getbuffer() as view:
+            try:
+                # Accepts both gzip and zlib wrapped streams
+                raw = zlib.decompress(view, zlib.MAX_WBITS | 32)
+            except zlib.error:
+                # Some servers send raw deflate streams without the zlib header
+                raw = zlib.decompress(view, -zlib.MAX_WBITS)
+        response_data.close()
+        return BytesIO(raw)
+
+    def _read_http_error(self, exc):
+        error = self._decompress(exc, BytesIO(exc.read()))
+        return json_loads(self._get_response_value(error))
 
     def _display_request(self, request_method):
         self.connection.queue_message(
@@ -176,16 +1148,33 @@ class HttpApi(HttpApiBase):
         )
 
     def _get_response_value(self, response_data):
-        return to_text(response_data.getvalue())
+        """
+        Decode the response buffer to text.
+
+        The text is decoded straight from a view of the buffer rather than from
+        a bytes copy, and the buffer is released before the JSON is parsed, so
+        large responses never hold raw bytes, text and parsed objects at once.
+        """
+        with response_data.getbuffer() as view:
+            value = str(view, "utf-8", "surrogateescape")
+        response_data.close()
+        return value
 
     def _response_to_json(self, response_text):
         try:
-            return json.loads(response_text) if response_text else {}
+            return json_loads(response_text) if response_text else {}
         except ValueError:
             return response_text
 
     def login(self, username, password):
 
+        if self.get_option("token_cache"):
+            cached = self._load_cached_token(username)
+            if cached:
+                self._set_auth_token(cached)
+                self._token_from_cache = True
+                return
+
         login_path = LOGIN_URL
         auth_data = {"aaaUser": {"attributes": {"name": username, "pwd": password}}}
 
@@ -199,29 +1188,182 @@ class HttpApi(HttpApiBase):
                 )
 
             auth_data = auth_data_raw.get("imdata")[0].get("aaaLogin").get("attributes")
-
-            self._auth_token = auth_data.get("token")
-            self.connection._auth = {"Cookie": f"APIC-cookie={self._auth_token}"}
-            self._session_id = auth_data.get("sessionId")
-            self._username = auth_data.get("userName")
-            self._siteFineprint = auth_data.get("siteFingerprint")
+            self._set_auth_token(auth_data)
+            self._token_from_cache = False
 
         except KeyError:
             raise AnsibleAuthenticationFailure(
                 message="Failed to acquire login token.",
             )
 
+        if self.get_option("token_cache"):
+            self._store_cached_token(username)
+
+    def _set_auth_token(self, auth_data):
+        self._auth_token = auth_data["token"]
+        self.connection._auth = {"Cookie": f"APIC-cookie={self._auth_token}"}
+        self._session_id = auth_data.get("sessionId")
+        self._username = auth_data.get("userName")
+        self._siteFineprint = auth_data.get("siteFingerprint")
+
+        expires_at = auth_data.get("expiresAt")
+        if expires_at is None:
+            timeout = auth_data.get("refreshTimeoutSeconds") or DEFAULT_TOKEN_TIMEOUT
+            expires_at = time.time() + int(timeout)
+        self._token_expires_at = float(expires_at)
+
+    def _refresh_token_if_needed(self):
+        """
+        Renew the login token before it expires.
+
+        Tokens inside the refresh margin are renewed through aaaRefresh, which
+        is a single GET with the current cookie. Tokens that already expired
+        cannot be refreshed and go through a full login instead.
+        """
+        if not self.connection._auth or self._token_expires_at is None:
+            return
+
+        now = time.time()
+        if now < self._token_expires_at - self.get_option("token_refresh_margin"):
+            return
+
+        if now < self._token_expires_at:
+            try:
+                response, response_data = self.connection.send(
+                    REFRESH_URL,
+                    None,
+                    method="GET",
+                    headers=BASE_HEADERS,
+                )
+                refresh_data = self._response_to_json(
+                    self._get_response_value(response_data),
+                )
+                if response.getcode() < 400:
+                    auth_data = refresh_data["imdata"][0]["aaaLogin"]["attributes"]
+                    self._set_auth_token(auth_data)
+                    self._token_from_cache = False
+                    self.connection.queue_message("vvvv", "refreshed DME login token")
+                    if self.get_option("token_cache"):
+                        self._store_cached_token(
+                            self.connection.get_option("remote_user")
+                        )
+                    return
+            except (HTTPError, IndexError, KeyError, TypeError):
+                pass
+
+        self._discard_cached_token()
+        self.connection._auth = None
+        self.login(
+            self.connection.get_option("remote_user"),
+            self.connection.get_option("password"),
+        )
+
+    def _token_cache_path(self, username):
+        key = "{0}:{1}:{2}".format(
+            self.connection.get_option("host"),
+            self.connection.get_option("port"),
+            username,
+        )
+        return os.path.join(
+            os.path.expanduser(self.get_option("token_cache_dir")),
+            hashlib.sha256(to_bytes(key)).hexdigest() + ".json",
+        )
+
+    def _load_cached_token(self, username):
+        """
+        Return the cached login attributes for username, if still usable.
+
+        Token files that are expired, unreadable, not owned by the current
+        user or accessible by group/other are ignored.
+        """
+        path = self._token_cache_path(username)
+        try:
+            stat = os.stat(path)
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+                return None
+            with open(path) as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(cached, dict) or not cached.get("token"):
+            return None
+        if float(cached.get("expiresAt", 0)) <= time.time():
+            self._discard_cached_token()
+            return None
+
+        self.connection.queue_message("vvvv", "using cached DME login token")
+        return cached
+
+    def _store_cached_token(self, username):
+        path = self._token_cache_path(username)
+        cached = {
+            "token": self._auth_token,
+            "sessionId": self._session_id,
+            "userName": self._username,
+            "siteFingerprint": self._siteFineprint,
+            "expiresAt": self._token_expires_at,
+        }
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump(cached, cache_file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.connection.queue_message(
+                "warning",
+                "Unable to write DME token cache {0}: {1}".format(path, to_text(e)),
+            )
+
+    def _discard_cached_token(self):
+        self._token_from_cache = False
+        if not self.get_option("token_cache"):
+            return
+        try:
+            os.remove(self._token_cache_path(self.connection.get_option("remote_user")))
+        except OSError:
+            pass
+
+    def handle_httperror(self, exc):
+        if exc.code in (401, 403) and self.connection._auth:
+            with self._auth_lock:
+                sent_auth = getattr(self._request_auth, "value", None)
+                if sent_auth and sent_auth is not self.connection._auth:
+                    # A concurrent request logged in again while this one was
+                    # in flight, resend it with the new token
+                    self._request_auth.value = self.connection._auth
+                    return True
+
+                from_cache = self._token_from_cache
+                if exc.code == 401 or from_cache:
+                    # The token was rejected, never hand it out from the cache again
+                    self._discard_cached_token()
+                    self.connection._auth = None
+                    self.login(
+                        self.connection.get_option("remote_user"),
+                        self.connection.get_option("password"),
+                    )
+                    self._request_auth.value = self.connection._auth
+                    return True
+
+        return super(HttpApi, self).handle_httperror(exc)
+
     def logout(self):
         if self.connection._auth is not None:
-            code, auth_data_raw = self.send_request(
-                "POST",
-                LOGOUT_URL,
-                data={
-                    "aaaUser": {
-                        "attributes": {"name": ""},
+            if not self.get_option("token_cache"):
+                code, auth_data_raw = self.send_request(
+                    "POST",
+                    LOGOUT_URL,
+                    data={
+                        "aaaUser": {
+                            "attributes": {"name": ""},
+                        },
                     },
-                },
-            )
+                )
+            self._close_event_socket()
             # Clean up all tokens
             self.connection._auth = None
             self._auth_token = None
+            self._token_expires_at = None
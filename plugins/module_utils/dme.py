@@ -7,19 +7,177 @@
 from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
-try:
-    from ssl import CertificateError
-except ImportError:
-    from backports.ssl_match_hostname import CertificateError
 
-from ansible.module_utils._text import to_text
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.connection import Connection, ConnectionError
+from ansible.module_utils.parsing.convert_bool import boolean
 
 BASE_HEADERS = {
     "Content-Type": "application/json",
     "Accept": "application/json",
 }
 
+COUNT_PARAMS = {"rsp-subtree-include": "count"}
+
+# Operators of DME filter expressions. Comparisons take a class property
+# and the number of values given here, logical operators take expressions.
+FILTER_COMPARISONS = {
+    "eq": 1,
+    "ne": 1,
+    "lt": 1,
+    "le": 1,
+    "gt": 1,
+    "ge": 1,
+    "bw": 2,
+    "wcard": 1,
+    "anybit": 1,
+    "allbits": 1,
+}
+FILTER_LOGICAL = ("and", "or", "not")
+
+CLASS_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9]*$")
+PROPERTY_RE = re.compile(r"^[A-Za-z][A-Za-z0-9]*\.[A-Za-z][A-Za-z0-9]*$")
+ORDER_BY_RE = re.compile(
+    r"^[A-Za-z][A-Za-z0-9]*\.[A-Za-z][A-Za-z0-9]*(?:\|(?:asc|desc))?$",
+)
+ATTRIBUTE_RE = re.compile(r"^(?:[A-Za-z][A-Za-z0-9]*\.)?[A-Za-z][A-Za-z0-9]*$")
+FILTER_TOKEN_RE = re.compile(r'\s*(?:([A-Za-z][A-Za-z0-9.]*)|"([^"]*)"|([(),]))')
+
+# Magic and play variables that never configure the connection but can be
+# large, for example the list of every host in the play
+NOT_CONNECTION_VARS = frozenset(
+    (
+        "ansible_dependent_role_names",
+        "ansible_facts",
+        "ansible_inventory_sources",
+        "ansible_local",
+        "ansible_play_batch",
+        "ansible_play_hosts",
+        "ansible_play_hosts_all",
+        "ansible_play_role_names",
+        "ansible_role_names",
+        "ansible_run_tags",
+        "ansible_search_path",
+        "ansible_skip_tags",
+    ),
+)
+
+
+def _stdlib_loads(data):
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj):
+    return to_bytes(json.dumps(obj))
+
+
+def _orjson_backend():
+    import orjson
+
+    def dumps(obj):
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # Keys that are not strings and integers beyond 64 bit
+            return _stdlib_dumps(obj)
+
+    return orjson.loads, dumps
+
+
+def _ujson_backend():
+    import ujson
+
+    def dumps(obj):
+        return to_bytes(
+            ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False),
+        )
+
+    return ujson.loads, dumps
+
+
+# Optional backends, fastest first. They are only imported once a document
+# is encoded or decoded, most tasks never need them.
+OPTIONAL_JSON_BACKENDS = (("orjson", _orjson_backend), ("ujson", _ujson_backend))
+
+_json_backends = None
+
+
+def json_backends():
+    """
+    Return the importable JSON backends.
+
+    Returns:
+        Dictionary of backend name to (loads, dumps) functions, ordered
+        fastest first and always ending with the standard library's ``json``
+    """
+    global _json_backends
+    if _json_backends is None:
+        backends = {}
+        for name, load_backend in OPTIONAL_JSON_BACKENDS:
+            try:
+                backends[name] = load_backend()
+            except ImportError:
+                pass
+        backends["json"] = (_stdlib_loads, _stdlib_dumps)
+        _json_backends = backends
+    return _json_backends
+
+
+def json_backend():
+    """Return the name of the backend used by json_loads and json_dumps."""
+    return next(iter(json_backends()))
+
+
+def json_loads(data):
+    """
+    Decode a JSON document with the fastest available backend.
+
+    Documents the backend rejects are decoded again with the standard
+    library, which accepts a few inputs the others do not, such as text
+    holding lone surrogates.
+
+    Args:
+        data: JSON document as text or bytes
+
+    Raises:
+        ValueError: When the document is not valid JSON
+    """
+    name = json_backend()
+    try:
+        return json_backends()[name][0](data)
+    except ValueError:
+        if name == "json":
+            raise
+        return json.loads(data)
+
+
+def json_dumps(obj):
+    """
+    Encode obj as JSON with the fastest available backend.
+
+    Returns:
+        The UTF-8 encoded document as bytes
+    """
+    return json_backends()[json_backend()][1](obj)
+
+
+def _certificate_error():
+    """
+    Return the exception type raised for invalid certificates.
+
+    ssl is expensive to import and only whatever raised the error needs it,
+    so without ssl loaded there is no certificate error to catch.
+    """
+    ssl = sys.modules.get("ssl")
+    return ssl.CertificateError if ssl is not None else ()
+
 
 def find_dict_in_list(some_list, key, value):
     """
@@ -60,6 +218,549 @@ def find_dict_in_list(some_list, key, value):
     return None
 
 
+def connection_vars(task_vars):
+    """
+    Select the task variables that can configure the persistent connection.
+
+    Connection and httpapi plugin options are read from ansible_* variables
+    and inventory_hostname, everything else is left out so it does not have
+    to be serialized to the connection.
+
+    Args:
+        task_vars: Task variables from Ansible execution context
+
+    Returns:
+        Tuple of (variables, digest) where digest identifies the variables
+    """
+    variables = dict(
+        (name, value)
+        for name, value in (task_vars or {}).items()
+        if name == "inventory_hostname"
+        or (name.startswith("ansible_") and name not in NOT_CONNECTION_VARS)
+    )
+    digest = hashlib.sha256(
+        to_bytes(json.dumps(variables, sort_keys=True, default=to_text)),
+    ).hexdigest()
+    return variables, digest
+
+
+def metrics_enabled(task_vars):
+    """
+    Return whether the httpapi plugin's metrics option is enabled.
+
+    Mirrors the option's sources, the ansible_httpapi_dme_metrics variable
+    taking precedence over the ANSIBLE_DME_METRICS environment variable, so
+    that tasks without metrics do not ask the connection for them.
+    """
+    value = (task_vars or {}).get(
+        "ansible_httpapi_dme_metrics",
+        os.environ.get("ANSIBLE_DME_METRICS", False),
+    )
+    return boolean(value, strict=False)
+
+
+def count_from_response(response):
+    """
+    Read the object count from a DME query sent with rsp-subtree-include=count.
+
+    Args:
+        response: Response data of the count query
+
+    Returns:
+        The count as int, None if the response carries no count
+    """
+    try:
+        return int(response["imdata"][0]["moCount"]["attributes"]["count"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _filter_value(value):
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(
+            f"Invalid filter value {value!r}, quote values that look like booleans",
+        )
+    value = to_text(value)
+    if '"' in value:
+        raise ValueError(f"Filter values cannot contain double quotes: {value}")
+    return f'"{value}"'
+
+
+def dme_filter(expression):
+    """
+    Build a DME filter expression, e.g. for query-target-filter.
+
+    The expression is either a filter string, which is parsed to validate
+    it, or a dictionary holding a single operator:
+
+    - comparisons take a list of a class property and its values, one for
+      all but ``bw``, which takes the lower and upper bound:
+      ``{"eq": ["l1PhysIf.adminSt", "up"]}``
+    - ``and`` and ``or`` take a list of expressions, ``not`` a single one:
+      ``{"and": [{"eq": [...]}, {"wcard": ["l1PhysIf.descr", "^uplink"]}]}``
+
+    Args:
+        expression: Filter string or dictionary
+
+    Returns:
+        The filter expression, e.g. ``and(eq(l1PhysIf.adminSt,"up"),...)``
+
+    Raises:
+        ValueError: On the first invalid operator, property or value
+    """
+    if isinstance(expression, str):
+        expression = parse_filter(expression)
+    if not isinstance(expression, dict) or len(expression) != 1:
+        raise ValueError(
+            f"A filter expression is a dictionary with one operator: {expression!r}",
+        )
+
+    operator, operands = next(iter(expression.items()))
+    if operator == "not":
+        if isinstance(operands, list) and len(operands) == 1:
+            operands = operands[0]
+        return f"not({dme_filter(operands)})"
+    if operator in FILTER_LOGICAL:
+        if not isinstance(operands, list) or not operands:
+            raise ValueError(f"{operator} takes a list of filter expressions")
+        return f"{operator}({','.join(dme_filter(operand) for operand in operands)})"
+    if operator not in FILTER_COMPARISONS:
+        raise ValueError(f"Unknown filter operator: {operator}")
+
+    arity = FILTER_COMPARISONS[operator] + 1
+    if not isinstance(operands, list) or len(operands) != arity:
+        raise ValueError(
+            f"{operator} takes a list of a class property and "
+            f"{arity - 1} value{'s' if arity > 2 else ''}",
+        )
+    prop = operands[0]
+    if not isinstance(prop, str) or not PROPERTY_RE.match(prop):
+        raise ValueError(f"Invalid filter property {prop!r}, expected <class>.<name>")
+    values = ",".join(_filter_value(value) for value in operands[1:])
+    return f"{operator}({prop},{values})"
+
+
+def parse_filter(text):
+    """
+    Parse a DME filter string into the dictionary form of dme_filter().
+
+    Raises:
+        ValueError: When the string is not a valid filter expression
+    """
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = FILTER_TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(
+                f"Invalid filter expression at position {position}: {text}",
+            )
+        name, string, punct = match.groups()
+        if name is not None:
+            tokens.append(("name", name))
+        elif string is not None:
+            tokens.append(("string", string))
+        else:
+            tokens.append((punct, punct))
+        position = match.end()
+        while position < len(text) and text[position].isspace():
+            position += 1
+
+    def expect(index, kind):
+        if index >= len(tokens) or tokens[index][0] != kind:
+            raise ValueError(f"Invalid filter expression, expected {kind}: {text}")
+        return tokens[index][1]
+
+    def parse(index):
+        operator = expect(index, "name")
+        expect(index + 1, "(")
+        index += 2
+        operands = []
+        while True:
+            if operator in FILTER_LOGICAL:
+                operand, index = parse(index)
+            elif not operands:
+                operand = expect(index, "name")
+                index += 1
+            else:
+                operand = expect(index, "string")
+                index += 1
+            operands.append(operand)
+            if index < len(tokens) and tokens[index][0] == ",":
+                index += 1
+                continue
+            expect(index, ")")
+            return {operator: operands}, index + 1
+
+    expression, index = parse(0)
+    if index != len(tokens):
+        raise ValueError(f"Unexpected text after the filter expression: {text}")
+    # Validate operators, properties and the number of values
+    dme_filter(expression)
+    return expression
+
+
+def filter_and(*expressions):
+    """
+    Combine filter expressions so that objects have to match all of them.
+
+    Returns:
+        The combined filter string, None when no expression is given
+    """
+    expressions = [expression for expression in expressions if expression]
+    if len(expressions) > 1:
+        return f"and({','.join(expressions)})"
+    return expressions[0] if expressions else None
+
+
+def dme_order_by(order_by):
+    """
+    Validate an order-by query parameter, e.g. ``l1PhysIf.id|desc``.
+
+    Several properties are separated by commas.
+
+    Raises:
+        ValueError: When a part is not <class>.<name> with an optional
+            |asc or |desc
+    """
+    parts = [part.strip() for part in to_text(order_by).split(",")]
+    for part in parts:
+        if not ORDER_BY_RE.match(part):
+            raise ValueError(
+                f"Invalid order_by {part!r}, expected <class>.<name>[|asc|desc]",
+            )
+    return ",".join(parts)
+
+
+def dme_class_names(class_names):
+    """
+    Validate a list of DME class names and join them for a query parameter.
+
+    Raises:
+        ValueError: On a name that is not a DME class name
+    """
+    if isinstance(class_names, str):
+        class_names = class_names.split(",")
+    class_names = [to_text(name).strip() for name in class_names]
+    for name in class_names:
+        if not CLASS_NAME_RE.match(name):
+            raise ValueError(f"Invalid DME class name: {name!r}")
+    return ",".join(class_names)
+
+
+def dme_attributes(attributes):
+    """
+    Validate a list of attribute names to trim DME objects to.
+
+    Raises:
+        ValueError: On a name that is neither <name> nor <class>.<name>
+    """
+    attributes = [to_text(attribute).strip() for attribute in attributes]
+    for attribute in attributes:
+        if not ATTRIBUTE_RE.match(attribute):
+            raise ValueError(
+                f"Invalid attribute {attribute!r}, expected <name> or <class>.<name>",
+            )
+    return attributes
+
+
+def project_attributes(response, attributes):
+    """
+    Trim the objects of a DME response to the given attributes.
+
+    Args:
+        response: Response data holding an imdata list
+        attributes: Attribute names kept in every object, or given as
+            <class>.<name> only kept in the objects of that class
+
+    Returns:
+        A copy of response with the attributes of every object trimmed,
+        children included. Error objects are returned as they are.
+    """
+    if not isinstance(response, dict) or not isinstance(response.get("imdata"), list):
+        return response
+
+    common = set()
+    per_class = {}
+    for attribute in attributes:
+        class_name, _, name = attribute.rpartition(".")
+        if class_name:
+            per_class.setdefault(class_name, set()).add(name)
+        else:
+            common.add(name)
+
+    def trim(objects):
+        trimmed = []
+        for entry in objects:
+            if not isinstance(entry, dict) or len(entry) != 1 or "error" in entry:
+                trimmed.append(entry)
+                continue
+            class_name, body = next(iter(entry.items()))
+            if not isinstance(body, dict):
+                trimmed.append(entry)
+                continue
+            keep = common | per_class.get(class_name, set())
+            body = dict(body)
+            if isinstance(body.get("attributes"), dict):
+                body["attributes"] = dict(
+                    (name, value)
+                    for name, value in body["attributes"].items()
+                    if name in keep
+                )
+            if isinstance(body.get("children"), list):
+                body["children"] = trim(body["children"])
+            trimmed.append({class_name: body})
+        return trimmed
+
+    return dict(response, imdata=trim(response["imdata"]))
+
+
+# Attribute names of DME objects, shared by every object with the same names.
+# Each entry maps the names to their position in the objects' value tuples.
+_ATTRIBUTE_INDEXES = {}
+
+# Values up to this length, such as states, flags and counters, repeat across
+# objects and are interned. Longer ones like DNs and timestamps are not.
+INTERNED_VALUE_LENGTH = 16
+
+
+def _attribute_index(names):
+    index = _ATTRIBUTE_INDEXES.get(names)
+    if index is None:
+        index = _ATTRIBUTE_INDEXES.setdefault(
+            names,
+            dict((sys.intern(name), position) for position, name in enumerate(names)),
+        )
+    return index
+
+
+def _compact_value(value):
+    if type(value) is str and len(value) <= INTERNED_VALUE_LENGTH:
+        return sys.intern(value)
+    return value
+
+
+class DmeObject(object):
+    """
+    Compact, read-only form of a DME managed object.
+
+    Class names and attribute names are interned and the attribute names are
+    shared by every object with the same names, so an object only holds a
+    tuple of its values. Children are kept as returned by the device and only
+    converted when they are first accessed.
+
+    Args:
+        class_name: DME class of the object
+        attributes: Dictionary of the object's attributes
+        children: List of the object's children as imdata entries
+    """
+
+    __slots__ = ("class_name", "_index", "_values", "_children")
+
+    def __init__(self, class_name, attributes=None, children=None):
+        attributes = attributes or {}
+        self.class_name = sys.intern(class_name)
+        self._index = _attribute_index(tuple(attributes))
+        self._values = tuple(_compact_value(value) for value in attributes.values())
+        self._children = children or ()
+
+    @classmethod
+    def from_dict(cls, entry):
+        """
+        Create an object from an imdata entry.
+
+        Raises:
+            ValueError: If entry is not a single DME object
+        """
+        if not isinstance(entry, dict) or len(entry) != 1:
+            raise ValueError("Not a DME object: {0!r}".format(entry))
+        class_name, body = next(iter(entry.items()))
+        if not isinstance(body, dict):
+            raise ValueError("Not a DME object: {0!r}".format(entry))
+        attributes = body.get("attributes") or {}
+        children = body.get("children") or ()
+        if not isinstance(attributes, dict) or not isinstance(children, (list, tuple)):
+            raise ValueError("Not a DME object: {0!r}".format(entry))
+        return cls(class_name, attributes, children)
+
+    @classmethod
+    def from_imdata(cls, imdata):
+        """Create the objects of an imdata list, skipping errors and other entries."""
+        objects = []
+        for entry in imdata:
+            if isinstance(entry, dict) and "error" not in entry:
+                try:
+                    objects.append(cls.from_dict(entry))
+                except ValueError:
+                    continue
+        return objects
+
+    def get(self, name, default=None):
+        """Return the value of an attribute, default if the object has none."""
+        position = self._index.get(name)
+        if position is None:
+            return default
+        return self._values[position]
+
+    @property
+    def dn(self):
+        """The DN of the object, None if it was not returned."""
+        return self.get("dn")
+
+    @property
+    def attributes(self):
+        """The attributes of the object as a new dictionary."""
+        return dict(zip(self._index, self._values))
+
+    @property
+    def children(self):
+        """The children of the object, converted on first access."""
+        children = self._children
+        if children and not isinstance(children[0], DmeObject):
+            children = self._children = tuple(DmeObject.from_imdata(children))
+        return children
+
+    def walk(self, class_name=None):
+        """
+        Iterate over the object and its descendants, depth first.
+
+        Args:
+            class_name: Only yield objects of this class
+        """
+        stack = [self]
+        while stack:
+            mo = stack.pop()
+            if class_name is None or mo.class_name == class_name:
+                yield mo
+            stack.extend(reversed(mo.children))
+
+    def to_dict(self):
+        """Return the object as an imdata entry of plain dictionaries."""
+        body = {"attributes": self.attributes}
+        if self._children:
+            body["children"] = [
+                child.to_dict() if isinstance(child, DmeObject) else child
+                for child in self._children
+            ]
+        return {self.class_name: body}
+
+    def __repr__(self):
+        return "DmeObject({0!r}, dn={1!r})".format(self.class_name, self.dn)
+
+
+class DmeSnapshot(object):
+    """
+    Locally persisted copy of a DME class, kept current by incremental fetches.
+
+    Objects are kept as DmeObject keyed by their DN. The high-water mark is
+    the newest modTs seen in any fetch, objects modified at or after it are
+    fetched next time.
+
+    Args:
+        path: File the snapshot is persisted to
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mark = None
+        self.objects = {}
+
+    @classmethod
+    def load(cls, path):
+        """Load the snapshot stored at path, or an empty one if there is none."""
+        snapshot = cls(path)
+        try:
+            with open(path) as snapshot_file:
+                header = json.loads(snapshot_file.readline())
+                snapshot.mark = header["mark"]
+                # Snapshots of earlier releases hold all objects in the header
+                entries = header["objects"].values() if "objects" in header else ()
+                for entry in entries:
+                    snapshot.add(DmeObject.from_dict(entry))
+                # Read one object at a time, never holding all of them as dicts
+                for line in snapshot_file:
+                    snapshot.add(DmeObject.from_dict(json.loads(line)))
+        except (OSError, KeyError, TypeError, ValueError):
+            snapshot.mark = None
+            snapshot.objects = {}
+        return snapshot
+
+    def save(self):
+        """
+        Write the snapshot atomically to its path.
+
+        The first line holds the mark, every further line one object.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            # Snapshots hold device configuration, only the user may read them
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        tmp_path = "{0}.{1}.tmp".format(self.path, os.getpid())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as snapshot_file:
+            snapshot_file.write(json.dumps({"mark": self.mark}))
+            snapshot_file.write("\n")
+            for mo in self.objects.values():
+                snapshot_file.write(json.dumps(mo.to_dict()))
+                snapshot_file.write("\n")
+        os.replace(tmp_path, self.path)
+
+    def add(self, mo):
+        """
+        Add or replace a DmeObject by its DN.
+
+        Raises:
+            ValueError: If the object has no DN
+        """
+        dn = mo.dn
+        if not dn:
+            raise ValueError("DME object without dn: {0!r}".format(mo))
+        self.objects[dn] = mo
+
+    def query_filter(self, class_name):
+        """
+        Build the query-target-filter selecting objects changed since the mark.
+
+        Returns:
+            Filter expression, None when the snapshot holds no mark yet
+        """
+        if self.mark is None:
+            return None
+        return f'ge({class_name}.modTs,"{self.mark}")'
+
+    def merge(self, imdata):
+        """
+        Add or replace the objects of imdata and advance the mark.
+
+        Returns:
+            Number of objects merged
+        """
+        merged = 0
+        for mo in DmeObject.from_imdata(imdata):
+            if not mo.dn:
+                continue
+            self.add(mo)
+            merged += 1
+
+            # Objects that were never modified report modTs as "never"
+            mod_ts = mo.get("modTs") or ""
+            if mod_ts[:1].isdigit() and (self.mark is None or mod_ts > self.mark):
+                self.mark = mod_ts
+        return merged
+
+    def replace(self, imdata):
+        """Replace all objects with those of imdata."""
+        self.mark = None
+        self.objects = {}
+        return self.merge(imdata)
+
+    @property
+    def imdata(self):
+        """The snapshot objects as a DME imdata list of plain dictionaries."""
+        return [mo.to_dict() for mo in self.objects.values()]
+
+
 class DmeRequest(object):
     """
     DME Request handler for Cisco devices.
@@ -84,18 +785,16 @@ class DmeRequest(object):
         task_vars=None,
     ):
         self.module = module
+        self.collect_metrics = False
+        self._rpc_calls = 0
+        self._rpc_time = 0.0
 
         if module:
             self.connection = Connection(self.module._socket_path)
         elif connection:
             self.connection = connection
-            try:
-                self.connection.load_platform_plugins(
-                    "cisco.dme.dme",
-                )
-                self.connection.set_options(var_options=task_vars)
-            except ConnectionError:
-                raise
+            self._sync_connection_options(task_vars)
+            self.collect_metrics = metrics_enabled(task_vars)
 
         if not_rest_data_keys:
             self.not_rest_data_keys = not_rest_data_keys
@@ -104,6 +803,26 @@ class DmeRequest(object):
         self.not_rest_data_keys.append("validate_certs")
         self.headers = headers if headers else BASE_HEADERS
 
+    def _sync_connection_options(self, task_vars):
+        """
+        Make sure the persistent connection runs the DME plugin with task_vars.
+
+        Asking the loaded plugin whether it already holds options with the
+        same digest is a single small round trip. Only when it does not are
+        the variables sent. The plugin is loaded only when the connection
+        has none, since loading it again would drop its login and caches.
+        """
+        var_options, digest = connection_vars(task_vars)
+        try:
+            current = self.connection.sync_options(digest)
+        except ConnectionError:
+            # No ansible_network_os, or another platform plugin is loaded
+            self.connection.load_platform_plugins("cisco.dme.dme")
+            current = False
+
+        if current is not True:
+            self.connection.sync_options(digest, var_options=var_options)
+
     def _httpapi_error_handle(self, method, uri, **kwargs):
         """
         Handle HTTP API requests with proper error handling and logging.
@@ -123,11 +842,14 @@ class DmeRequest(object):
         response = {}
 
         try:
+            started = time.perf_counter()
             code, response = self.connection.send_request(
                 method,
                 uri,
                 **kwargs,
             )
+            self._rpc_calls += 1
+            self._rpc_time += time.perf_counter() - started
 
             # Log successful requests in debug mode
             if self.module and hasattr(self.module, "_debug") and self.module._debug:
@@ -142,14 +864,14 @@ class DmeRequest(object):
             else:
                 raise ConnectionError(error_msg)
 
-        except CertificateError as e:
+        except _certificate_error() as e:
             error_msg = (
                 f"Certificate error occurred while calling {method} {uri}: {str(e)}"
             )
             if self.module:
                 self.module.fail_json(msg=error_msg)
             else:
-                raise CertificateError(error_msg)
+                raise _certificate_error()(error_msg)
 
         except ValueError as e:
             error_msg = f"Invalid response received from {method} {uri}: {str(e)}"
@@ -198,11 +920,14 @@ class DmeRequest(object):
         response = {}
 
         try:
+            started = time.perf_counter()
             code, response = self.connection.send_validate_request(
                 method,
                 uri,
                 **kwargs,
             )
+            self._rpc_calls += 1
+            self._rpc_time += time.perf_counter() - started
 
             # Log successful RPC requests in debug mode
             if self.module and hasattr(self.module, "_debug") and self.module._debug:
@@ -217,14 +942,14 @@ class DmeRequest(object):
             else:
                 raise ConnectionError(error_msg)
 
-        except CertificateError as e:
+        except _certificate_error() as e:
             error_msg = (
                 f"Certificate error occurred during RPC call {method} {uri}: {str(e)}"
             )
             if self.module:
                 self.module.fail_json(msg=error_msg)
             else:
-                raise CertificateError(error_msg)
+                raise _certificate_error()(error_msg)
 
         except ValueError as e:
             error_msg = f"Invalid RPC response received from {method} {uri}: {str(e)}"
@@ -254,6 +979,27 @@ class DmeRequest(object):
         else:
             return code, response
 
+    def metrics(self):
+        """
+        Return the metrics of the requests sent so far, for ``dme_metrics``.
+
+        The persistent connection records one entry per request it sent or
+        served from its cache. ``rpc_time`` is the time spent waiting on the
+        connection. The part of it not covered by the ``total_time`` of the
+        requests went to the socket and to serializing arguments and results.
+
+        Returns:
+            Dictionary with the keys requests, rpc_calls and rpc_time, or
+            None when metrics are not enabled
+        """
+        if not self.collect_metrics:
+            return None
+        return {
+            "requests": self.connection.pop_metrics(),
+            "rpc_calls": self._rpc_calls,
+            "rpc_time": self._rpc_time,
+        }
+
     def get(self, url, **kwargs):
         """Send HTTP GET request to DME API."""
         return self._httpapi_error_handle("GET", url, **kwargs)
@@ -274,6 +1020,144 @@ class DmeRequest(object):
         """Send HTTP DELETE request to DME API."""
         return self._httpapi_error_handle("DELETE", url, **kwargs)
 
+    def get_many(self, requests):
+        """
+        Send several GET requests in one call to the persistent connection.
+
+        The connection sends up to its max_concurrent_requests of them to the
+        device at the same time. Requests it had no time left for within one
+        call are sent again in the next call.
+
+        Args:
+            requests: List of (url, params) tuples, or (url, params,
+                attributes) tuples to have the connection trim the objects
+
+        Returns:
+            List of the responses in the order of requests, each shaped like
+            the return value of get(): the response data, or a tuple of
+            (code, response) when not used from a module
+        """
+        if not requests:
+            return []
+
+        try:
+            started = time.perf_counter()
+            batch = []
+            for url, params, *attributes in requests:
+                request = {"request_method": "GET", "url": url, "params": params}
+                if attributes and attributes[0]:
+                    request["attributes"] = attributes[0]
+                batch.append(request)
+            results = [None] * len(batch)
+            pending = list(range(len(batch)))
+            while pending:
+                sent = self.connection.send_requests([batch[idx] for idx in pending])
+                self._rpc_calls += 1
+                for idx, result in zip(pending, sent):
+                    results[idx] = result
+                pending = [idx for idx in pending if results[idx] is None]
+            self._rpc_time += time.perf_counter() - started
+        except ConnectionError as e:
+            error_msg = (
+                f"Connection error occurred while calling GET on "
+                f"{len(requests)} URLs: {str(e)}"
+            )
+            if self.module:
+                self.module.fail_json(msg=error_msg)
+            else:
+                raise ConnectionError(error_msg)
+
+        responses = []
+        for (url, *_), (code, response) in zip(requests, results):
+            if code >= 400 and self.module:
+                error_msg = f"HTTP error {code} received from GET {url}"
+                if isinstance(response, dict) and "error" in response:
+                    error_msg += f": {response['error']}"
+                self.module.fail_json(msg=error_msg, http_code=code, response=response)
+            responses.append(response if self.module else (code, response))
+        return responses
+
+    def get_count(self, url, params=None):
+        """
+        Count the objects a DME query would return without transferring them.
+
+        Args:
+            url: API endpoint URI, e.g. /api/node/class/l1PhysIf.json
+            params: Additional query parameters, e.g. a query-target-filter
+
+        Returns:
+            The count, or a tuple of (code, count) when not used from a module.
+            On an HTTP error the error response is returned in place of the count.
+        """
+        count_params = dict(params or {}, **COUNT_PARAMS)
+        result = self.get(url, params=count_params)
+        code, response = (200, result) if self.module else result
+        if code < 400:
+            response = count_from_response(response)
+            if response is None:
+                error_msg = f"No object count in the response of GET {url}"
+                if self.module:
+                    self.module.fail_json(msg=error_msg)
+                else:
+                    raise ValueError(error_msg)
+        return response if self.module else (code, response)
+
     def rpc_get(self, url, **kwargs):
         """Send JSON-RPC request to DME validation endpoint."""
         return self._rpc_error_handle("POST", url, **kwargs)
+
+    def get_pages(
+        self,
+        url,
+        page_size,
+        order_by,
+        max_objects=None,
+        params=None,
+        attributes=None,
+    ):
+        """
+        Fetch a DME query page by page.
+
+        Drives the DME ``page`` and ``page-size`` query parameters with a
+        stable ``order-by`` so that large classes can be consumed one page at
+        a time instead of in a single response.
+
+        Args:
+            url: API endpoint URI, e.g. /api/node/class/l1PhysIf.json
+            page_size: Number of objects requested per page
+            order_by: Property to sort on, e.g. l1PhysIf.dn
+            max_objects: Stop after this many objects have been fetched
+            params: Additional query parameters sent with every page
+            attributes: Attributes the connection trims the objects to
+
+        Yields:
+            The response of each page, shaped like the return value of get():
+            the response data, or a tuple of (code, response) when not used
+            from a module. The imdata of the last page is truncated to
+            max_objects. No page is requested after one that failed.
+        """
+        page = 0
+        fetched = 0
+        while max_objects is None or fetched < max_objects:
+            page_params = dict(params or {})
+            page_params.update(
+                {"order-by": order_by, "page": page, "page-size": page_size},
+            )
+            kwargs = {"attributes": attributes} if attributes else {}
+            result = self.get(url, params=page_params, **kwargs)
+            code, response = (200, result) if self.module else result
+            if code >= 400 or not isinstance(response, dict):
+                yield result
+                return
+
+            objects = response.get("imdata", [])
+            page_count = len(objects)
+            if max_objects is not None and page_count > max_objects - fetched:
+                response = dict(response, imdata=objects[: max_objects - fetched])
+            fetched += len(response.get("imdata", []))
+            yield response if self.module else (code, response)
+
+            total = int(response.get("totalCount", 0) or 0)
+            if page_count < page_size or (total and (page + 1) * page_size >= total):
+                return
+            page += 1
@@ -22,11 +22,192 @@ options:
           - Expects attributes after /api/node/class/{entry}.json
           - Example - ipv4aclACL, l1PhysIf, l2BD, etc.
         type: str
+      attributes:
+        description:
+          - Only return these attributes of the objects, for example C(dn), C(id) and C(adminSt).
+          - Names given as C(<class>.<attribute>) only apply to the objects of that class,
+            for example to the children returned with I(rsp_subtree).
+          - DME cannot select single attributes, so the persistent connection trims the
+            objects before they are handed to the task. When only C(dn) is asked for, the
+            device is sent C(rsp-prop-include=naming-only) and leaves out the others itself.
+          - With I(incremental), C(dn) and C(modTs) are returned as well.
+        type: list
+        elements: str
+      count_only:
+        description:
+          - Only count the objects of the class that match I(query_target_filter), using
+            C(rsp-subtree-include=count), and return the number in place of the objects.
+          - No objects are transferred. Options that only shape the returned objects,
+            such as I(rsp_subtree), I(page_size) or I(order_by), are ignored.
+          - Cannot be combined with I(incremental).
+        type: bool
+        default: false
       rsp_prop_include:
         description: Add this option to get specific attributes of the object.
         type: str
         choices:
           - config-only
+      page_size:
+        description:
+          - Fetch the class in pages of this many objects using the DME C(page) and
+            C(page-size) query parameters, ordered by C(<entry>.dn).
+          - Use this for classes too large to be returned in a single response.
+          - The pages are merged into a single C(imdata) list in the task result, so
+            this bounds the size of each device response, not the size of the result.
+            C(totalCount) is the number of objects the device reports for the class.
+          - Fetching stops at the first page that fails, and its error response is returned.
+        type: int
+      max_objects:
+        description:
+          - Stop after this many objects have been fetched.
+          - When I(page_size) is not set, a single page of this size is requested.
+        type: int
+      order_by:
+        description:
+          - Sort the objects by these properties, each C(<class>.<property>) optionally
+            followed by C(|asc) or C(|desc), several separated by commas.
+          - With I(page_size) or I(max_objects) the pages are requested in this order
+            instead of by dn.
+        type: str
+      query_target_filter:
+        description:
+          - Only return the objects matching this DME filter expression.
+          - Either a filter string such as C(and(eq(l1PhysIf.adminSt,"up"),wcard(l1PhysIf.descr,"^uplink")))
+            or the same expression as a dictionary with the operator as its only key, see the examples.
+          - C(eq), C(ne), C(lt), C(le), C(gt), C(ge), C(wcard), C(anybit) and C(allbits) take a
+            C(<class>.<property>) and a value, C(bw) a property and a lower and upper bound.
+            C(and) and C(or) take a list of expressions, C(not) a single one.
+          - The expression is validated before it is sent to the device.
+        type: raw
+      rsp_subtree_class:
+        description:
+          - Only return the children of these DME classes.
+          - Needs I(rsp_subtree).
+        type: list
+        elements: str
+      rsp_subtree_filter:
+        description:
+          - Only return the children matching this DME filter expression, given like
+            I(query_target_filter).
+          - Needs I(rsp_subtree).
+        type: raw
+      rsp_subtree:
+        description:
+          - Return the children of every object, C(children) only the direct ones and
+            C(full) the whole subtree.
+        type: str
+        choices:
+          - "no"
+          - children
+          - full
+      incremental:
+        description:
+          - Keep a snapshot of the class on the controller and only fetch the objects
+            whose C(modTs) is at or after the newest C(modTs) of the previous run.
+          - The changed objects are merged into the snapshot, and the task returns the
+            whole snapshot in C(class).
+          - Deleted objects are not part of the delta. The class is fetched in full again
+            when the object count on the device differs from the merged snapshot.
+          - The snapshot is kept per inventory host and class in I(snapshot_dir).
+          - Cannot be combined with I(rsp_prop_include=config-only), which omits C(modTs).
+          - Cannot be combined with I(page_size) or I(max_objects), the snapshot needs the
+            whole class.
+          - Cannot be combined with I(rsp_subtree=children) or I(rsp_subtree=full),
+            changes to children do not update the C(modTs) of their parent.
+        type: bool
+        default: false
+      snapshot_dir:
+        description:
+          - Directory on the controller holding the snapshots of I(incremental) fetches.
+        type: path
+        default: ~/.ansible/dme_snapshots
+  read_classes:
+    description:
+      - Several class queries fetched in one task, for example instead of a C(loop) over
+        I(read_class).
+      - The queries are handed to the persistent connection together, which sends up to
+        its C(max_concurrent_requests) of them to the device at the same time.
+      - Entries with I(page_size) or I(max_objects) need one request per page and are
+        fetched one after another once the other queries are done.
+      - The responses are returned in C(classes), keyed by I(entry). An entry that fails
+        gets its error response.
+    type: list
+    elements: dict
+    suboptions:
+      entry:
+        description:
+          - The DME class to get the list of objects of.
+          - Each class can only be listed once.
+        type: str
+        required: true
+      attributes:
+        description:
+          - Only return these attributes of the objects, for example C(dn), C(id) and C(adminSt).
+          - Names given as C(<class>.<attribute>) only apply to the objects of that class,
+            for example to the children returned with I(rsp_subtree).
+          - DME cannot select single attributes, so the persistent connection trims the
+            objects before they are handed to the task. When only C(dn) is asked for, the
+            device is sent C(rsp-prop-include=naming-only) and leaves out the others itself.
+        type: list
+        elements: str
+      count_only:
+        description:
+          - Only count the objects of the class that match I(query_target_filter), using
+            C(rsp-subtree-include=count), and return the number in place of the objects.
+          - No objects are transferred. Options that only shape the returned objects,
+            such as I(rsp_subtree), I(page_size) or I(order_by), are ignored.
+        type: bool
+        default: false
+      rsp_prop_include:
+        description: Add this option to get specific attributes of the objects.
+        type: str
+        choices:
+          - config-only
+      page_size:
+        description:
+          - Fetch the class in pages of this many objects, see I(read_class.page_size).
+        type: int
+      max_objects:
+        description: Stop after this many objects have been fetched.
+        type: int
+      order_by:
+        description:
+          - Sort the objects by these properties, each C(<class>.<property>) optionally
+            followed by C(|asc) or C(|desc), several separated by commas.
+          - With I(page_size) or I(max_objects) the pages are requested in this order
+            instead of by dn.
+        type: str
+      query_target_filter:
+        description:
+          - Only return the objects matching this DME filter expression.
+          - Either a filter string such as C(and(eq(l1PhysIf.adminSt,"up"),wcard(l1PhysIf.descr,"^uplink")))
+            or the same expression as a dictionary with the operator as its only key, see the examples.
+          - C(eq), C(ne), C(lt), C(le), C(gt), C(ge), C(wcard), C(anybit) and C(allbits) take a
+            C(<class>.<property>) and a value, C(bw) a property and a lower and upper bound.
+            C(and) and C(or) take a list of expressions, C(not) a single one.
+          - The expression is validated before it is sent to the device.
+        type: raw
+      rsp_subtree_class:
+        description:
+          - Only return the children of these DME classes.
+          - Needs I(rsp_subtree).
+        type: list
+        elements: str
+      rsp_subtree_filter:
+        description:
+          - Only return the children matching this DME filter expression, given like
+            I(query_target_filter).
+          - Needs I(rsp_subtree).
+        type: raw
+      rsp_subtree:
+        description:
+          - Return the children of every object, C(children) only the direct ones and
+            C(full) the whole subtree.
+        type: str
+        choices:
+          - "no"
+          - children
+          - full
   read_dn:
     description: Add the dn entry to get the specific object details.
     type: dict
@@ -37,26 +218,173 @@ options:
           - Expects attributes after /api/mo/{entry}.json
           - Example - sys, sys/intf/phys-[eth1/1], sys/bgp, sys/bd/bd-[vlan-100], etc.
         type: str
+      attributes:
+        description:
+          - Only return these attributes of the objects, for example C(dn), C(id) and C(adminSt).
+          - Names given as C(<class>.<attribute>) only apply to the objects of that class,
+            for example to the children returned with I(rsp_subtree).
+          - DME cannot select single attributes, so the persistent connection trims the
+            objects before they are handed to the task. When only C(dn) is asked for, the
+            device is sent C(rsp-prop-include=naming-only) and leaves out the others itself.
+        type: list
+        elements: str
+      count_only:
+        description:
+          - Only count the objects the query selects with I(query_target),
+            I(target_subtree_class) and I(query_target_filter), using
+            C(rsp-subtree-include=count), and return the number in place of the objects.
+          - No objects are transferred. Options that only shape the returned objects,
+            such as I(rsp_subtree) or I(order_by), are ignored.
+        type: bool
+        default: false
       rsp_prop_include:
         description: Add this option to get specific attributes of the object.
         type: str
         choices:
           - config-only
       rsp_subtree:
-        description: Specify subtree attributes of the object.
+        description:
+          - Return the children of the object, C(children) only the direct ones and
+            C(full) the whole subtree.
         type: str
         choices:
+          - "no"
+          - children
           - full
       query_target:
-        description: Specify query target to start.
+        description:
+          - Return the object itself, its direct children or all objects of its subtree.
         type: str
         choices:
+          - self
+          - children
           - subtree
       target_subtree_class:
-        description: Specify target subtree of the class to explore.
+        description:
+          - Only return the objects of these DME classes from I(query_target=children)
+            or I(query_target=subtree), several separated by commas.
+          - Example - topSystem, l1PhysIf,l3Inst.
+        type: str
+      order_by:
+        description:
+          - Sort the objects by these properties, each C(<class>.<property>) optionally
+            followed by C(|asc) or C(|desc), several separated by commas.
+          - Only applies to the objects of I(query_target=children) or I(query_target=subtree).
+        type: str
+      query_target_filter:
+        description:
+          - Only return the objects matching this DME filter expression.
+          - Either a filter string such as C(and(eq(l1PhysIf.adminSt,"up"),wcard(l1PhysIf.descr,"^uplink")))
+            or the same expression as a dictionary with the operator as its only key, see the examples.
+          - C(eq), C(ne), C(lt), C(le), C(gt), C(ge), C(wcard), C(anybit) and C(allbits) take a
+            C(<class>.<property>) and a value, C(bw) a property and a lower and upper bound.
+            C(and) and C(or) take a list of expressions, C(not) a single one.
+          - The expression is validated before it is sent to the device.
+        type: raw
+      rsp_subtree_class:
+        description:
+          - Only return the children of these DME classes.
+          - Needs I(rsp_subtree).
+        type: list
+        elements: str
+      rsp_subtree_filter:
+        description:
+          - Only return the children matching this DME filter expression, given like
+            I(query_target_filter).
+          - Needs I(rsp_subtree).
+        type: raw
+  read_dns:
+    description:
+      - Several dn queries fetched in one task, for example instead of a C(loop) over
+        I(read_dn).
+      - The queries are handed to the persistent connection together, which sends up to
+        its C(max_concurrent_requests) of them to the device at the same time.
+      - The responses are returned in C(mos), keyed by I(entry). An entry that fails gets
+        its error response.
+    type: list
+    elements: dict
+    suboptions:
+      entry:
+        description:
+          - The dn of the object, as in I(read_dn.entry).
+          - Each dn can only be listed once.
+        type: str
+        required: true
+      attributes:
+        description:
+          - Only return these attributes of the objects, for example C(dn), C(id) and C(adminSt).
+          - Names given as C(<class>.<attribute>) only apply to the objects of that class,
+            for example to the children returned with I(rsp_subtree).
+          - DME cannot select single attributes, so the persistent connection trims the
+            objects before they are handed to the task. When only C(dn) is asked for, the
+            device is sent C(rsp-prop-include=naming-only) and leaves out the others itself.
+        type: list
+        elements: str
+      count_only:
+        description:
+          - Only count the objects the query selects with I(query_target),
+            I(target_subtree_class) and I(query_target_filter), using
+            C(rsp-subtree-include=count), and return the number in place of the objects.
+          - No objects are transferred. Options that only shape the returned objects,
+            such as I(rsp_subtree) or I(order_by), are ignored.
+        type: bool
+        default: false
+      rsp_prop_include:
+        description: Add this option to get specific attributes of the object.
+        type: str
+        choices:
+          - config-only
+      rsp_subtree:
+        description:
+          - Return the children of the object, C(children) only the direct ones and
+            C(full) the whole subtree.
+        type: str
+        choices:
+          - "no"
+          - children
+          - full
+      query_target:
+        description:
+          - Return the object itself, its direct children or all objects of its subtree.
         type: str
         choices:
-          - topSystem
+          - self
+          - children
+          - subtree
+      target_subtree_class:
+        description:
+          - Only return the objects of these DME classes from I(query_target=children)
+            or I(query_target=subtree), several separated by commas.
+          - Example - topSystem, l1PhysIf,l3Inst.
+        type: str
+      order_by:
+        description:
+          - Sort the objects by these properties, each C(<class>.<property>) optionally
+            followed by C(|asc) or C(|desc), several separated by commas.
+          - Only applies to the objects of I(query_target=children) or I(query_target=subtree).
+        type: str
+      query_target_filter:
+        description:
+          - Only return the objects matching this DME filter expression.
+          - Either a filter string such as C(and(eq(l1PhysIf.adminSt,"up"),wcard(l1PhysIf.descr,"^uplink")))
+            or the same expression as a dictionary with the operator as its only key, see the examples.
+          - C(eq), C(ne), C(lt), C(le), C(gt), C(ge), C(wcard), C(anybit) and C(allbits) take a
+            C(<class>.<property>) and a value, C(bw) a property and a lower and upper bound.
+            C(and) and C(or) take a list of expressions, C(not) a single one.
+          - The expression is validated before it is sent to the device.
+        type: raw
+      rsp_subtree_class:
+        description:
+          - Only return the children of these DME classes.
+          - Needs I(rsp_subtree).
+        type: list
+        elements: str
+      rsp_subtree_filter:
+        description:
+          - Only return the children matching this DME filter expression, given like
+            I(query_target_filter).
+          - Needs I(rsp_subtree).
+        type: raw
 author: Sagar Paul (@KB-perByte)
 """
 
@@ -295,17 +623,396 @@ EXAMPLES = """
 #                        attributes:
 #                ...
 #         totalCount: '1'
+
+# Fetch a large class page by page
+
+## Playbook
+- name: Fetch MAC address table entries in pages of 500 objects
+  cisco.dme.dme_command:
+    read_class:
+      entry: "l2MacAddressTable"
+      page_size: 500
+      max_objects: 20000
+
+# Only return the attributes a report needs
+
+## Playbook
+- name: Read the state of every interface
+  cisco.dme.dme_command:
+    read_class:
+      entry: "l1PhysIf"
+      rsp_subtree: "children"
+      rsp_subtree_class: ["ethpmPhysIf"]
+      attributes: ["id", "adminSt", "descr", "ethpmPhysIf.operSt"]
+
+# Let the switch filter the objects
+
+## Playbook
+- name: Read the uplinks that are administratively down
+  cisco.dme.dme_command:
+    read_class:
+      entry: "l1PhysIf"
+      query_target_filter:
+        and:
+          - eq: ["l1PhysIf.adminSt", "down"]
+          - wcard: ["l1PhysIf.descr", "^uplink"]
+      order_by: "l1PhysIf.id"
+
+- name: Read the BGP neighbors of a VRF that are not established
+  cisco.dme.dme_command:
+    read_dn:
+      entry: "sys/bgp/inst/dom-[default]"
+      query_target: "children"
+      target_subtree_class: "bgpPeer"
+      rsp_subtree: "children"
+      rsp_subtree_class: ["bgpPeerEntry"]
+      rsp_subtree_filter: 'ne(bgpPeerEntry.operSt,"established")'
+
+# Count objects without transferring them
+
+## Playbook
+- name: Count the interfaces that are down and the established BGP peers
+  cisco.dme.dme_command:
+    read_classes:
+      - entry: "l1PhysIf"
+        query_target_filter: 'eq(l1PhysIf.adminSt,"down")'
+        count_only: true
+      - entry: "bgpPeerEntry"
+        query_target_filter: 'eq(bgpPeerEntry.operSt,"established")'
+        count_only: true
+
+## Output
+# ok: [IAMBATMON] =>
+#     changed: false
+#     classes:
+#         bgpPeerEntry: 4
+#         l1PhysIf: 17
+
+# Read many objects in one task
+
+## Playbook
+- name: Read the interfaces and bridge domains of every switch
+  cisco.dme.dme_command:
+    read_classes:
+      - entry: "l2BD"
+      - entry: "l2MacAddressTable"
+        page_size: 500
+    read_dns:
+      - entry: "sys/intf/phys-[eth1/1]"
+      - entry: "sys/intf/phys-[eth1/2]"
+      - entry: "sys/intf/phys-[eth1/3]"
+        rsp_subtree: "full"
+
+## Output
+# ok: [IAMBATMON] =>
+#     changed: false
+#     classes:
+#         l2BD:
+#             imdata: [...]
+#             totalCount: '12'
+#         l2MacAddressTable:
+#             imdata: [...]
+#             totalCount: '1480'
+#     mos:
+#         sys/intf/phys-[eth1/1]:
+#             imdata: [...]
+#             totalCount: '1'
+#         sys/intf/phys-[eth1/2]:
+#             imdata: [...]
+#             totalCount: '1'
+#         sys/intf/phys-[eth1/3]:
+#             imdata: [...]
+#             totalCount: '1'
+
+# Keep a local copy of all interfaces and only fetch what changed
+
+## Playbook
+- name: Sync the interfaces of every switch
+  cisco.dme.dme_command:
+    read_class:
+      entry: "l1PhysIf"
+      incremental: true
+      snapshot_dir: "/var/lib/dme_snapshots"
 """
 
 RETURN = """
 class:
-  description: The configuration as structured data prior to module invocation.
+  description:
+  - The configuration as structured data prior to module invocation.
+  - The number of objects with I(read_class.count_only=true).
   returned: always
-  type: dict
+  type: raw
   sample: The configuration returned will always be in the same format of the parameters above.
+dme_metrics:
+  description:
+  - Timings in seconds and sizes in bytes of the DME requests the task sent.
+  - I(requests) holds one entry per request the persistent connection sent or
+    served from its response cache. I(send_time) covers connecting to the device
+    and the HTTP exchange of all attempts, I(total_time) also the backoff between
+    retries, decompressing and decoding the response.
+  - I(rpc_time) is the time the task waited on the persistent connection, the part
+    not covered by the requests went to the connection socket and serialization.
+  returned: when the C(metrics) option of the httpapi plugin is enabled
+  type: dict
+  sample:
+    requests:
+      - method: GET
+        path: /api/mo/sys/intf/phys-[eth1/1].json
+        params:
+          rsp-prop-include: config-only
+        status: 200
+        cached: false
+        retries: 0
+        request_bytes: 2
+        response_bytes: 1287
+        send_time: 0.2134
+        decompress_time: 0.0001
+        decode_time: 0.0002
+        total_time: 0.2141
+    rpc_calls: 1
+    rpc_time: 0.2187
+dme_profile:
+  description:
+  - Profile files written for the task, and the peak of the traced memory in bytes
+    when memory was profiled.
+  - Profiling is enabled with the C(ansible_dme_profile) variable or the
+    C(ANSIBLE_DME_PROFILE) environment variable set to C(cpu) for cProfile,
+    C(memory) for a tracemalloc snapshot or C(cpu,memory) for both. The files
+    are written to C(ansible_dme_profile_dir) or C(ANSIBLE_DME_PROFILE_DIR),
+    C(~/.ansible/dme_profiles) by default.
+  returned: when profiling is enabled
+  type: dict
+  sample:
+    files:
+      - /home/user/.ansible/dme_profiles/switch1_cisco.dme.dme_command_0242ac12-0002-0000-0000-000000000010_4242.prof
+      - /home/user/.ansible/dme_profiles/switch1_cisco.dme.dme_command_0242ac12-0002-0000-0000-000000000010_4242.tracemalloc
+    peak_memory: 18345216
+classes:
+  description:
+  - The responses of the I(read_classes) queries, keyed by class.
+  - Entries with I(count_only=true) hold the number of objects.
+  returned: when I(read_classes) is set
+  type: dict
+  sample:
+    l2BD:
+      imdata: []
+      totalCount: "0"
+incremental:
+  description: Details of an incremental class fetch.
+  returned: when I(read_class.incremental=true)
+  type: dict
+  sample:
+    full_sync: false
+    fetched: 3
+    mark: "2025-09-22T15:08:12.420+00:00"
+    snapshot: /home/user/.ansible/dme_snapshots/switch1_l1PhysIf.json
 mo:
-  description: The configuration as structured data prior to module invocation.
+  description:
+  - The configuration as structured data prior to module invocation.
+  - The number of objects with I(read_dn.count_only=true).
   returned: always
-  type: dict
+  type: raw
   sample: The configuration returned will always be in the same format of the parameters above.
+mos:
+  description:
+  - The responses of the I(read_dns) queries, keyed by dn.
+  - Entries with I(count_only=true) hold the number of objects.
+  returned: when I(read_dns) is set
+  type: dict
+  sample:
+    sys/intf/phys-[eth1/1]:
+      imdata: []
+      totalCount: "0"
 """
+
+# Argument spec of the options in DOCUMENTATION. The action plugin validates
+# against it so that DOCUMENTATION is not parsed as YAML on every task. Keep
+# both in sync, the unit tests fail when they differ.
+ARGUMENT_SPEC = {
+    "read_class": {
+        "type": "dict",
+        "options": {
+            "entry": {
+                "type": "str",
+            },
+            "attributes": {
+                "type": "list",
+                "elements": "str",
+            },
+            "count_only": {
+                "type": "bool",
+                "default": False,
+            },
+            "rsp_prop_include": {
+                "type": "str",
+                "choices": ["config-only"],
+            },
+            "page_size": {
+                "type": "int",
+            },
+            "max_objects": {
+                "type": "int",
+            },
+            "order_by": {
+                "type": "str",
+            },
+            "query_target_filter": {
+                "type": "raw",
+            },
+            "rsp_subtree_class": {
+                "type": "list",
+                "elements": "str",
+            },
+            "rsp_subtree_filter": {
+                "type": "raw",
+            },
+            "rsp_subtree": {
+                "type": "str",
+                "choices": ["no", "children", "full"],
+            },
+            "incremental": {
+                "type": "bool",
+                "default": False,
+            },
+            "snapshot_dir": {
+                "type": "path",
+                "default": "~/.ansible/dme_snapshots",
+            },
+        },
+    },
+    "read_classes": {
+        "type": "list",
+        "elements": "dict",
+        "options": {
+            "entry": {
+                "type": "str",
+                "required": True,
+            },
+            "attributes": {
+                "type": "list",
+                "elements": "str",
+            },
+            "count_only": {
+                "type": "bool",
+                "default": False,
+            },
+            "rsp_prop_include": {
+                "type": "str",
+                "choices": ["config-only"],
+            },
+            "page_size": {
+                "type": "int",
+            },
+            "max_objects": {
+                "type": "int",
+            },
+            "order_by": {
+                "type": "str",
+            },
+            "query_target_filter": {
+                "type": "raw",
+            },
+            "rsp_subtree_class": {
+                "type": "list",
+                "elements": "str",
+            },
+            "rsp_subtree_filter": {
+                "type": "raw",
+            },
+            "rsp_subtree": {
+                "type": "str",
+                "choices": ["no", "children", "full"],
+            },
+        },
+    },
+    "read_dn": {
+        "type": "dict",
+        "options": {
+            "entry": {
+                "type": "str",
+            },
+            "attributes": {
+                "type": "list",
+                "elements": "str",
+            },
+            "count_only": {
+                "type": "bool",
+                "default": False,
+            },
+            "rsp_prop_include": {
+                "type": "str",
+                "choices": ["config-only"],
+            },
+            "rsp_subtree": {
+                "type": "str",
+                "choices": ["no", "children", "full"],
+            },
+            "query_target": {
+                "type": "str",
+                "choices": ["self", "children", "subtree"],
+            },
+            "target_subtree_class": {
+                "type": "str",
+            },
+            "order_by": {
+                "type": "str",
+            },
+            "query_target_filter": {
+                "type": "raw",
+            },
+            "rsp_subtree_class": {
+                "type": "list",
+                "elements": "str",
+            },
+            "rsp_subtree_filter": {
+                "type": "raw",
+            },
+        },
+    },
+    "read_dns": {
+        "type": "list",
+        "elements": "dict",
+        "options": {
+            "entry": {
+                "type": "str",
+                "required": True,
+            },
+            "attributes": {
+                "type": "list",
+                "elements": "str",
+            },
+            "count_only": {
+                "type": "bool",
+                "default": False,
+            },
+            "rsp_prop_include": {
+                "type": "str",
+                "choices": ["config-only"],
+            },
+            "rsp_subtree": {
+                "type": "str",
+                "choices": ["no", "children", "full"],
+            },
+            "query_target": {
+                "type": "str",
+                "choices": ["self", "children", "subtree"],
+            },
+            "target_subtree_class": {
+                "type": "str",
+            },
+            "order_by": {
+                "type": "str",
+            },
+            "query_target_filter": {
+                "type": "raw",
+            },
+            "rsp_subtree_class": {
+                "type": "list",
+                "elements": "str",
+            },
+            "rsp_subtree_filter": {
+                "type": "raw",
+            },
+        },
+    },
+}
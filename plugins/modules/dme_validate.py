@@ -146,4 +146,66 @@ changed:
   returned: when changed
   type: list
   sample: The configuration returned will always be in the same format of the parameters above.
+dme_metrics:
+  description:
+  - Timings in seconds and sizes in bytes of the DME requests the task sent.
+  - I(requests) holds one entry per request the persistent connection sent or
+    served from its response cache. I(send_time) covers connecting to the device
+    and the HTTP exchange of all attempts, I(total_time) also the backoff between
+    retries, decompressing and decoding the response.
+  - I(rpc_time) is the time the task waited on the persistent connection, the part
+    not covered by the requests went to the connection socket and serialization.
+  returned: when the C(metrics) option of the httpapi plugin is enabled
+  type: dict
+  sample:
+    requests:
+      - method: GET
+        path: /api/mo/sys/intf/phys-[eth1/1].json
+        params:
+          rsp-prop-include: config-only
+        status: 200
+        cached: false
+        retries: 0
+        request_bytes: 2
+        response_bytes: 1287
+        send_time: 0.2134
+        decompress_time: 0.0001
+        decode_time: 0.0002
+        total_time: 0.2141
+    rpc_calls: 1
+    rpc_time: 0.2187
+dme_profile:
+  description:
+  - Profile files written for the task, and the peak of the traced memory in bytes
+    when memory was profiled.
+  - Profiling is enabled with the C(ansible_dme_profile) variable or the
+    C(ANSIBLE_DME_PROFILE) environment variable set to C(cpu) for cProfile,
+    C(memory) for a tracemalloc snapshot or C(cpu,memory) for both. The files
+    are written to C(ansible_dme_profile_dir) or C(ANSIBLE_DME_PROFILE_DIR),
+    C(~/.ansible/dme_profiles) by default.
+  returned: when profiling is enabled
+  type: dict
+  sample:
+    files:
+      - /home/user/.ansible/dme_profiles/switch1_cisco.dme.dme_command_0242ac12-0002-0000-0000-000000000010_4242.prof
+      - /home/user/.ansible/dme_profiles/switch1_cisco.dme.dme_command_0242ac12-0002-0000-0000-000000000010_4242.tracemalloc
+    peak_memory: 18345216
 """
+
+# Argument spec of the options in DOCUMENTATION. The action plugin validates
+# against it so that DOCUMENTATION is not parsed as YAML on every task. Keep
+# both in sync, the unit tests fail when they differ.
+ARGUMENT_SPEC = {
+    "lines": {
+        "type": "list",
+        "elements": "str",
+        "aliases": ["commands"],
+    },
+    "parents": {
+        "type": "list",
+        "elements": "str",
+    },
+    "src": {
+        "type": "str",
+    },
+}
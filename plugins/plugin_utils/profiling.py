@@ -0,0 +1,156 @@
+# (c) 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Opt-in profiling of the DME action plugins.
+
+Profiling is enabled per host or play with the ``ansible_dme_profile``
+variable, or for a whole run with the ``ANSIBLE_DME_PROFILE`` environment
+variable. Their value selects what is recorded: ``cpu`` for cProfile,
+``memory`` for tracemalloc, ``cpu,memory`` or ``true`` for both. The files
+are written to ``ansible_dme_profile_dir`` or ``ANSIBLE_DME_PROFILE_DIR``,
+by default ``~/.ansible/dme_profiles``:
+
+- ``<host>_<action>_<task uuid>_<pid>.prof`` holds the cProfile statistics,
+  readable with ``python -m pstats`` or snakeviz.
+- ``<host>_<action>_<task uuid>_<pid>.tracemalloc`` holds a tracemalloc
+  snapshot taken when the task finished, readable with
+  ``tracemalloc.Snapshot.load()``.
+
+Every task execution runs in its own worker process, so the pid keeps the
+files of loop items apart.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import functools
+import os
+import re
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.parsing.convert_bool import BOOLEANS_FALSE, BOOLEANS_TRUE
+
+PROFILE_MODES = ("cpu", "memory")
+DEFAULT_PROFILE_DIR = "~/.ansible/dme_profiles"
+
+# Number of frames tracemalloc keeps per allocation
+TRACEMALLOC_FRAMES = 25
+
+UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def profile_modes(task_vars):
+    """
+    Return the profiling modes enabled for a task.
+
+    Args:
+        task_vars: Task variables, ``ansible_dme_profile`` takes precedence
+            over the ``ANSIBLE_DME_PROFILE`` environment variable
+
+    Returns:
+        Tuple of the enabled modes out of PROFILE_MODES, empty when profiling
+        is disabled
+    """
+    value = (task_vars or {}).get(
+        "ansible_dme_profile",
+        os.environ.get("ANSIBLE_DME_PROFILE", ""),
+    )
+    if isinstance(value, bool):
+        return PROFILE_MODES if value else ()
+
+    value = to_text(value).strip().lower()
+    if not value or value in BOOLEANS_FALSE:
+        return ()
+    if value in BOOLEANS_TRUE or value == "all":
+        return PROFILE_MODES
+    modes = [mode.strip() for mode in value.split(",")]
+    return tuple(mode for mode in PROFILE_MODES if mode in modes)
+
+
+def profile_path(task_vars, action, task_uuid):
+    """Return the path of the profile files without extension."""
+    directory = (task_vars or {}).get(
+        "ansible_dme_profile_dir",
+        os.environ.get("ANSIBLE_DME_PROFILE_DIR", DEFAULT_PROFILE_DIR),
+    )
+    name = "_".join(
+        (
+            to_text((task_vars or {}).get("inventory_hostname", "localhost")),
+            to_text(action),
+            to_text(task_uuid),
+            to_text(os.getpid()),
+        ),
+    )
+    return os.path.join(
+        os.path.expanduser(directory),
+        UNSAFE_FILENAME_RE.sub("-", name),
+    )
+
+
+def profiled(run):
+    """
+    Wrap an action plugin's run() with the profilers enabled for the task.
+
+    The result of a profiled task carries the written files and the peak of
+    the traced memory in ``dme_profile``. Files that cannot be written are
+    reported as warnings instead of failing the task.
+    """
+
+    @functools.wraps(run)
+    def wrapper(self, tmp=None, task_vars=None):
+        modes = profile_modes(task_vars)
+        if not modes:
+            return run(self, tmp, task_vars)
+
+        import cProfile
+        import tracemalloc
+
+        profile = None
+        started_tracing = False
+        if "memory" in modes and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            started_tracing = True
+        if "cpu" in modes:
+            profile = cProfile.Profile()
+            profile.enable()
+
+        result = None
+        try:
+            result = run(self, tmp, task_vars)
+        finally:
+            if profile is not None:
+                profile.disable()
+            snapshot = peak = None
+            if "memory" in modes:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+
+            path = profile_path(task_vars, self._task.action, self._task._uuid)
+            files = []
+            warnings = []
+            try:
+                os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+                if profile is not None:
+                    profile.dump_stats(path + ".prof")
+                    files.append(path + ".prof")
+                if snapshot is not None:
+                    snapshot.dump(path + ".tracemalloc")
+                    files.append(path + ".tracemalloc")
+            except OSError as e:
+                warnings.append(
+                    "Unable to write DME profile {0}: {1}".format(path, to_text(e)),
+                )
+
+            if result is not None:
+                result["dme_profile"] = {"files": files}
+                if peak is not None:
+                    result["dme_profile"]["peak_memory"] = peak
+                if warnings:
+                    result.setdefault("warnings", []).extend(warnings)
+        return result
+
+    return wrapper
@@ -0,0 +1,225 @@
+# (c) 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Minimal RFC 6455 websocket client used for DME event subscriptions.
+
+Only what the DME event channel needs is implemented: the opening
+handshake, receiving text messages (including fragmented ones), answering
+pings and closing the connection.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import hashlib
+import os
+import socket
+import ssl
+import struct
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+MAX_HANDSHAKE_BYTES = 65536
+
+
+class WebSocketError(Exception):
+    """Raised when the websocket handshake or framing fails."""
+
+
+def accept_key(key):
+    """Return the Sec-WebSocket-Accept value expected for key."""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def encode_frame(opcode, payload, mask=True):
+    """
+    Build a single final websocket frame.
+
+    Frames sent by a client must be masked, frames sent by a server must not.
+    """
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header.extend(struct.pack("!H", length))
+    else:
+        header.append(mask_bit | 127)
+        header.extend(struct.pack("!Q", length))
+
+    if not mask:
+        return bytes(header) + payload
+
+    masking_key = os.urandom(4)
+    masked = bytes(byte ^ masking_key[idx % 4] for idx, byte in enumerate(payload))
+    return bytes(header) + masking_key + masked
+
+
+class WebSocket(object):
+    """
+    Client side of an established websocket connection.
+
+    Args:
+        sock: Connected socket the handshake was completed on
+        buffered: Bytes already read past the end of the handshake response
+    """
+
+    def __init__(self, sock, buffered=b""):
+        self.sock = sock
+        self._buffer = bytearray(buffered)
+        self.closed = False
+
+    @classmethod
+    def connect(
+        cls,
+        host,
+        port,
+        path,
+        use_ssl=True,
+        validate_certs=True,
+        timeout=30,
+    ):
+        """
+        Open a websocket connection to path on host and port.
+
+        Raises:
+            WebSocketError: When the server does not accept the upgrade
+            OSError: When the connection cannot be established
+        """
+        sock = socket.create_connection((host, port), timeout=timeout)
+        try:
+            if use_ssl:
+                context = ssl.create_default_context()
+                if not validate_certs:
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                sock = context.wrap_socket(sock, server_hostname=host)
+
+            key = base64.b64encode(os.urandom(16)).decode("ascii")
+            request = (
+                "GET {0} HTTP/1.1\r\n"
+                "Host: {1}:{2}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                "Sec-WebSocket-Key: {3}\r\n"
+                "Sec-WebSocket-Version: 13\r\n"
+                "\r\n"
+            ).format(path, host, port, key)
+            sock.sendall(request.encode("ascii"))
+
+            response = b""
+            while b"\r\n\r\n" not in response:
+                chunk = sock.recv(4096)
+                if not chunk or len(response) > MAX_HANDSHAKE_BYTES:
+                    raise WebSocketError("Incomplete websocket handshake response")
+                response += chunk
+            head, buffered = response.split(b"\r\n\r\n", 1)
+
+            lines = head.decode("iso-8859-1").split("\r\n")
+            status = lines[0].split(" ", 2)
+            if len(status) < 2 or status[1] != "101":
+                raise WebSocketError(
+                    "Websocket upgrade refused: {0}".format(lines[0]),
+                )
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if headers.get("sec-websocket-accept") != accept_key(key):
+                raise WebSocketError("Invalid Sec-WebSocket-Accept in handshake")
+        except Exception:
+            sock.close()
+            raise
+
+        sock.settimeout(None)
+        return cls(sock, buffered)
+
+    def _read_exact(self, count):
+        while len(self._buffer) < count:
+            chunk = self.sock.recv(max(count - len(self._buffer), 4096))
+            if not chunk:
+                raise WebSocketError("Websocket connection closed by peer")
+            self._buffer.extend(chunk)
+        data = bytes(self._buffer[:count])
+        del self._buffer[:count]
+        return data
+
+    def _read_frame(self):
+        first, second = self._read_exact(2)
+        fin = bool(first & 0x80)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._read_exact(8))[0]
+        masking_key = self._read_exact(4) if second & 0x80 else None
+        payload = self._read_exact(length)
+        if masking_key:
+            payload = bytes(
+                byte ^ masking_key[idx % 4] for idx, byte in enumerate(payload)
+            )
+        return fin, opcode, payload
+
+    def send(self, opcode, payload=b""):
+        self.sock.sendall(encode_frame(opcode, payload))
+
+    def recv(self):
+        """
+        Return the next text message, or None once the connection closed.
+
+        Pings are answered and binary messages are skipped.
+        """
+        message = bytearray()
+        message_opcode = None
+        while True:
+            try:
+                fin, opcode, payload = self._read_frame()
+            except (OSError, WebSocketError):
+                self.close()
+                return None
+
+            if opcode == OPCODE_PING:
+                self.send(OPCODE_PONG, payload)
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_CLOSE:
+                self.close(payload[:2])
+                return None
+
+            if opcode != OPCODE_CONTINUATION:
+                message_opcode = opcode
+                message = bytearray()
+            message.extend(payload)
+            if fin:
+                if message_opcode == OPCODE_TEXT:
+                    return bytes(message).decode("utf-8", "replace")
+                message = bytearray()
+
+    def close(self, status=b""):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.send(OPCODE_CLOSE, status)
+        except OSError:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Compare the JSON backends of module_utils.dme on large imdata payloads.
+
+Usage (from the collection root, with the collection on the Python path):
+
+    python tests/benchmarks/bench_json_backends.py --objects 50000 --repeat 5
+"""
+
+import argparse
+import sys
+import time
+
+from ansible_collections.cisco.dme.plugins.module_utils.dme import (
+    json_backend,
+    json_backends,
+)
+
+
+def build_imdata(objects, attributes):
+    """Build a class response of l1PhysIf-like objects."""
+    imdata = []
+    for idx in range(objects):
+        attrs = {
+            "attr{0}".format(attr): "value-{0}".format(attr)
+            for attr in range(attributes)
+        }
+        attrs["dn"] = "sys/intf/phys-[eth{0}/{1}]".format(idx // 64 + 1, idx % 64 + 1)
+        attrs["modTs"] = "2025-09-22T15:08:12.420+00:00"
+        imdata.append({"l1PhysIf": {"attributes": attrs}})
+    return {"imdata": imdata, "totalCount": str(objects)}
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--objects", type=int, default=50000)
+    parser.add_argument("--attributes", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    document = build_imdata(args.objects, args.attributes)
+    encoded = json_backends()["json"][1](document)
+    text = encoded.decode("utf-8")
+    print(
+        "{0} objects, {1:.1f} MB of JSON, best of {2} runs, default backend {3}".format(
+            args.objects,
+            len(encoded) / 1e6,
+            args.repeat,
+            json_backend(),
+        ),
+    )
+    print(
+        "{0:<8} {1:>12} {2:>12} {3:>12}".format(
+            "backend",
+            "loads(str)",
+            "loads(bytes)",
+            "dumps",
+        ),
+    )
+    for name, (loads, dumps) in sorted(json_backends().items()):
+        print(
+            "{0:<8} {1:>11.3f}s {2:>11.3f}s {3:>11.3f}s".format(
+                name,
+                best_of(args.repeat, loads, text),
+                best_of(args.repeat, loads, encoded),
+                best_of(args.repeat, dumps, document),
+            ),
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
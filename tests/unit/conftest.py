@@ -5,7 +5,6 @@
 
 """Pytest configuration and shared fixtures for DME tests."""
 
-import json
 from unittest.mock import MagicMock, Mock
 
 import pytest
@@ -84,23 +83,3 @@ def mock_ansible_env(monkeypatch):
     """Mock Ansible environment variables and imports."""
     # Mock the ssl import handling
     monkeypatch.setattr("ssl.CertificateError", Exception)
-
-    # Mock requests for the httpapi plugin
-    mock_requests = MagicMock()
-    mock_session = MagicMock()
-    mock_response = MagicMock()
-    mock_response.json.return_value = [
-        {
-            "jsonrpc": "2.0",
-            "result": {"msg": json.dumps(MOCK_VALIDATION_SUCCESS_RESPONSE["dme_data"])},
-            "id": 1,
-        },
-    ]
-    mock_session.post.return_value = mock_response
-    mock_requests.Session.return_value = mock_session
-    mock_requests.packages.urllib3.disable_warnings = MagicMock()
-    mock_requests.exceptions.RequestException = Exception
-
-    monkeypatch.setattr("requests", mock_requests, raising=False)
-
-    return mock_requests
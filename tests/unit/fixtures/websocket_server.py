@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Copyright 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Local stand-in for the DME event websocket used by the unit tests."""
+
+import socket
+import threading
+
+from ansible_collections.cisco.dme.plugins.plugin_utils.websocket import (
+    OPCODE_CLOSE,
+    OPCODE_CONTINUATION,
+    OPCODE_PING,
+    OPCODE_TEXT,
+    WebSocket,
+    accept_key,
+    encode_frame,
+)
+
+
+class WebSocketServer(object):
+    """
+    Plain TCP websocket server accepting a single client.
+
+    The server side reuses the client's frame parser, frames it sends are
+    not masked as RFC 6455 requires. Received frames are collected in
+    ``received`` as (opcode, payload) tuples.
+    """
+
+    def __init__(self, accept=True):
+        self.accept = accept
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.path = None
+        self.connected = threading.Event()
+        self.client = None
+        self.received = []
+        self._received_changed = threading.Condition()
+        self._reader = None
+
+    def start(self):
+        thread = threading.Thread(target=self._serve)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def _serve(self):
+        try:
+            sock, _ = self.listener.accept()
+        except OSError:
+            return
+
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                sock.close()
+                return
+            request += chunk
+
+        lines = request.decode("iso-8859-1").split("\r\n")
+        self.path = lines[0].split(" ")[1]
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if not self.accept:
+            sock.sendall(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n")
+            sock.close()
+            self.connected.set()
+            return
+
+        sock.sendall(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                "Sec-WebSocket-Accept: {0}\r\n"
+                "\r\n"
+            )
+            .format(accept_key(headers["sec-websocket-key"]))
+            .encode("ascii"),
+        )
+        self.client = WebSocket(sock)
+        self._reader = threading.Thread(target=self._read)
+        self._reader.daemon = True
+        self._reader.start()
+        self.connected.set()
+
+    def _read(self):
+        while True:
+            try:
+                frame = self.client._read_frame()
+            except Exception:
+                return
+            with self._received_changed:
+                self.received.append(frame[1:])
+                self._received_changed.notify_all()
+            if frame[1] == OPCODE_CLOSE:
+                return
+
+    def send_text(self, text):
+        self.client.sock.sendall(encode_frame(OPCODE_TEXT, text.encode(), mask=False))
+
+    def send_fragmented(self, text, split):
+        first = bytearray(encode_frame(OPCODE_TEXT, text[:split].encode(), mask=False))
+        first[0] &= 0x7F
+        self.client.sock.sendall(bytes(first))
+        self.client.sock.sendall(
+            encode_frame(OPCODE_CONTINUATION, text[split:].encode(), mask=False),
+        )
+
+    def ping(self, payload=b"ping"):
+        self.client.sock.sendall(encode_frame(OPCODE_PING, payload, mask=False))
+
+    def close(self):
+        if self.client is not None:
+            try:
+                self.client.sock.sendall(encode_frame(OPCODE_CLOSE, b"", mask=False))
+            except OSError:
+                pass
+        self.listener.close()
+
+    def wait_received(self, opcode, timeout=5):
+        """Wait until a frame with opcode was received and return its payload."""
+
+        def find():
+            for received_opcode, payload in self.received:
+                if received_opcode == opcode:
+                    return payload
+            return None
+
+        with self._received_changed:
+            if not self._received_changed.wait_for(
+                lambda: find() is not None,
+                timeout,
+            ):
+                raise AssertionError(f"No frame with opcode {opcode} received")
+            return find()
@@ -5,17 +5,44 @@
 
 """Unit tests for action.dme_command plugin."""
 
-from unittest.mock import MagicMock, patch
+import copy
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 from ansible.plugins.action import ActionBase
 from ansible_collections.cisco.dme.plugins.action.dme_command import ActionModule
+from ansible_collections.cisco.dme.plugins.modules.dme_command import ARGUMENT_SPEC
 from ansible_collections.cisco.dme.tests.unit.fixtures.dme_responses import (
     MOCK_CLASS_RESPONSE,
     MOCK_MO_RESPONSE,
 )
 
 
+MOCK_INCREMENTAL_RESPONSE = {
+    "imdata": [
+        {
+            "l1PhysIf": {
+                "attributes": {
+                    "dn": "sys/intf/phys-[eth1/1]",
+                    "adminSt": "up",
+                    "modTs": "2025-09-22T15:08:12.420+00:00",
+                },
+            },
+        },
+        {
+            "l1PhysIf": {
+                "attributes": {
+                    "dn": "sys/intf/phys-[eth1/2]",
+                    "adminSt": "up",
+                    "modTs": "2025-09-23T08:00:00.000+00:00",
+                },
+            },
+        },
+    ],
+    "totalCount": "2",
+}
+
+
 class TestDmeCommandAction:
     """Test cases for DME command action plugin."""
 
@@ -44,13 +71,32 @@ class TestDmeCommandAction:
         assert action_module.module_class_return == "class"
         assert action_module.module_mo_return == "mo"
 
+    def test_check_argspec_without_yaml(self, action_module):
+        """Test that validation uses the precompiled spec, not DOCUMENTATION."""
+        action_module._task.args = {"read_class": {"entry": "ipv4aclACL"}}
+        action_module._result = {}
+        spec = copy.deepcopy(ARGUMENT_SPEC)
+
+        with patch(
+            "ansible_collections.ansible.utils.plugins.module_utils.common."
+            "argspec_validate.yaml.load",
+            side_effect=AssertionError("DOCUMENTATION parsed"),
+        ):
+            for _ in range(2):
+                action_module._task.args = {"read_class": {"entry": "ipv4aclACL"}}
+                action_module._check_argspec()
+
+        assert not action_module._result.get("failed")
+        assert action_module._task.args["read_class"]["incremental"] is False
+        assert ARGUMENT_SPEC == spec
+
     def test_check_argspec_valid(self, action_module):
         """Test argument specification validation with valid args."""
         action_module._task.args = {"read_class": {"entry": "ipv4aclACL"}}
         action_module._result = {}
 
         with patch(
-            "ansible_collections.cisco.dme.plugins.action.dme_command.AnsibleArgSpecValidator",
+            "ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate.AnsibleArgSpecValidator",
         ) as mock_validator:
             mock_validator.return_value.validate.return_value = (
                 True,
@@ -68,7 +114,7 @@ class TestDmeCommandAction:
         action_module._result = {}
 
         with patch(
-            "ansible_collections.cisco.dme.plugins.action.dme_command.AnsibleArgSpecValidator",
+            "ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate.AnsibleArgSpecValidator",
         ) as mock_validator:
             mock_validator.return_value.validate.return_value = (
                 False,
@@ -99,7 +145,11 @@ class TestDmeCommandAction:
             action_module.api_object
             == "/api/node/class/ipv4aclACL.json?rsp-prop-include=config-only"
         )
-        mock_dme_request.get.assert_called_once_with(action_module.api_object, data="")
+        mock_dme_request.get.assert_called_once_with(
+            action_module.api_object,
+            data="",
+            params=None,
+        )
 
     def test_configure_class_api_without_rsp_prop_include(self, action_module):
         """Test class API configuration without rsp_prop_include."""
@@ -117,6 +167,430 @@ class TestDmeCommandAction:
         assert code == 200
         assert action_module.api_object == "/api/node/class/ipv4aclACL.json"
 
+    def test_configure_class_api_paginated(self, action_module):
+        """Test class API configuration fetching the class in pages."""
+        mock_dme_request = MagicMock()
+        objects = MOCK_CLASS_RESPONSE["imdata"]
+        mock_dme_request.get_pages.return_value = iter(
+            [
+                (200, {"imdata": objects[:1], "totalCount": "40"}),
+                (200, {"imdata": objects[1:], "totalCount": "40"}),
+            ],
+        )
+
+        read_class = {"entry": "ipv4aclACL", "page_size": 1, "max_objects": 10}
+
+        api_response, code = action_module.configure_class_api(
+            mock_dme_request,
+            read_class,
+        )
+
+        assert api_response == {"imdata": objects, "totalCount": "40"}
+        assert code == 200
+        mock_dme_request.get_pages.assert_called_once_with(
+            "/api/node/class/ipv4aclACL.json",
+            1,
+            "ipv4aclACL.dn",
+            max_objects=10,
+            params=None,
+        )
+        mock_dme_request.get.assert_not_called()
+
+    def test_configure_class_api_paginated_page_error(self, action_module):
+        """Test that a failing page returns its error response and code."""
+        mock_dme_request = MagicMock()
+        objects = MOCK_CLASS_RESPONSE["imdata"]
+        error = {"imdata": [{"error": {"attributes": {"text": "busy"}}}]}
+        mock_dme_request.get_pages.return_value = iter(
+            [
+                (200, {"imdata": objects, "totalCount": "40"}),
+                (503, error),
+            ],
+        )
+
+        api_response, code = action_module.configure_class_api(
+            mock_dme_request,
+            {"entry": "ipv4aclACL", "page_size": 2},
+        )
+
+        assert api_response == error
+        assert code == 503
+
+    def test_incremental_first_run_fetches_class(self, action_module, tmp_path):
+        """Test that the first incremental run stores a full snapshot."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get.return_value = (200, MOCK_INCREMENTAL_RESPONSE)
+        action_module.host = "switch1"
+        read_class = {
+            "entry": "l1PhysIf",
+            "incremental": True,
+            "snapshot_dir": str(tmp_path),
+        }
+
+        api_response, code = action_module.configure_class_api(
+            mock_dme_request,
+            read_class,
+        )
+
+        assert code == 200
+        assert api_response["imdata"] == MOCK_INCREMENTAL_RESPONSE["imdata"]
+        assert api_response["totalCount"] == "2"
+        mock_dme_request.get.assert_called_once_with(
+            "/api/node/class/l1PhysIf.json",
+            data="",
+            params=None,
+        )
+        mock_dme_request.get_count.assert_not_called()
+        assert action_module.incremental["full_sync"] is True
+        assert (tmp_path / "switch1_l1PhysIf.json").exists()
+
+    def test_incremental_run_fetches_changes(self, action_module, tmp_path):
+        """Test that later runs fetch objects changed since the mark."""
+        mock_dme_request = MagicMock()
+        action_module.host = "switch1"
+        read_class = {
+            "entry": "l1PhysIf",
+            "incremental": True,
+            "snapshot_dir": str(tmp_path),
+        }
+        mock_dme_request.get.return_value = (200, MOCK_INCREMENTAL_RESPONSE)
+        action_module.configure_class_api(mock_dme_request, read_class)
+
+        changed = {
+            "l1PhysIf": {
+                "attributes": {
+                    "dn": "sys/intf/phys-[eth1/2]",
+                    "adminSt": "down",
+                    "modTs": "2025-09-24T10:00:00.000+00:00",
+                },
+            },
+        }
+        mock_dme_request.get.reset_mock()
+        mock_dme_request.get.return_value = (
+            200,
+            {"imdata": [changed], "totalCount": "1"},
+        )
+        mock_dme_request.get_count.return_value = (200, 2)
+
+        api_response, code = action_module.configure_class_api(
+            mock_dme_request,
+            read_class,
+        )
+
+        assert code == 200
+        assert api_response["imdata"] == [
+            MOCK_INCREMENTAL_RESPONSE["imdata"][0],
+            changed,
+        ]
+        mock_dme_request.get.assert_called_once_with(
+            "/api/node/class/l1PhysIf.json",
+            data="",
+            params={
+                "query-target-filter": (
+                    'ge(l1PhysIf.modTs,"2025-09-23T08:00:00.000+00:00")'
+                ),
+            },
+        )
+        assert action_module.incremental == {
+            "full_sync": False,
+            "fetched": 1,
+            "mark": "2025-09-24T10:00:00.000+00:00",
+            "snapshot": str(tmp_path / "switch1_l1PhysIf.json"),
+        }
+
+    def test_incremental_keeps_query_filter(self, action_module, tmp_path):
+        """Test that the delta and the count are limited to the task's filter."""
+        mock_dme_request = MagicMock()
+        action_module.host = "switch1"
+        read_class = {
+            "entry": "l1PhysIf",
+            "incremental": True,
+            "snapshot_dir": str(tmp_path),
+            "query_target_filter": {"eq": ["l1PhysIf.adminSt", "up"]},
+        }
+        mock_dme_request.get.return_value = (200, MOCK_INCREMENTAL_RESPONSE)
+        action_module.configure_class_api(mock_dme_request, read_class)
+        mock_dme_request.get.reset_mock()
+        mock_dme_request.get.return_value = (200, {"imdata": [], "totalCount": "0"})
+        mock_dme_request.get_count.return_value = (200, 2)
+
+        action_module.configure_class_api(mock_dme_request, read_class)
+
+        assert mock_dme_request.get.call_args[1]["params"] == {
+            "query-target-filter": (
+                'and(eq(l1PhysIf.adminSt,"up"),'
+                'ge(l1PhysIf.modTs,"2025-09-23T08:00:00.000+00:00"))'
+            ),
+        }
+        mock_dme_request.get_count.assert_called_once_with(
+            "/api/node/class/l1PhysIf.json",
+            params={"query-target-filter": 'eq(l1PhysIf.adminSt,"up")'},
+        )
+        assert action_module.incremental["full_sync"] is False
+
+    def test_incremental_run_resyncs_after_delete(self, action_module, tmp_path):
+        """Test that a count mismatch triggers a full fetch."""
+        mock_dme_request = MagicMock()
+        action_module.host = "switch1"
+        read_class = {
+            "entry": "l1PhysIf",
+            "incremental": True,
+            "snapshot_dir": str(tmp_path),
+        }
+        mock_dme_request.get.return_value = (200, MOCK_INCREMENTAL_RESPONSE)
+        action_module.configure_class_api(mock_dme_request, read_class)
+
+        remaining = {
+            "imdata": MOCK_INCREMENTAL_RESPONSE["imdata"][:1],
+            "totalCount": "1",
+        }
+        mock_dme_request.get.side_effect = [
+            (200, {"imdata": [], "totalCount": "0"}),
+            (200, remaining),
+        ]
+        mock_dme_request.get_count.return_value = (200, 1)
+
+        api_response, code = action_module.configure_class_api(
+            mock_dme_request,
+            read_class,
+        )
+
+        assert api_response["imdata"] == remaining["imdata"]
+        assert action_module.incremental["full_sync"] is True
+
+    def test_incremental_rejects_config_only(self, action_module, tmp_path):
+        """Test that incremental fetches need modTs in the response."""
+        read_class = {
+            "entry": "l1PhysIf",
+            "rsp_prop_include": "config-only",
+            "incremental": True,
+            "snapshot_dir": str(tmp_path),
+        }
+
+        with pytest.raises(ValueError, match="incremental requires modTs"):
+            action_module.configure_class_api(MagicMock(), read_class)
+
+    @pytest.mark.parametrize(
+        "option, match",
+        [
+            ({"page_size": 100}, "cannot be combined with page_size"),
+            ({"max_objects": 100}, "cannot be combined with max_objects"),
+            ({"rsp_subtree": "children"}, "cannot be combined with rsp_subtree"),
+            ({"rsp_subtree": "full"}, "cannot be combined with rsp_subtree"),
+        ],
+    )
+    def test_incremental_rejects_partial_fetches(
+        self,
+        action_module,
+        tmp_path,
+        option,
+        match,
+    ):
+        """Test that incremental fetches need the whole class without subtrees."""
+        read_class = dict(
+            {"entry": "l1PhysIf", "incremental": True, "snapshot_dir": str(tmp_path)},
+            **option,
+        )
+        mock_dme_request = MagicMock()
+
+        with pytest.raises(ValueError, match=match):
+            action_module.configure_class_api(mock_dme_request, read_class)
+        mock_dme_request.get.assert_not_called()
+
+    def test_configure_class_api_pushdown(self, action_module):
+        """Test that filters, subtree classes and ordering are sent to the device."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get.return_value = (200, MOCK_CLASS_RESPONSE)
+        read_class = {
+            "entry": "l1PhysIf",
+            "rsp_subtree": "children",
+            "rsp_subtree_class": ["ethpmPhysIf", "rmonIfIn"],
+            "rsp_subtree_filter": 'eq(ethpmPhysIf.operSt,"up")',
+            "query_target_filter": {
+                "and": [
+                    {"eq": ["l1PhysIf.adminSt", "up"]},
+                    {"wcard": ["l1PhysIf.descr", "^uplink"]},
+                ],
+            },
+            "order_by": "l1PhysIf.id|desc",
+        }
+
+        action_module.configure_class_api(mock_dme_request, read_class)
+
+        mock_dme_request.get.assert_called_once_with(
+            "/api/node/class/l1PhysIf.json?rsp-subtree=children",
+            data="",
+            params={
+                "rsp-subtree-class": "ethpmPhysIf,rmonIfIn",
+                "rsp-subtree-filter": 'eq(ethpmPhysIf.operSt,"up")',
+                "query-target-filter": (
+                    'and(eq(l1PhysIf.adminSt,"up"),wcard(l1PhysIf.descr,"^uplink"))'
+                ),
+                "order-by": "l1PhysIf.id|desc",
+            },
+        )
+
+    def test_configure_class_api_paginated_order_by(self, action_module):
+        """Test that pages are requested in the order asked for."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get_pages.return_value = iter([])
+
+        action_module.configure_class_api(
+            mock_dme_request,
+            {
+                "entry": "l1PhysIf",
+                "page_size": 100,
+                "order_by": "l1PhysIf.id",
+                "query_target_filter": 'eq(l1PhysIf.adminSt,"up")',
+            },
+        )
+
+        mock_dme_request.get_pages.assert_called_once_with(
+            "/api/node/class/l1PhysIf.json",
+            100,
+            "l1PhysIf.id",
+            max_objects=None,
+            params={"query-target-filter": 'eq(l1PhysIf.adminSt,"up")'},
+        )
+
+    @pytest.mark.parametrize(
+        "option, value",
+        [
+            ("query_target_filter", 'eq(l1PhysIf,"up")'),
+            ("rsp_subtree_filter", {"eq": ["l1PhysIf.adminSt"]}),
+            ("rsp_subtree_class", ["l1PhysIf;drop"]),
+            ("order_by", "l1PhysIf.id|sideways"),
+        ],
+    )
+    def test_invalid_pushdown_not_sent(self, action_module, option, value):
+        """Test that malformed query options fail before any request."""
+        mock_dme_request = MagicMock()
+
+        with pytest.raises(ValueError):
+            action_module.configure_class_api(
+                mock_dme_request,
+                {"entry": "l1PhysIf", option: value},
+            )
+
+        mock_dme_request.get.assert_not_called()
+
+    def test_configure_class_api_count_only(self, action_module):
+        """Test that count_only counts the filtered class without fetching it."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get_count.return_value = (200, 17)
+
+        count, code = action_module.configure_class_api(
+            mock_dme_request,
+            {
+                "entry": "l1PhysIf",
+                "count_only": True,
+                "rsp_prop_include": "config-only",
+                "rsp_subtree": "full",
+                "page_size": 100,
+                "query_target_filter": 'eq(l1PhysIf.adminSt,"down")',
+            },
+        )
+
+        assert (count, code) == (17, 200)
+        mock_dme_request.get_count.assert_called_once_with(
+            "/api/node/class/l1PhysIf.json",
+            params={"query-target-filter": 'eq(l1PhysIf.adminSt,"down")'},
+        )
+        mock_dme_request.get.assert_not_called()
+        mock_dme_request.get_pages.assert_not_called()
+
+    def test_count_only_rejects_incremental(self, action_module):
+        """Test that a count cannot update an incremental snapshot."""
+        with pytest.raises(ValueError, match="count_only cannot be combined"):
+            action_module.configure_class_api(
+                MagicMock(),
+                {"entry": "l1PhysIf", "count_only": True, "incremental": True},
+            )
+
+    def test_configure_mo_api_count_only(self, action_module):
+        """Test that count_only keeps the options selecting the counted objects."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get_count.return_value = (200, 4)
+
+        count, code = action_module.configure_mo_api(
+            mock_dme_request,
+            {
+                "entry": "sys/bgp/inst/dom-[default]",
+                "count_only": True,
+                "query_target": "subtree",
+                "target_subtree_class": "bgpPeerEntry",
+                "rsp_subtree": "full",
+                "query_target_filter": {"ne": ["bgpPeerEntry.operSt", "established"]},
+            },
+        )
+
+        assert (count, code) == (4, 200)
+        mock_dme_request.get_count.assert_called_once_with(
+            "/api/mo/sys/bgp/inst/dom-[default].json?query-target=subtree"
+            "&target-subtree-class=bgpPeerEntry"
+            "&query-target-filter=ne%28bgpPeerEntry.operSt%2C%22established%22%29",
+            params=None,
+        )
+
+    def test_configure_class_api_attributes(self, action_module):
+        """Test that attributes are handed to the connection to trim the objects."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get.return_value = (200, MOCK_CLASS_RESPONSE)
+
+        action_module.configure_class_api(
+            mock_dme_request,
+            {"entry": "l1PhysIf", "attributes": ["id", "adminSt"]},
+        )
+
+        mock_dme_request.get.assert_called_once_with(
+            "/api/node/class/l1PhysIf.json",
+            data="",
+            params=None,
+            attributes=["id", "adminSt"],
+        )
+
+    def test_configure_mo_api_dn_only(self, action_module):
+        """Test that asking only for the dn lets the device leave out the rest."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get.return_value = (200, MOCK_MO_RESPONSE)
+
+        action_module.configure_mo_api(
+            mock_dme_request,
+            {
+                "entry": "sys/intf",
+                "query_target": "children",
+                "attributes": ["dn"],
+            },
+        )
+
+        mock_dme_request.get.assert_called_once_with(
+            "/api/mo/sys/intf.json?rsp-prop-include=naming-only&query-target=children",
+            data="",
+            attributes=["dn"],
+        )
+
+    def test_incremental_keeps_snapshot_attributes(self, action_module, tmp_path):
+        """Test that incremental fetches keep the attributes the snapshot needs."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get.return_value = (200, MOCK_INCREMENTAL_RESPONSE)
+
+        action_module.configure_class_api(
+            mock_dme_request,
+            {
+                "entry": "l1PhysIf",
+                "incremental": True,
+                "snapshot_dir": str(tmp_path),
+                "attributes": ["dn"],
+            },
+        )
+
+        assert mock_dme_request.get.call_args == call(
+            "/api/node/class/l1PhysIf.json",
+            data="",
+            params=None,
+            attributes=["dn", "modTs"],
+        )
+
     def test_configure_class_api_missing_entry(self, action_module):
         """Test class API configuration with missing entry."""
         mock_dme_request = MagicMock()
@@ -146,6 +620,30 @@ class TestDmeCommandAction:
         assert action_module.api_object == expected_url
         mock_dme_request.get.assert_called_once_with(action_module.api_object, data="")
 
+    def test_configure_mo_api_pushdown(self, action_module):
+        """Test that DN queries encode filters into the URL."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get.return_value = (200, MOCK_MO_RESPONSE)
+        read_dn = {
+            "entry": "sys/bgp/inst/dom-[default]",
+            "query_target": "children",
+            "target_subtree_class": "bgpPeer",
+            "rsp_subtree": "children",
+            "rsp_subtree_class": ["bgpPeerEntry"],
+            "rsp_subtree_filter": {"ne": ["bgpPeerEntry.operSt", "established"]},
+            "order_by": "bgpPeer.addr",
+        }
+
+        action_module.configure_mo_api(mock_dme_request, read_dn)
+
+        assert action_module.api_object == (
+            "/api/mo/sys/bgp/inst/dom-[default].json?rsp-subtree=children"
+            "&query-target=children&target-subtree-class=bgpPeer"
+            "&rsp-subtree-class=bgpPeerEntry"
+            "&rsp-subtree-filter=ne%28bgpPeerEntry.operSt%2C%22established%22%29"
+            "&order-by=bgpPeer.addr"
+        )
+
     def test_configure_mo_api_minimal(self, action_module):
         """Test managed object API configuration with minimal parameters."""
         mock_dme_request = MagicMock()
@@ -251,6 +749,35 @@ class TestDmeCommandAction:
         assert result["mo"] == MOCK_MO_RESPONSE
         assert not result.get("failed", False)
 
+    @pytest.mark.parametrize(
+        "metrics",
+        [None, {"requests": [], "rpc_calls": 1, "rpc_time": 0.01}],
+    )
+    @patch("ansible_collections.cisco.dme.plugins.action.dme_command.Connection")
+    @patch("ansible_collections.cisco.dme.plugins.action.dme_command.DmeRequest")
+    def test_run_returns_metrics(
+        self,
+        mock_dme_request_class,
+        mock_connection_class,
+        action_module,
+        metrics,
+    ):
+        """Test that dme_metrics is only returned when metrics are enabled."""
+        mock_dme_request = MagicMock()
+        mock_dme_request_class.return_value = mock_dme_request
+        mock_dme_request.get.return_value = (200, MOCK_MO_RESPONSE)
+        mock_dme_request.metrics.return_value = metrics
+        action_module._task.args = {"read_dn": {"entry": "sys"}}
+
+        with patch.object(ActionBase, "run", return_value={}):
+            with patch.object(action_module, "_check_argspec"):
+                result = action_module.run(task_vars={})
+
+        if metrics is None:
+            assert "dme_metrics" not in result
+        else:
+            assert result["dme_metrics"] == metrics
+
     @patch("ansible_collections.cisco.dme.plugins.action.dme_command.Connection")
     @patch("ansible_collections.cisco.dme.plugins.action.dme_command.DmeRequest")
     def test_run_with_both_parameters(
@@ -314,6 +841,123 @@ class TestDmeCommandAction:
         assert result["msg"] == "Invalid args"
         mock_dme_request_class.assert_not_called()
 
+    def test_read_entries_batched(self, action_module):
+        """Test that single-request queries go to the connection in one batch."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get_many.return_value = [
+            (200, MOCK_CLASS_RESPONSE),
+            (200, MOCK_MO_RESPONSE),
+            (400, {"imdata": [{"error": {}}]}),
+        ]
+        mock_dme_request.get_pages.return_value = iter(
+            [(200, {"imdata": [{"l2MacAddress": {}}], "totalCount": "1"})],
+        )
+
+        classes, mos = action_module.read_entries(
+            mock_dme_request,
+            [
+                {"entry": "l2MacAddressTable", "page_size": 500},
+                {"entry": "ipv4aclACL", "rsp_prop_include": "config-only"},
+            ],
+            [
+                {"entry": "sys/intf/phys-[eth1/1]", "rsp_subtree": "full"},
+                {"entry": "sys/bad"},
+            ],
+        )
+
+        mock_dme_request.get_many.assert_called_once_with(
+            [
+                (
+                    "/api/node/class/ipv4aclACL.json?rsp-prop-include=config-only",
+                    None,
+                    None,
+                ),
+                ("/api/mo/sys/intf/phys-[eth1/1].json?rsp-subtree=full", None, None),
+                ("/api/mo/sys/bad.json", None, None),
+            ],
+        )
+        assert list(classes) == ["l2MacAddressTable", "ipv4aclACL"]
+        assert classes["ipv4aclACL"] == MOCK_CLASS_RESPONSE
+        assert classes["l2MacAddressTable"]["totalCount"] == "1"
+        assert mos == {
+            "sys/intf/phys-[eth1/1]": MOCK_MO_RESPONSE,
+            "sys/bad": {"imdata": [{"error": {}}]},
+        }
+
+    def test_read_entries_counts(self, action_module):
+        """Test that counts are batched with the other queries."""
+        mock_dme_request = MagicMock()
+        mock_dme_request.get_many.return_value = [
+            (200, {"imdata": [{"moCount": {"attributes": {"count": "17"}}}]}),
+            (200, {"imdata": [{"moCount": {"attributes": {"count": "1"}}}]}),
+            (400, {"imdata": [{"error": {}}]}),
+        ]
+
+        classes, mos = action_module.read_entries(
+            mock_dme_request,
+            [{"entry": "l1PhysIf", "count_only": True, "page_size": 10}],
+            [{"entry": "sys", "count_only": True}, {"entry": "sys/bad"}],
+        )
+
+        mock_dme_request.get_many.assert_called_once_with(
+            [
+                (
+                    "/api/node/class/l1PhysIf.json",
+                    {"rsp-subtree-include": "count"},
+                    None,
+                ),
+                ("/api/mo/sys.json", {"rsp-subtree-include": "count"}, None),
+                ("/api/mo/sys/bad.json", None, None),
+            ],
+        )
+        assert classes == {"l1PhysIf": 17}
+        assert mos == {"sys": 1, "sys/bad": {"imdata": [{"error": {}}]}}
+        mock_dme_request.get_pages.assert_not_called()
+
+    def test_read_entries_rejects_duplicates(self, action_module):
+        """Test that results keyed by entry cannot hide a repeated entry."""
+        mock_dme_request = MagicMock()
+
+        with pytest.raises(ValueError, match=r"read_dns lists sys more than once"):
+            action_module.read_entries(
+                mock_dme_request,
+                [],
+                [{"entry": "sys"}, {"entry": "sys", "rsp_subtree": "full"}],
+            )
+
+        mock_dme_request.get_many.assert_not_called()
+
+    @patch("ansible_collections.cisco.dme.plugins.action.dme_command.Connection")
+    @patch("ansible_collections.cisco.dme.plugins.action.dme_command.DmeRequest")
+    def test_run_with_entry_lists(
+        self,
+        mock_dme_request_class,
+        mock_connection_class,
+        action_module,
+    ):
+        """Test that read_classes and read_dns return their results by entry."""
+        mock_dme_request = MagicMock()
+        mock_dme_request_class.return_value = mock_dme_request
+        mock_dme_request.get_many.return_value = [
+            (200, MOCK_CLASS_RESPONSE),
+            (200, MOCK_MO_RESPONSE),
+        ]
+        mock_dme_request.metrics.return_value = None
+        action_module._task.args = {
+            "read_classes": [{"entry": "ipv4aclACL"}],
+            "read_dns": [{"entry": "sys/intf/phys-[eth1/1]"}],
+        }
+
+        with patch.object(ActionBase, "run", return_value={}):
+            with patch.object(action_module, "_check_argspec"):
+                result = action_module.run(task_vars={})
+
+        assert result["changed"] is False
+        assert result["classes"] == {"ipv4aclACL": MOCK_CLASS_RESPONSE}
+        assert result["mos"] == {"sys/intf/phys-[eth1/1]": MOCK_MO_RESPONSE}
+        assert "class" not in result
+        mock_dme_request.get.assert_not_called()
+
     # def test_supports_check_mode(self, action_module):
     #     """Test that check mode is not supported."""
     #     with patch.object(ActionBase, "run", return_value={}):
@@ -67,7 +67,7 @@ class TestDmeConfigAction:
         action_module._result = {}
 
         with patch(
-            "ansible_collections.cisco.dme.plugins.action.dme_config.AnsibleArgSpecValidator",
+            "ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate.AnsibleArgSpecValidator",
         ) as mock_validator:
             mock_validator.return_value.validate.return_value = (
                 True,
@@ -85,7 +85,7 @@ class TestDmeConfigAction:
         action_module._result = {}
 
         with patch(
-            "ansible_collections.cisco.dme.plugins.action.dme_config.AnsibleArgSpecValidator",
+            "ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate.AnsibleArgSpecValidator",
         ) as mock_validator:
             mock_validator.return_value.validate.return_value = (
                 False,
@@ -288,6 +288,39 @@ no shutdown
         assert "errors" in result
         assert 0 in result["errors"]  # First command had an error
 
+    @pytest.mark.parametrize(
+        "code, response",
+        [
+            (500, {"error": {"code": 500, "message": "Internal Server Error"}}),
+            (401, "<html><body>401 Unauthorized</body></html>"),
+        ],
+    )
+    @patch("ansible_collections.cisco.dme.plugins.action.dme_validate.Connection")
+    @patch("ansible_collections.cisco.dme.plugins.action.dme_validate.DmeRequest")
+    def test_run_with_http_error(
+        self,
+        mock_dme_request_class,
+        mock_connection_class,
+        action_module,
+        code,
+        response,
+    ):
+        """Test that an HTTP error from /ins fails the task."""
+        mock_dme_request = MagicMock()
+        mock_dme_request_class.return_value = mock_dme_request
+        mock_dme_request.rpc_get.return_value = (code, response)
+        action_module._task.args = {"lines": ["no shutdown"]}
+
+        with patch.object(ActionBase, "run", return_value={}):
+            with patch.object(action_module, "_check_argspec"):
+                result = action_module.run()
+
+        assert result["failed"] is True
+        assert result["changed"] is False
+        assert "failed with code {0}".format(code) in result["msg"]
+        assert "valid" not in result
+        assert "model" not in result
+
     @patch("ansible_collections.cisco.dme.plugins.action.dme_validate.Connection")
     @patch("ansible_collections.cisco.dme.plugins.action.dme_validate.DmeRequest")
     def test_run_with_string_parents(
@@ -386,7 +419,7 @@ no shutdown
         action_module._result = {}
 
         with patch(
-            "ansible_collections.cisco.dme.plugins.action.dme_validate.AnsibleArgSpecValidator",
+            "ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate.AnsibleArgSpecValidator",
         ) as mock_validator:
             mock_validator.return_value.validate.return_value = (
                 True,
@@ -404,7 +437,7 @@ no shutdown
         action_module._result = {}
 
         with patch(
-            "ansible_collections.cisco.dme.plugins.action.dme_validate.AnsibleArgSpecValidator",
+            "ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate.AnsibleArgSpecValidator",
         ) as mock_validator:
             mock_validator.return_value.validate.return_value = (
                 False,
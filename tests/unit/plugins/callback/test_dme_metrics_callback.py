@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# Copyright 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Unit tests for the dme_metrics callback plugin."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from ansible_collections.cisco.dme.plugins.callback.dme_metrics import (
+    CallbackModule,
+    build_report,
+    endpoint,
+    format_bytes,
+    percentile,
+)
+
+
+def request(path, total_time, method="GET", **kwargs):
+    """Build a request entry of dme_metrics."""
+    entry = {
+        "method": method,
+        "path": path,
+        "status": 200,
+        "cached": False,
+        "retries": 0,
+        "request_bytes": 2,
+        "response_bytes": 100,
+        "total_time": total_time,
+    }
+    entry.update(kwargs)
+    return entry
+
+
+def task_result(host, result):
+    """Build a task result as passed to the callback."""
+    task = MagicMock()
+    task._host.get_name.return_value = host
+    task._result = result
+    return task
+
+
+@pytest.fixture
+def callback():
+    """Create the callback with default options and a mock display."""
+    display = MagicMock()
+    display.verbosity = 0
+    callback = CallbackModule(display=display)
+    callback._plugin_options = {"top": 10, "output_file": None}
+    return callback
+
+
+class TestReport:
+    """Test cases for aggregating the metrics."""
+
+    @pytest.mark.parametrize(
+        "path, expected",
+        [
+            (
+                "/api/mo/sys/intf/phys-[eth1/1].json",
+                "GET /api/mo/sys/intf/phys-[*].json",
+            ),
+            (
+                "/api/node/mo/sys/bgp/inst/dom-[default].json",
+                "GET /api/node/mo/sys/bgp/inst/dom-[*].json",
+            ),
+            ("/api/node/class/l1PhysIf.json", "GET /api/node/class/l1PhysIf.json"),
+            ("/ins", "GET /ins"),
+        ],
+    )
+    def test_endpoint(self, path, expected):
+        """Test that MO queries of single objects share an endpoint."""
+        assert endpoint({"method": "GET", "path": path}) == expected
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile."""
+        values = list(range(1, 101))
+
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 99) == 7
+        assert percentile([], 99) == 0.0
+
+    def test_format_bytes(self):
+        """Test the human readable sizes."""
+        assert format_bytes(512) == "512 B"
+        assert format_bytes(1536) == "1.5 KB"
+        assert format_bytes(5 * 1024**3) == "5.0 GB"
+
+    def test_build_report(self):
+        """Test totals and the ordering of hosts and endpoints."""
+        report = build_report(
+            [
+                (
+                    "switch1",
+                    {
+                        "requests": [
+                            request("/api/aaaLogin.json", 0.1, method="POST"),
+                            request("/api/mo/sys/intf/phys-[eth1/1].json", 0.2),
+                        ],
+                        "rpc_calls": 1,
+                        "rpc_time": 0.4,
+                    },
+                ),
+                (
+                    "switch2",
+                    {
+                        "requests": [
+                            request(
+                                "/api/mo/sys/intf/phys-[eth1/2].json",
+                                1.5,
+                                retries=2,
+                            ),
+                            request("/api/node/class/l1PhysIf.json", 0.1, cached=True),
+                            request("/api/mo/sys.json", 0.3, status=None),
+                        ],
+                        "rpc_calls": 3,
+                        "rpc_time": 2.0,
+                    },
+                ),
+            ],
+        )
+
+        assert report["totals"] == {
+            "tasks": 2,
+            "requests": 5,
+            "request_bytes": 10,
+            "response_bytes": 500,
+            "retries": 2,
+            "cached": 1,
+            "errors": 1,
+            "logins": 1,
+            "time": pytest.approx(2.2),
+        }
+        assert [stats["host"] for stats in report["hosts"]] == ["switch2", "switch1"]
+        assert report["hosts"][0]["rpc_time"] == 2.0
+        slowest = report["endpoints"][0]
+        assert slowest["endpoint"] == "GET /api/mo/sys/intf/phys-[*].json"
+        assert slowest["requests"] == 2
+        assert slowest["p50"] == 0.2
+        assert slowest["p99"] == slowest["max"] == 1.5
+        assert slowest["bytes"] == 204
+
+
+class TestCallback:
+    """Test cases for collecting results and printing the summary."""
+
+    def test_results_collected(self, callback):
+        """Test that results with dme_metrics are collected, including loops."""
+        metrics = {"requests": [request("/api/mo/sys.json", 0.1)], "rpc_time": 0.2}
+
+        callback.v2_runner_on_ok(task_result("switch1", {"dme_metrics": metrics}))
+        callback.v2_runner_on_ok(task_result("switch1", {"changed": False}))
+        callback.v2_runner_on_failed(
+            task_result(
+                "switch2",
+                {"results": [{"dme_metrics": metrics}, {"failed": True}]},
+            ),
+        )
+
+        assert callback._tasks == [("switch1", metrics), ("switch2", metrics)]
+
+    def test_nothing_printed_without_metrics(self, callback):
+        """Test that runs without DME metrics print no summary."""
+        callback.v2_playbook_on_stats(MagicMock())
+
+        callback._display.banner.assert_not_called()
+
+    def test_summary_printed(self, callback):
+        """Test that the summary lists at most top hosts."""
+        callback._plugin_options["top"] = 1
+        for host in ("switch1", "switch2"):
+            callback.v2_runner_on_ok(
+                task_result(
+                    host,
+                    {"dme_metrics": {"requests": [request("/api/mo/sys.json", 0.1)]}},
+                ),
+            )
+
+        callback.v2_playbook_on_stats(MagicMock())
+
+        callback._display.banner.assert_called_once_with("DME METRICS")
+        lines = [args[0] for args, _ in callback._display.display.call_args_list]
+        assert lines[0].startswith("2 requests in 2 tasks")
+        assert len([line for line in lines if "switch" in line]) == 1
+
+    def test_report_written(self, callback, tmp_path):
+        """Test that the full report is written as JSON."""
+        output_file = tmp_path / "dme_metrics.json"
+        callback._plugin_options["output_file"] = str(output_file)
+        callback.v2_runner_on_ok(
+            task_result(
+                "switch1",
+                {"dme_metrics": {"requests": [request("/api/mo/sys.json", 0.1)]}},
+            ),
+        )
+
+        callback.v2_playbook_on_stats(MagicMock())
+
+        report = json.loads(output_file.read_text())
+        assert report["totals"]["requests"] == 1
+        assert report["hosts"][0]["host"] == "switch1"
@@ -0,0 +1,1433 @@
+# -*- coding: utf-8 -*-
+# Copyright 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Unit tests for httpapi.dme plugin."""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from ansible.errors import AnsibleAuthenticationFailure, AnsibleConnectionFailure
+from ansible_collections.cisco.dme.plugins.httpapi.dme import (
+    BASE_HEADERS,
+    COMPRESSION_HEADERS,
+    JSONRPC_HEADERS,
+    HttpApi,
+    _ResponseCache,
+)
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible_collections.cisco.dme.tests.unit.fixtures.dme_responses import (
+    MOCK_LOGIN_RESPONSE,
+    MOCK_VALIDATION_SUCCESS_RESPONSE,
+)
+from ansible_collections.cisco.dme.tests.unit.fixtures.websocket_server import (
+    WebSocketServer,
+)
+
+HTTPAPI_OPTIONS = {
+    "compression": True,
+    "request_compression_threshold": 0,
+    "retries": 3,
+    "retry_backoff": 0.5,
+    "circuit_breaker_threshold": 5,
+    "circuit_breaker_cooldown": 60,
+    "response_cache": False,
+    "response_cache_ttl": 30,
+    "response_cache_max_bytes": 67108864,
+    "subscriptions": False,
+    "metrics": False,
+    "trace_file": None,
+    "max_concurrent_requests": 4,
+    "token_cache": False,
+    "token_cache_dir": "~/.ansible/dme_tokens",
+    "token_refresh_margin": 60,
+}
+
+
+def make_response(payload, code=200, headers=None, body=None):
+    """Build a (response, buffer) pair as returned by connection.send."""
+    response = MagicMock()
+    response.getcode.return_value = code
+    response.info.return_value = headers or {}
+    if body is None:
+        body = json.dumps(payload).encode()
+    return response, BytesIO(body)
+
+
+def respond_with(payload, code=200):
+    """Build a connection.send side effect returning a fresh response per call."""
+    return lambda *args, **kwargs: make_response(payload, code=code)
+
+
+@pytest.fixture
+def httpapi_connection():
+    """Create a mock httpapi connection for testing."""
+    connection = MagicMock()
+    connection._url = "https://test-device.example.com"
+    connection._auth = None
+    connection.get_options.return_value = {
+        "host": "test-device.example.com",
+        "port": 443,
+        "remote_user": "admin",
+        "password": "password",
+        "validate_certs": False,
+        "persistent_command_timeout": 30,
+    }
+    connection.get_option.side_effect = connection.get_options.return_value.get
+    return connection
+
+
+@pytest.fixture
+def httpapi(httpapi_connection):
+    """Create an HttpApi instance with default plugin options."""
+    plugin = HttpApi(httpapi_connection)
+    plugin._options = dict(HTTPAPI_OPTIONS)
+    return plugin
+
+
+class TestDmeHttpApiSyncOptions:
+    """Test cases for applying task variables once per connection."""
+
+    def test_unknown_digest_not_current(self, httpapi):
+        """Test that a fresh plugin reports any options as outdated."""
+        assert httpapi.sync_options("abc") is False
+
+    def test_options_applied_once(self, httpapi):
+        """Test that applied options are reported as current."""
+        assert httpapi.sync_options("abc", var_options={"ansible_host": "h"}) is True
+
+        httpapi.connection.set_options.assert_called_once_with(
+            var_options={"ansible_host": "h"},
+        )
+        assert httpapi.sync_options("abc") is True
+        assert httpapi.sync_options("def") is False
+
+
+class TestDmeHttpApiSendRequest:
+    """Test cases for REST requests."""
+
+    def test_send_request_trims_attributes(self, httpapi):
+        """Test that objects are trimmed while the cache keeps them whole."""
+        httpapi._options["response_cache"] = True
+        payload = {
+            "imdata": [
+                {"l1PhysIf": {"attributes": {"id": "eth1/1", "mtu": "9216"}}},
+            ],
+        }
+        httpapi.connection.send.side_effect = respond_with(payload)
+
+        code, trimmed = httpapi.send_request(
+            "GET",
+            "/api/node/class/l1PhysIf.json",
+            attributes=["id"],
+        )
+        _, whole = httpapi.send_request("GET", "/api/node/class/l1PhysIf.json")
+
+        assert code == 200
+        assert trimmed == {"imdata": [{"l1PhysIf": {"attributes": {"id": "eth1/1"}}}]}
+        assert whole == payload
+        httpapi.connection.send.assert_called_once()
+
+    def test_error_response_not_trimmed(self, httpapi):
+        """Test that error responses are returned as they are."""
+        error = {"imdata": [{"error": {"attributes": {"code": "400", "text": "bad"}}}]}
+        httpapi.connection.send.side_effect = respond_with(error, code=400)
+
+        code, response = httpapi.send_request(
+            "GET",
+            "/api/mo/sys.json",
+            attributes=["dn"],
+        )
+
+        assert (code, response) == (400, error)
+
+    def test_send_request_decodes_json(self, httpapi):
+        """Test that JSON responses are decoded from the response buffer."""
+        response, buffer = make_response({"imdata": [{"topSystem": {}}]})
+        httpapi.connection.send.return_value = (response, buffer)
+
+        code, data = httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert code == 200
+        assert data == {"imdata": [{"topSystem": {}}]}
+        assert buffer.closed
+
+    def test_send_request_appends_params(self, httpapi):
+        """Test that params are appended to a URL that has a query string."""
+        httpapi.connection.send.return_value = make_response({"imdata": []})
+
+        httpapi.send_request(
+            "GET",
+            "/api/node/class/l1PhysIf.json?rsp-prop-include=config-only",
+            params={"page": 1, "page-size": 100, "order-by": None},
+        )
+
+        assert httpapi.connection.send.call_args[0][0] == (
+            "/api/node/class/l1PhysIf.json?rsp-prop-include=config-only"
+            "&page=1&page-size=100"
+        )
+
+    def test_send_request_non_json_response(self, httpapi):
+        """Test that non-JSON responses are returned as text."""
+        httpapi.connection.send.return_value = make_response(
+            None,
+            body=b"not json \xff",
+        )
+
+        code, data = httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert code == 200
+        assert data == "not json \udcff"
+
+    def test_send_request_empty_response(self, httpapi):
+        """Test that an empty body decodes to an empty dict."""
+        httpapi.connection.send.return_value = make_response(None, body=b"")
+
+        assert httpapi.send_request("POST", "/api/mo/sys.json") == (200, {})
+
+
+class TestDmeHttpApiCompression:
+    """Test cases for compressed requests and responses."""
+
+    def test_accept_encoding_negotiated(self, httpapi):
+        """Test that compressed responses are requested by default."""
+        httpapi.connection.send.return_value = make_response({"imdata": []})
+
+        httpapi.send_request("GET", "/api/class/l1PhysIf.json")
+
+        kwargs = httpapi.connection.send.call_args[1]
+        assert kwargs["headers"]["Accept-Encoding"] == "gzip, deflate"
+        assert kwargs["decompress"] is False
+
+    def test_compression_disabled(self, httpapi):
+        """Test that compression can be switched off per host."""
+        httpapi._options["compression"] = False
+        httpapi.connection.send.return_value = make_response({"imdata": []})
+
+        httpapi.send_request("GET", "/api/class/l1PhysIf.json")
+
+        httpapi.connection.send.assert_called_once_with(
+            "/api/class/l1PhysIf.json",
+            b"{}",
+            method="GET",
+            headers=BASE_HEADERS,
+        )
+
+    @pytest.mark.parametrize(
+        "encoding,compress",
+        [
+            ("gzip", gzip.compress),
+            ("deflate", zlib.compress),
+            ("deflate", lambda data: zlib.compress(data)[2:-4]),
+        ],
+    )
+    def test_compressed_response_decoded(self, httpapi, encoding, compress):
+        """Test that gzip, zlib and raw deflate responses are decoded."""
+        payload = {"imdata": [{"l1PhysIf": {"attributes": {"id": "eth1/1"}}}]}
+        httpapi.connection.send.return_value = make_response(
+            None,
+            headers={"Content-Encoding": encoding},
+            body=compress(json.dumps(payload).encode()),
+        )
+
+        assert httpapi.send_request("GET", "/api/class/l1PhysIf.json") == (
+            200,
+            payload,
+        )
+
+    def test_large_request_body_compressed(self, httpapi):
+        """Test that large request bodies are gzip compressed."""
+        httpapi._options["request_compression_threshold"] = 64
+        httpapi.connection.send.return_value = make_response({"imdata": []})
+        config = {"topSystem": {"attributes": {"name": "x" * 128}}}
+
+        httpapi.send_request("POST", "/api/mo/sys.json", data=config)
+
+        args, kwargs = httpapi.connection.send.call_args
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(args[1])) == config
+
+    def test_small_request_body_not_compressed(self, httpapi):
+        """Test that bodies below the threshold are sent as is."""
+        httpapi._options["request_compression_threshold"] = 1024
+        httpapi.connection.send.return_value = make_response({"imdata": []})
+
+        httpapi.send_request("POST", "/api/mo/sys.json", data={"topSystem": {}})
+
+        args, kwargs = httpapi.connection.send.call_args
+        assert "Content-Encoding" not in kwargs["headers"]
+        assert json.loads(args[1]) == {"topSystem": {}}
+
+
+class TestDmeHttpApiRetry:
+    """Test cases for retries and the circuit breaker."""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self):
+        """Skip the backoff delays."""
+        with patch(
+            "ansible_collections.cisco.dme.plugins.httpapi.dme.time.sleep",
+        ) as mock_sleep:
+            yield mock_sleep
+
+    def test_get_retried_on_service_unavailable(self, httpapi, no_sleep):
+        """Test that a 503 is retried until the device answers."""
+        httpapi.connection.send.side_effect = [
+            make_response({"error": "busy"}, code=503),
+            make_response({"error": "busy"}, code=503),
+            make_response({"imdata": []}),
+        ]
+
+        code, data = httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert (code, data) == (200, {"imdata": []})
+        assert httpapi.connection.send.call_count == 3
+        assert no_sleep.call_count == 2
+
+    def test_retry_after_header_honoured(self, httpapi, no_sleep):
+        """Test that the Retry-After interval is used as the delay."""
+        httpapi.connection.send.side_effect = [
+            make_response({}, code=429, headers={"Retry-After": "2"}),
+            make_response({"imdata": []}),
+        ]
+
+        httpapi.send_request("POST", "/api/mo/sys.json", data={"topSystem": {}})
+
+        no_sleep.assert_called_once_with(2.0)
+
+    def test_post_not_retried_on_bad_gateway(self, httpapi):
+        """Test that non-idempotent requests are only retried on 429/503."""
+        httpapi.connection.send.return_value = make_response({}, code=502)
+
+        code, _ = httpapi.send_request("POST", "/api/mo/sys.json", data={"a": 1})
+
+        assert code == 502
+        httpapi.connection.send.assert_called_once()
+
+    def test_get_retried_on_connection_failure(self, httpapi):
+        """Test that a GET is retried when the connection fails."""
+        httpapi.connection.send.side_effect = [
+            AnsibleConnectionFailure("Could not connect"),
+            make_response({"imdata": []}),
+        ]
+
+        assert httpapi.send_request("GET", "/api/mo/sys.json")[0] == 200
+
+    def test_post_not_retried_on_connection_failure(self, httpapi):
+        """Test that a POST is not resent after a connection failure."""
+        httpapi.connection.send.side_effect = AnsibleConnectionFailure("reset")
+
+        with pytest.raises(AnsibleConnectionFailure):
+            httpapi.send_request("POST", "/api/mo/sys.json", data={"a": 1})
+
+        httpapi.connection.send.assert_called_once()
+
+    def test_retries_exhausted(self, httpapi):
+        """Test that the last response is returned once retries run out."""
+        httpapi._options["retries"] = 1
+        httpapi.connection.send.side_effect = respond_with({}, code=503)
+
+        code, _ = httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert code == 503
+        assert httpapi.connection.send.call_count == 2
+
+    @pytest.fixture
+    def clock(self, no_sleep):
+        """Let the skipped backoff delays advance time.time."""
+        now = [1000.0]
+
+        def sleep(delay):
+            now[0] += delay
+
+        no_sleep.side_effect = sleep
+        with patch(
+            "ansible_collections.cisco.dme.plugins.httpapi.dme.time.time",
+            side_effect=lambda: now[0],
+        ):
+            yield now
+
+    def test_retry_stops_at_command_timeout(self, httpapi, no_sleep, clock):
+        """Test that no retry is started past the retry budget."""
+        httpapi.connection.send.side_effect = [
+            make_response({}, code=503, headers={"Retry-After": "20"}),
+            make_response({}, code=503, headers={"Retry-After": "20"}),
+        ]
+
+        code, _ = httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert code == 503
+        assert httpapi.connection.send.call_count == 2
+        no_sleep.assert_called_once_with(20.0)
+
+    def test_retry_budget_follows_command_timeout(self, httpapi, no_sleep, clock):
+        """Test that a longer persistent_command_timeout allows longer waits."""
+        httpapi.connection.get_options.return_value["persistent_command_timeout"] = 120
+        httpapi.connection.send.side_effect = [
+            make_response({}, code=503, headers={"Retry-After": "20"}),
+            make_response({}, code=503, headers={"Retry-After": "20"}),
+            make_response({"imdata": []}),
+        ]
+
+        assert httpapi.send_request("GET", "/api/mo/sys.json")[0] == 200
+        assert no_sleep.call_count == 2
+
+    @pytest.mark.parametrize("code", [500, 502, 504])
+    def test_server_errors_count_as_failures(self, httpapi, code):
+        """Test that a final 5xx of a request that is not retried is a failure."""
+        httpapi.connection.send.side_effect = respond_with({}, code=code)
+
+        httpapi.send_request("POST", "/api/mo/sys.json", data={"a": 1})
+
+        assert httpapi._consecutive_failures == 1
+
+    def test_client_errors_not_counted_as_failures(self, httpapi):
+        """Test that a rejected request does not trip the circuit breaker."""
+        httpapi._consecutive_failures = 2
+        httpapi.connection.send.side_effect = respond_with({}, code=400)
+
+        httpapi.send_request("POST", "/api/mo/sys.json", data={"a": 1})
+
+        assert httpapi._consecutive_failures == 0
+
+    def test_connection_failure_counts_as_failure(self, httpapi):
+        """Test that a connection failure that is not retried is a failure."""
+        httpapi.connection.send.side_effect = AnsibleConnectionFailure("reset")
+
+        with pytest.raises(AnsibleConnectionFailure):
+            httpapi.send_request("POST", "/api/mo/sys.json", data={"a": 1})
+
+        assert httpapi._consecutive_failures == 1
+
+    def test_circuit_breaker_opens(self, httpapi):
+        """Test that the host fails fast after consecutive failures."""
+        httpapi._options.update({"retries": 0, "circuit_breaker_threshold": 2})
+        httpapi.connection.send.side_effect = respond_with({}, code=503)
+
+        httpapi.send_request("GET", "/api/mo/sys.json")
+        httpapi.send_request("GET", "/api/mo/sys.json")
+        with pytest.raises(AnsibleConnectionFailure, match="Circuit breaker open"):
+            httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert httpapi.connection.send.call_count == 2
+
+    def test_circuit_breaker_closes_after_cooldown(self, httpapi):
+        """Test that a successful request after the cooldown closes the breaker."""
+        httpapi._options.update({"retries": 0, "circuit_breaker_threshold": 1})
+        httpapi.connection.send.side_effect = [
+            make_response({}, code=503),
+            make_response({"imdata": []}),
+        ]
+        httpapi.send_request("GET", "/api/mo/sys.json")
+        httpapi._circuit_open_until = time.time() - 1
+
+        assert httpapi.send_request("GET", "/api/mo/sys.json")[0] == 200
+        assert httpapi._circuit_open_until is None
+        assert httpapi._consecutive_failures == 0
+
+
+class TestDmeHttpApiResponseCache:
+    """Test cases for the GET response cache."""
+
+    @pytest.fixture
+    def cached_httpapi(self, httpapi):
+        """Enable the response cache and answer every request with an empty list."""
+        httpapi._options["response_cache"] = True
+        httpapi.connection.send.side_effect = respond_with({"imdata": []})
+        return httpapi
+
+    def test_repeated_get_served_from_cache(self, cached_httpapi):
+        """Test that a repeated GET is not sent to the device again."""
+        first = cached_httpapi.send_request("GET", "/api/mo/sys.json")
+        second = cached_httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert first == second == (200, {"imdata": []})
+        cached_httpapi.connection.send.assert_called_once()
+
+    def test_cache_key_ignores_param_order(self):
+        """Test that query parameters are compared regardless of their order."""
+        assert _ResponseCache.key("/api/mo/sys.json?b=2&a=1") == _ResponseCache.key(
+            "/api/mo/sys.json?a=1&b=2",
+        )
+
+    def test_cache_disabled_by_default(self, httpapi):
+        """Test that GETs are always sent when the cache is disabled."""
+        httpapi.connection.send.side_effect = respond_with({"imdata": []})
+
+        httpapi.send_request("GET", "/api/mo/sys.json")
+        httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert httpapi.connection.send.call_count == 2
+
+    def test_error_responses_not_cached(self, cached_httpapi):
+        """Test that failed GETs are sent again."""
+        cached_httpapi._options["retries"] = 0
+        cached_httpapi.connection.send.side_effect = respond_with({}, code=400)
+
+        cached_httpapi.send_request("GET", "/api/mo/sys.json")
+        cached_httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert cached_httpapi.connection.send.call_count == 2
+
+    def test_entries_expire_after_ttl(self):
+        """Test that an entry is dropped once its TTL passed."""
+        cache = _ResponseCache()
+        with patch(
+            "ansible_collections.cisco.dme.plugins.httpapi.dme.time.time",
+            return_value=1000.0,
+        ):
+            cache.put("/api/mo/sys.json", "value", 10, 30, 100)
+            assert cache.get("/api/mo/sys.json") == "value"
+        with patch(
+            "ansible_collections.cisco.dme.plugins.httpapi.dme.time.time",
+            return_value=1030.0,
+        ):
+            assert cache.get("/api/mo/sys.json") is None
+        assert cache._size == 0
+
+    def test_least_recently_used_evicted_by_size(self):
+        """Test that the least recently used entries make room for new ones."""
+        cache = _ResponseCache()
+        cache.put("/api/mo/a.json", "a", 40, 30, 100)
+        cache.put("/api/mo/b.json", "b", 40, 30, 100)
+        cache.get("/api/mo/a.json")
+        cache.put("/api/mo/c.json", "c", 40, 30, 100)
+
+        assert cache.get("/api/mo/b.json") is None
+        assert cache.get("/api/mo/a.json") == "a"
+        assert cache.get("/api/mo/c.json") == "c"
+        assert cache._size == 80
+
+    def test_oversized_response_not_cached(self):
+        """Test that a response larger than the cache bound is skipped."""
+        cache = _ResponseCache()
+        cache.put("/api/mo/a.json", "a", 40, 30, 100)
+        cache.put("/api/mo/big.json", "big", 101, 30, 100)
+
+        assert cache.get("/api/mo/big.json") is None
+        assert cache.get("/api/mo/a.json") == "a"
+
+    def fill(self, httpapi, urls):
+        for url in urls:
+            httpapi.send_request("GET", url)
+        httpapi.connection.send.reset_mock()
+
+    def cached_urls(self, httpapi, urls):
+        return [url for url in urls if httpapi._response_cache.get(url) is not None]
+
+    def test_post_invalidates_written_subtree(self, cached_httpapi):
+        """Test that a POST evicts the DNs above and under the written object."""
+        urls = [
+            "/api/mo/sys.json",
+            "/api/mo/sys/intf.json",
+            "/api/mo/sys/intf/phys-[eth1/1].json",
+            "/api/mo/sys/intf/phys-[eth1/2].json",
+            "/api/mo/sys/bgp.json",
+            "/api/node/class/l1PhysIf.json",
+            "/api/node/class/bgpInst.json",
+        ]
+        self.fill(cached_httpapi, urls)
+
+        cached_httpapi.send_request(
+            "POST",
+            "/api/mo/sys.json",
+            data={
+                "interfaceEntity": {
+                    "attributes": {"dn": "sys/intf"},
+                    "children": [
+                        {
+                            "l1PhysIf": {
+                                "attributes": {
+                                    "id": "eth1/1",
+                                    "descr": "uplink",
+                                },
+                            },
+                        },
+                    ],
+                },
+            },
+        )
+
+        assert self.cached_urls(cached_httpapi, urls) == ["/api/mo/sys/bgp.json"]
+
+    def test_post_invalidates_classes_not_written(self, cached_httpapi):
+        """Test that a POST evicts class queries of classes it does not name."""
+        urls = [
+            "/api/mo/sys/bgp.json",
+            "/api/node/class/ethpmPhysIf.json",
+        ]
+        self.fill(cached_httpapi, urls)
+
+        # ethpmPhysIf objects live under the written interface
+        cached_httpapi.send_request(
+            "POST",
+            "/api/mo/sys.json",
+            data={
+                "l1PhysIf": {
+                    "attributes": {"dn": "sys/intf/phys-[eth1/1]", "adminSt": "up"},
+                },
+            },
+        )
+
+        assert self.cached_urls(cached_httpapi, urls) == ["/api/mo/sys/bgp.json"]
+
+    def test_post_keeps_sibling_objects(self, cached_httpapi):
+        """Test that a POST naming one object keeps its cached siblings."""
+        urls = [
+            "/api/mo/sys.json",
+            "/api/mo/sys/intf/phys-[eth1/1].json",
+            "/api/mo/sys/intf/phys-[eth1/2].json",
+        ]
+        self.fill(cached_httpapi, urls)
+
+        cached_httpapi.send_request(
+            "POST",
+            "/api/mo/sys.json",
+            data={"l1PhysIf": {"attributes": {"dn": "sys/intf/phys-[eth1/1]"}}},
+        )
+
+        assert self.cached_urls(cached_httpapi, urls) == [
+            "/api/mo/sys/intf/phys-[eth1/2].json",
+        ]
+
+    def test_percent_encoded_dn_invalidated(self, cached_httpapi):
+        """Test that percent-encoded URL DNs match the DNs of the payload."""
+        url = "/api/mo/sys/intf/phys-%5Beth1%2F1%5D.json"
+        self.fill(cached_httpapi, [url])
+
+        cached_httpapi.send_request(
+            "POST",
+            "/api/mo/sys.json",
+            data={"l1PhysIf": {"attributes": {"dn": "sys/intf/phys-[eth1/1]"}}},
+        )
+
+        assert self.cached_urls(cached_httpapi, [url]) == []
+
+    def test_delete_invalidates_url_dn_and_classes(self, cached_httpapi):
+        """Test that a write without payload is scoped to the DN of its URL."""
+        urls = [
+            "/api/mo/sys/intf/phys-[eth1/1].json",
+            "/api/mo/sys/intf/phys-[eth1/2].json",
+            "/api/mo/sys/bgp.json",
+            "/api/node/class/l1PhysIf.json",
+            "/api/node/class/bgpInst.json",
+        ]
+        self.fill(cached_httpapi, urls)
+
+        cached_httpapi.send_request(
+            "DELETE",
+            "/api/mo/sys/intf/phys-%5Beth1%2F1%5D.json",
+        )
+
+        assert self.cached_urls(cached_httpapi, urls) == [
+            "/api/mo/sys/intf/phys-[eth1/2].json",
+            "/api/mo/sys/bgp.json",
+        ]
+
+    def test_empty_post_invalidates_url_dn_and_classes(self, cached_httpapi):
+        """Test that a POST with an empty body evicts its DN and class queries."""
+        urls = [
+            "/api/mo/sys/bgp.json",
+            "/api/mo/sys/intf.json",
+            "/api/node/class/bgpInst.json",
+        ]
+        self.fill(cached_httpapi, urls)
+
+        cached_httpapi.send_request("POST", "/api/mo/sys/bgp.json", data={})
+
+        assert self.cached_urls(cached_httpapi, urls) == ["/api/mo/sys/intf.json"]
+
+    def test_other_writes_clear_cache(self, cached_httpapi):
+        """Test that writes outside the MO API evict everything."""
+        self.fill(cached_httpapi, ["/api/mo/sys.json"])
+
+        cached_httpapi.send_request("POST", "/api/node/class/l1PhysIf.json", data={})
+
+        assert self.cached_urls(cached_httpapi, ["/api/mo/sys.json"]) == []
+
+    def test_login_keeps_cache(self, cached_httpapi):
+        """Test that authentication requests do not evict entries."""
+        self.fill(cached_httpapi, ["/api/mo/sys.json"])
+
+        cached_httpapi.send_request("POST", "/api/aaaRefresh.json", data={})
+
+        assert self.cached_urls(cached_httpapi, ["/api/mo/sys.json"]) == [
+            "/api/mo/sys.json",
+        ]
+
+
+class TestDmeHttpApiSubscriptions:
+    """Test cases for websocket subscriptions of cached queries."""
+
+    CLASS_URL = "/api/node/class/l1PhysIf.json"
+
+    @pytest.fixture
+    def server(self):
+        """Start a stand-in DME event websocket."""
+        server = WebSocketServer().start()
+        yield server
+        server.close()
+
+    @pytest.fixture
+    def subscribed_httpapi(self, httpapi, server):
+        """Enable subscriptions against the stand-in websocket."""
+        httpapi._options.update({"response_cache": True, "subscriptions": True})
+        httpapi.connection.get_options.return_value.update(
+            {"host": "127.0.0.1", "port": server.port, "use_ssl": False},
+        )
+        httpapi._auth_token = "TOKEN"
+        httpapi.connection.send.side_effect = respond_with(
+            {"imdata": [], "totalCount": "0", "subscriptionId": "1001"},
+        )
+        yield httpapi
+        httpapi._close_event_socket()
+
+    def applied_events(self, httpapi):
+        """Return an Event set every time the plugin applied a pushed event."""
+        applied = threading.Event()
+        apply_event = httpapi._apply_event
+
+        def apply_and_signal(event):
+            apply_event(event)
+            applied.set()
+
+        httpapi._apply_event = apply_and_signal
+        return applied
+
+    def test_cached_query_subscribed(self, subscribed_httpapi, server):
+        """Test that cached queries are sent with subscription=yes."""
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+
+        subscribed_httpapi.connection.send.assert_called_once()
+        assert subscribed_httpapi.connection.send.call_args[0][0] == (
+            self.CLASS_URL + "?subscription=yes"
+        )
+        assert server.path == "/socketTOKEN"
+        assert subscribed_httpapi._subscriptions.keys() == {"1001"}
+
+    def test_event_evicts_subscription(self, subscribed_httpapi, server):
+        """Test that a pushed event evicts the entries of its subscription."""
+        applied = self.applied_events(subscribed_httpapi)
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+        assert server.connected.wait(5)
+
+        server.send_text(
+            json.dumps(
+                {
+                    "subscriptionId": ["1001"],
+                    "imdata": [
+                        {
+                            "l1PhysIf": {
+                                "attributes": {
+                                    "dn": "sys/intf/phys-[eth1/1]",
+                                    "status": "modified",
+                                },
+                            },
+                        },
+                    ],
+                },
+            ),
+        )
+        assert applied.wait(5)
+
+        assert subscribed_httpapi._response_cache.get(self.CLASS_URL) is None
+
+    def test_event_evicts_changed_dn(self, subscribed_httpapi, server):
+        """Test that events also evict unsubscribed entries of the changed DN."""
+        applied = self.applied_events(subscribed_httpapi)
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+        assert server.connected.wait(5)
+        subscribed_httpapi._response_cache.put(
+            "/api/mo/sys/intf/phys-[eth1/1].json",
+            (200, {}),
+            2,
+            30,
+            1024,
+        )
+
+        server.send_text(
+            json.dumps(
+                {
+                    "subscriptionId": "2002",
+                    "imdata": [
+                        {"l1PhysIf": {"attributes": {"dn": "sys/intf/phys-[eth1/1]"}}},
+                    ],
+                },
+            ),
+        )
+        assert applied.wait(5)
+
+        cache = subscribed_httpapi._response_cache
+        assert cache.get("/api/mo/sys/intf/phys-[eth1/1].json") is None
+        assert cache.get(self.CLASS_URL) is None
+
+    def test_closed_socket_evicts_subscribed_entries(self, subscribed_httpapi, server):
+        """Test that no subscribed entry outlives the event websocket."""
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+        assert server.connected.wait(5)
+
+        server.close()
+        subscribed_httpapi._event_dispatcher.join(5)
+
+        assert subscribed_httpapi._event_socket.closed
+        assert subscribed_httpapi._response_cache.get(self.CLASS_URL) is None
+
+    def test_subscription_refreshed(self, subscribed_httpapi):
+        """Test that subscriptions half way to expiry are refreshed."""
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+        subscribed_httpapi._subscriptions["1001"] -= 40
+
+        subscribed_httpapi.send_request("GET", "/api/mo/sys.json")
+
+        urls = [
+            call[0][0] for call in subscribed_httpapi.connection.send.call_args_list
+        ]
+        assert "/api/subscriptionRefresh.json?id=1001" in urls
+        assert subscribed_httpapi._subscriptions["1001"] > time.time() - 5
+        assert subscribed_httpapi._response_cache.get(self.CLASS_URL) is not None
+
+    def test_expired_subscription_evicted(self, subscribed_httpapi):
+        """Test that entries of an expired subscription are not served."""
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+        subscribed_httpapi._subscriptions["1001"] -= 90
+
+        subscribed_httpapi.send_request("GET", self.CLASS_URL)
+
+        urls = [
+            call[0][0] for call in subscribed_httpapi.connection.send.call_args_list
+        ]
+        assert "/api/subscriptionRefresh.json?id=1001" not in urls
+        assert len(urls) == 2
+
+    def test_websocket_failure_falls_back_to_ttl(self, httpapi):
+        """Test that queries are cached without subscription when the socket fails."""
+        server = WebSocketServer(accept=False).start()
+        httpapi._options.update({"response_cache": True, "subscriptions": True})
+        httpapi.connection.get_options.return_value.update(
+            {"host": "127.0.0.1", "port": server.port, "use_ssl": False},
+        )
+        httpapi._auth_token = "TOKEN"
+        httpapi.connection.send.side_effect = respond_with({"imdata": []})
+
+        try:
+            httpapi.send_request("GET", self.CLASS_URL)
+        finally:
+            server.close()
+
+        assert httpapi.connection.send.call_args[0][0] == self.CLASS_URL
+        assert httpapi._response_cache.get(self.CLASS_URL) is not None
+        assert "warning" in [
+            call[0][0] for call in httpapi.connection.queue_message.call_args_list
+        ]
+
+
+class TestDmeHttpApiMetrics:
+    """Test cases for per-request metrics."""
+
+    @pytest.fixture
+    def metrics_httpapi(self, httpapi):
+        """Enable metrics."""
+        httpapi._options["metrics"] = True
+        return httpapi
+
+    def test_metrics_disabled_by_default(self, httpapi):
+        """Test that nothing is recorded unless metrics are enabled."""
+        httpapi.connection.send.return_value = make_response({"imdata": []})
+
+        httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert httpapi.pop_metrics() == []
+
+    def test_request_recorded(self, metrics_httpapi):
+        """Test that a request records its sizes and timings."""
+        body = gzip.compress(json.dumps({"imdata": [{"topSystem": {}}]}).encode())
+        metrics_httpapi.connection.send.return_value = make_response(
+            None,
+            headers={"Content-Encoding": "gzip"},
+            body=body,
+        )
+
+        metrics_httpapi.send_request(
+            "GET",
+            "/api/mo/sys.json",
+            params={"rsp-subtree": "full"},
+        )
+
+        (metrics,) = metrics_httpapi.pop_metrics()
+        assert metrics["method"] == "GET"
+        assert metrics["path"] == "/api/mo/sys.json"
+        assert metrics["status"] == 200
+        assert metrics["cached"] is False
+        assert metrics["retries"] == 0
+        assert metrics["request_bytes"] == 2
+        assert metrics["response_bytes"] == len(body)
+        assert 0 < metrics["send_time"] <= metrics["total_time"]
+        assert metrics["decompress_time"] > 0
+        assert metrics["decode_time"] > 0
+        assert metrics_httpapi.pop_metrics() == []
+
+    def test_retries_recorded(self, metrics_httpapi):
+        """Test that retried attempts count into one request."""
+        metrics_httpapi.connection.send.side_effect = [
+            make_response({"error": "busy"}, code=503),
+            make_response({"imdata": []}),
+        ]
+
+        with patch("ansible_collections.cisco.dme.plugins.httpapi.dme.time.sleep"):
+            metrics_httpapi.send_request("GET", "/api/mo/sys.json")
+
+        (metrics,) = metrics_httpapi.pop_metrics()
+        assert metrics["retries"] == 1
+        assert metrics["status"] == 200
+
+    def test_http_error_recorded(self, metrics_httpapi):
+        """Test that requests failing with an HTTP error are recorded."""
+        metrics_httpapi.connection.send.side_effect = HTTPError(
+            "https://test-device.example.com/api/mo/sys.json",
+            404,
+            "Not Found",
+            {},
+            BytesIO(b'{"imdata": []}'),
+        )
+
+        metrics_httpapi.send_request("GET", "/api/mo/sys.json")
+
+        (metrics,) = metrics_httpapi.pop_metrics()
+        assert metrics["status"] == 404
+
+    def test_cache_hit_recorded(self, metrics_httpapi):
+        """Test that responses served from the cache are recorded as cached."""
+        metrics_httpapi._options["response_cache"] = True
+        metrics_httpapi.connection.send.side_effect = respond_with({"imdata": []})
+
+        metrics_httpapi.send_request("GET", "/api/mo/sys.json")
+        metrics_httpapi.send_request("GET", "/api/mo/sys.json")
+
+        sent, cached = metrics_httpapi.pop_metrics()
+        assert sent["cached"] is False
+        assert cached["cached"] is True
+        assert cached["status"] == 200
+        assert cached["response_bytes"] == 0
+
+    def test_validate_request_recorded(self, metrics_httpapi):
+        """Test that JSON-RPC requests are recorded."""
+        metrics_httpapi.connection.send.return_value = make_response(
+            [{"jsonrpc": "2.0", "result": {"msg": "{}"}, "id": 1}],
+        )
+
+        metrics_httpapi.send_validate_request("POST", "/ins", data=[{}])
+
+        (metrics,) = metrics_httpapi.pop_metrics()
+        assert metrics["method"] == "POST"
+        assert metrics["path"] == "/ins"
+        assert metrics["status"] == 200
+        assert metrics["request_bytes"] == 4
+
+
+class TestDmeHttpApiTrace:
+    """Test cases for the JSON lines request trace."""
+
+    @pytest.fixture
+    def trace_file(self, httpapi, tmp_path):
+        """Enable the trace file."""
+        path = tmp_path / "trace.jsonl"
+        httpapi._options["trace_file"] = str(path)
+        return path
+
+    def test_request_traced(self, httpapi, trace_file):
+        """Test that every request appends one line."""
+        httpapi.connection.send.side_effect = respond_with({"imdata": []})
+
+        before = time.time()
+        httpapi.send_request("GET", "/api/mo/sys.json", params={"rsp-subtree": "full"})
+        httpapi.send_request("POST", "/api/mo/sys.json", data={"topSystem": {}})
+
+        lines = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert [line["method"] for line in lines] == ["GET", "POST"]
+        assert lines[0]["host"] == "test-device.example.com"
+        assert lines[0]["path"] == "/api/mo/sys.json"
+        assert lines[0]["params"] == {"rsp-subtree": "full"}
+        assert lines[0]["status"] == 200
+        assert lines[0]["retries"] == 0
+        assert lines[0]["response_bytes"] == len(b'{"imdata": []}')
+        assert before <= lines[0]["time"] <= lines[1]["time"]
+        assert oct(trace_file.stat().st_mode & 0o777) == oct(0o600)
+
+    def test_trace_without_metrics(self, httpapi, trace_file):
+        """Test that tracing does not keep records for dme_metrics."""
+        httpapi.connection.send.side_effect = respond_with({"imdata": []})
+
+        httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert httpapi.pop_metrics() == []
+
+    def test_unwritable_trace_file_warns(self, httpapi, tmp_path):
+        """Test that a trace file that cannot be written does not fail requests."""
+        httpapi._options["trace_file"] = str(tmp_path / "missing" / "trace.jsonl")
+        httpapi.connection.send.side_effect = respond_with({"imdata": []})
+
+        code, _ = httpapi.send_request("GET", "/api/mo/sys.json")
+
+        assert code == 200
+        warnings = [
+            args[1]
+            for args, _ in httpapi.connection.queue_message.call_args_list
+            if args[0] == "warning"
+        ]
+        assert len(warnings) == 1
+        assert warnings[0].startswith("Unable to write DME trace file")
+
+
+class TestDmeHttpApiSendRequests:
+    """Test cases for sending several requests at once."""
+
+    def test_responses_in_request_order(self, httpapi):
+        """Test that every request gets its own response, in request order."""
+        httpapi.connection.send.side_effect = lambda url, *args, **kwargs: (
+            make_response({"url": url})
+        )
+        urls = ["/api/mo/sys/intf/phys-[eth1/{0}].json".format(idx) for idx in range(8)]
+
+        results = httpapi.send_requests(
+            [{"request_method": "GET", "url": url} for url in urls],
+        )
+
+        assert results == [(200, {"url": url}) for url in urls]
+        httpapi.connection._connect.assert_called_once_with()
+
+    def test_requests_overlap_up_to_limit(self, httpapi):
+        """Test that max_concurrent_requests requests are in flight together."""
+        httpapi._options["max_concurrent_requests"] = 2
+        # Every request waits for a second one, which only arrives when two
+        # requests are sent at the same time
+        barrier = threading.Barrier(2, timeout=10)
+        lock = threading.Lock()
+        in_flight = []
+        peak = []
+
+        def send(url, *args, **kwargs):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            barrier.wait()
+            with lock:
+                in_flight.remove(url)
+            return make_response({"imdata": []})
+
+        httpapi.connection.send.side_effect = send
+
+        results = httpapi.send_requests(
+            [
+                {"request_method": "GET", "url": "/api/mo/sys/bd-{0}.json".format(idx)}
+                for idx in range(4)
+            ],
+        )
+
+        assert [code for code, _ in results] == [200] * 4
+        assert max(peak) == 2
+
+    def test_sequential_without_concurrency(self, httpapi):
+        """Test that max_concurrent_requests=1 sends from the calling thread."""
+        httpapi._options["max_concurrent_requests"] = 1
+        threads = []
+
+        def send(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return make_response({"imdata": []})
+
+        httpapi.connection.send.side_effect = send
+
+        httpapi.send_requests(
+            [{"request_method": "GET", "url": "/api/mo/sys.json"}] * 3,
+        )
+
+        assert threads == [threading.current_thread()] * 3
+        httpapi.connection._connect.assert_not_called()
+
+    def test_error_raised_after_all_requests(self, httpapi):
+        """Test that a failed request fails the batch once the others are done."""
+
+        def send(url, *args, **kwargs):
+            if url == "/api/mo/bad.json":
+                raise AnsibleConnectionFailure("connection reset")
+            return make_response({"imdata": []})
+
+        httpapi.connection.send.side_effect = send
+
+        with pytest.raises(AnsibleConnectionFailure, match="connection reset"):
+            httpapi.send_requests(
+                [
+                    {"request_method": "POST", "url": url}
+                    for url in ("/api/mo/a.json", "/api/mo/bad.json", "/api/mo/b.json")
+                ],
+            )
+
+        assert httpapi.connection.send.call_count == 3
+
+    @pytest.fixture
+    def clock(self):
+        """Replace time.time and time.sleep with a clock the test advances."""
+        now = [1000.0]
+
+        def sleep(delay):
+            now[0] += delay
+
+        with patch(
+            "ansible_collections.cisco.dme.plugins.httpapi.dme.time.time",
+            side_effect=lambda: now[0],
+        ), patch(
+            "ansible_collections.cisco.dme.plugins.httpapi.dme.time.sleep",
+            side_effect=sleep,
+        ):
+            yield now
+
+    def test_requests_not_started_late(self, httpapi, clock):
+        """Test that no request starts after half of the call's budget."""
+        httpapi._options["max_concurrent_requests"] = 1
+
+        def send(*args, **kwargs):
+            clock[0] += 5
+            return make_response({"imdata": []})
+
+        httpapi.connection.send.side_effect = send
+
+        results = httpapi.send_requests(
+            [{"request_method": "GET", "url": "/api/mo/sys.json"}] * 4,
+        )
+
+        assert results[:3] == [(200, {"imdata": []})] * 3
+        assert results[3] is None
+        assert httpapi._batch_deadline is None
+
+    def test_retries_share_call_deadline(self, httpapi, clock):
+        """Test that retries stop at the deadline of the whole call."""
+        httpapi._options["max_concurrent_requests"] = 1
+        responses = [
+            make_response({"imdata": []}),
+            make_response({}, code=503, headers={"Retry-After": "20"}),
+        ]
+
+        def send(*args, **kwargs):
+            clock[0] += 10
+            return responses.pop(0)
+
+        httpapi.connection.send.side_effect = send
+
+        results = httpapi.send_requests(
+            [{"request_method": "GET", "url": "/api/mo/sys.json"}] * 2,
+        )
+
+        # Alone, the second request would have had the budget for a retry
+        assert [code for code, _ in results] == [200, 503]
+        assert httpapi.connection.send.call_count == 2
+
+    def test_token_replaced_by_concurrent_request(self, httpapi):
+        """Test that a 401 on a token another request replaced skips the login."""
+        httpapi._request_auth.value = {"Cookie": "APIC-cookie=old"}
+        httpapi.connection._auth = {"Cookie": "APIC-cookie=new"}
+        exc = HTTPError(
+            "https://test-device.example.com",
+            401,
+            "Unauthorized",
+            {},
+            None,
+        )
+
+        assert httpapi.handle_httperror(exc) is True
+
+        httpapi.connection.send.assert_not_called()
+        assert httpapi._request_auth.value is httpapi.connection._auth
+
+
+class TestDmeHttpApiValidate:
+    """Test cases for the JSON-RPC validation transport."""
+
+    def test_validate_uses_connection_send(self, httpapi):
+        """Test that JSON-RPC requests go through the persistent connection."""
+        httpapi.connection.send.return_value = make_response(
+            [
+                {
+                    "jsonrpc": "2.0",
+                    "result": {
+                        "msg": json.dumps(MOCK_VALIDATION_SUCCESS_RESPONSE["dme_data"]),
+                    },
+                    "id": 1,
+                },
+            ],
+        )
+
+        code, response = httpapi.send_validate_request("POST", "/ins", data=[{}])
+
+        assert code == 200
+        assert response["dme_data"] == MOCK_VALIDATION_SUCCESS_RESPONSE["dme_data"]
+        assert response["errors"] == {}
+        httpapi.connection.send.assert_called_once_with(
+            "/ins",
+            b"[{}]",
+            method="POST",
+            headers=dict(JSONRPC_HEADERS, **COMPRESSION_HEADERS),
+            decompress=False,
+        )
+
+    def test_validate_reports_errors(self, httpapi):
+        """Test that failed commands are reported by index."""
+        httpapi.connection.send.return_value = make_response(
+            [
+                {"jsonrpc": "2.0", "error": {"message": "Bad command"}, "id": 1},
+                {"jsonrpc": "2.0", "result": {"msg": "{}"}, "id": 2},
+            ],
+        )
+
+        code, response = httpapi.send_validate_request("POST", "/ins", data=[{}, {}])
+
+        assert code == 200
+        assert response["errors"] == {0: ""}
+
+    def test_validate_http_error_code(self, httpapi):
+        """Test that HTTP error codes are returned to the caller."""
+        httpapi.connection.send.return_value = make_response(
+            {"error": "Unauthorized"},
+            code=401,
+        )
+
+        code, response = httpapi.send_validate_request("POST", "/ins", data=[{}])
+
+        assert code == 401
+        assert response == {"error": "Unauthorized"}
+
+    def test_validate_invalid_response(self, httpapi):
+        """Test that malformed JSON-RPC responses raise."""
+        httpapi.connection.send.return_value = make_response([{"id": 1}])
+
+        with pytest.raises(AnsibleAuthenticationFailure, match="Invalid response"):
+            httpapi.send_validate_request("POST", "/ins", data=[{}])
+
+    def test_validate_does_not_import_requests(self, httpapi):
+        """Test that the JSON-RPC path does not need the requests package."""
+        httpapi.connection.send.return_value = make_response(
+            [{"jsonrpc": "2.0", "result": {"msg": "{}"}, "id": 1}],
+        )
+
+        with patch.dict(sys.modules, {"requests": None}):
+            code, _ = httpapi.send_validate_request("POST", "/ins", data=[{}])
+
+        assert code == 200
+
+
+class TestDmeHttpApiLogin:
+    """Test cases for login, logout and the token cache."""
+
+    @pytest.fixture
+    def cached_httpapi(self, httpapi, tmp_path):
+        """Enable the on-disk token cache in a temporary directory."""
+        httpapi._options.update(
+            {"token_cache": True, "token_cache_dir": str(tmp_path / "tokens")},
+        )
+        return httpapi
+
+    def test_login_sets_cookie(self, httpapi):
+        """Test that login stores the token as the APIC cookie."""
+        httpapi.connection.send.return_value = make_response(MOCK_LOGIN_RESPONSE)
+
+        httpapi.login("admin", "password")
+
+        assert httpapi._auth_token == "test-token-12345"
+        assert httpapi.connection._auth == {"Cookie": "APIC-cookie=test-token-12345"}
+        assert httpapi._token_expires_at > 0
+
+    def test_login_failure(self, httpapi):
+        """Test that a failed login raises an authentication failure."""
+        httpapi.connection.send.return_value = make_response(
+            {"error": {"message": "Authentication failed."}},
+            code=401,
+        )
+
+        with pytest.raises(AnsibleAuthenticationFailure, match="Authentication"):
+            httpapi.login("admin", "wrong")
+
+    def test_token_cache_written_with_private_permissions(self, cached_httpapi):
+        """Test that the cached token file is only readable by the owner."""
+        cached_httpapi.connection.send.return_value = make_response(
+            MOCK_LOGIN_RESPONSE,
+        )
+
+        cached_httpapi.login("admin", "password")
+
+        path = cached_httpapi._token_cache_path("admin")
+        assert os.stat(path).st_mode & 0o777 == 0o600
+        assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+        with open(path) as cache_file:
+            assert json.load(cache_file)["token"] == "test-token-12345"
+
+    def test_token_cache_reused_by_new_connection(
+        self,
+        cached_httpapi,
+        httpapi_connection,
+    ):
+        """Test that a restarted connection reuses the cached token."""
+        cached_httpapi.connection.send.return_value = make_response(
+            MOCK_LOGIN_RESPONSE,
+        )
+        cached_httpapi.login("admin", "password")
+
+        restarted = HttpApi(httpapi_connection)
+        restarted._options = dict(cached_httpapi._options)
+        httpapi_connection.send.reset_mock()
+
+        restarted.login("admin", "password")
+
+        httpapi_connection.send.assert_not_called()
+        assert restarted._auth_token == "test-token-12345"
+        assert restarted._token_from_cache is True
+
+    def test_token_cache_expired_token_ignored(self, cached_httpapi):
+        """Test that an expired cached token triggers a fresh login."""
+        cached_httpapi.connection.send.side_effect = respond_with(
+            MOCK_LOGIN_RESPONSE,
+        )
+        cached_httpapi.login("admin", "password")
+        path = cached_httpapi._token_cache_path("admin")
+        with open(path) as cache_file:
+            cached = json.load(cache_file)
+        cached["expiresAt"] = 0
+        with open(path, "w") as cache_file:
+            json.dump(cached, cache_file)
+        cached_httpapi.connection.send.reset_mock()
+
+        cached_httpapi.login("admin", "password")
+
+        cached_httpapi.connection.send.assert_called_once()
+
+    def test_token_cache_ignores_world_readable_file(self, cached_httpapi):
+        """Test that a token file with loose permissions is not trusted."""
+        cached_httpapi.connection.send.return_value = make_response(
+            MOCK_LOGIN_RESPONSE,
+        )
+        cached_httpapi.login("admin", "password")
+        os.chmod(cached_httpapi._token_cache_path("admin"), 0o644)
+
+        assert cached_httpapi._load_cached_token("admin") is None
+
+    def test_rejected_cached_token_falls_back_to_login(self, cached_httpapi):
+        """Test that a 403 on a cached token discards it and logs in again."""
+        cached_httpapi.connection.send.side_effect = respond_with(
+            MOCK_LOGIN_RESPONSE,
+        )
+        cached_httpapi.login("admin", "password")
+        cached_httpapi.login("admin", "password")
+        assert cached_httpapi._token_from_cache is True
+        cached_httpapi.connection.send.reset_mock()
+
+        exc = HTTPError("https://test-device.example.com", 403, "Forbidden", {}, None)
+        assert cached_httpapi.handle_httperror(exc) is True
+
+        cached_httpapi.connection.send.assert_called_once()
+        assert cached_httpapi._token_from_cache is False
+        assert os.path.exists(cached_httpapi._token_cache_path("admin"))
+
+    def test_forbidden_without_cache_not_retried(self, httpapi):
+        """Test that a 403 on a fresh token is returned to the caller."""
+        httpapi.connection._auth = {"Cookie": "APIC-cookie=token"}
+        exc = HTTPError("https://test-device.example.com", 403, "Forbidden", {}, None)
+
+        assert httpapi.handle_httperror(exc) is exc
+
+    def test_logout_keeps_cached_token_alive(self, cached_httpapi):
+        """Test that logout does not revoke a token shared through the cache."""
+        cached_httpapi.connection._auth = {"Cookie": "APIC-cookie=token"}
+
+        cached_httpapi.logout()
+
+        cached_httpapi.connection.send.assert_not_called()
+        assert cached_httpapi.connection._auth is None
+
+    def test_logout(self, httpapi):
+        """Test that logout revokes the token on the device."""
+        httpapi.connection._auth = {"Cookie": "APIC-cookie=token"}
+        httpapi.connection.send.return_value = make_response({"imdata": []})
+
+        httpapi.logout()
+
+        assert httpapi.connection.send.call_args[0][0] == "/api/aaaLogout.json"
+        assert httpapi.connection._auth is None
+
+
+class TestDmeHttpApiTokenRefresh:
+    """Test cases for proactive token refresh."""
+
+    @pytest.fixture
+    def logged_in(self, httpapi):
+        """Return an HttpApi instance holding a valid login token."""
+        httpapi.connection.send.return_value = make_response(MOCK_LOGIN_RESPONSE)
+        httpapi.login("admin", "password")
+        httpapi.connection.send.reset_mock()
+        return httpapi
+
+    def test_no_refresh_for_fresh_token(self, logged_in):
+        """Test that a token far from expiry is used as is."""
+        logged_in.connection.send.return_value = make_response({"imdata": []})
+
+        logged_in.send_request("GET", "/api/mo/sys.json")
+
+        logged_in.connection.send.assert_called_once()
+
+    def test_refresh_before_expiry(self, logged_in):
+        """Test that an expiring token is renewed through aaaRefresh."""
+        logged_in._token_expires_at = time.time() + 10
+        refreshed = json.loads(json.dumps(MOCK_LOGIN_RESPONSE))
+        refreshed["imdata"][0]["aaaLogin"]["attributes"]["token"] = "refreshed-token"
+        logged_in.connection.send.side_effect = [
+            make_response(refreshed),
+            make_response({"imdata": []}),
+        ]
+
+        code, _ = logged_in.send_request("GET", "/api/mo/sys.json")
+
+        assert code == 200
+        calls = logged_in.connection.send.call_args_list
+        assert calls[0][0][0] == "/api/aaaRefresh.json"
+        assert calls[1][0][0] == "/api/mo/sys.json"
+        assert logged_in.connection._auth == {"Cookie": "APIC-cookie=refreshed-token"}
+        assert logged_in._token_expires_at > time.time() + 60
+
+    def test_expired_token_logs_in_again(self, logged_in):
+        """Test that an already expired token goes through a full login."""
+        logged_in._token_expires_at = time.time() - 1
+        logged_in.connection.send.side_effect = [
+            make_response(MOCK_LOGIN_RESPONSE),
+            make_response({"imdata": []}),
+        ]
+
+        logged_in.send_request("GET", "/api/mo/sys.json")
+
+        calls = logged_in.connection.send.call_args_list
+        assert calls[0][0][0] == "/api/aaaLogin.json"
+        assert calls[1][0][0] == "/api/mo/sys.json"
+
+    def test_failed_refresh_logs_in_again(self, logged_in):
+        """Test that a rejected refresh falls back to a full login."""
+        logged_in._token_expires_at = time.time() + 10
+        logged_in.connection.send.side_effect = [
+            make_response({"error": {"message": "Token expired"}}, code=403),
+            make_response(MOCK_LOGIN_RESPONSE),
+            make_response({"imdata": []}),
+        ]
+
+        logged_in.send_request("GET", "/api/mo/sys.json")
+
+        calls = logged_in.connection.send.call_args_list
+        assert [call[0][0] for call in calls] == [
+            "/api/aaaRefresh.json",
+            "/api/aaaLogin.json",
+            "/api/mo/sys.json",
+        ]
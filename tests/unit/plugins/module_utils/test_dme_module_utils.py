@@ -5,12 +5,38 @@
 
 """Unit tests for module_utils.dme module."""
 
-from unittest.mock import MagicMock, patch
+import importlib.util
+import json
+import os
+import re
+import stat
+import tracemalloc
 
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+
+from ansible.module_utils.connection import ConnectionError
 from ansible_collections.cisco.dme.plugins.module_utils.dme import (
     BASE_HEADERS,
+    DmeObject,
     DmeRequest,
+    DmeSnapshot,
+    connection_vars,
+    count_from_response,
+    dme_attributes,
+    dme_class_names,
+    dme_filter,
+    dme_order_by,
+    filter_and,
     find_dict_in_list,
+    json_backend,
+    json_backends,
+    json_dumps,
+    json_loads,
+    metrics_enabled,
+    parse_filter,
+    project_attributes,
 )
 
 
@@ -109,3 +135,818 @@ class TestDmeRequest:
             assert dme_request.headers == BASE_HEADERS
             assert "validate_certs" in dme_request.not_rest_data_keys
             mock_conn_class.assert_called_once_with(mock_module._socket_path)
+
+    def test_init_with_connection(self):
+        """Test that options are sent when the connection holds other ones."""
+        mock_connection = MagicMock()
+        mock_connection.sync_options.return_value = False
+        task_vars = {"ansible_host": "192.0.2.1", "a": 1}
+        var_options, digest = connection_vars(task_vars)
+
+        dme_request = DmeRequest(connection=mock_connection, task_vars=task_vars)
+
+        assert dme_request.connection == mock_connection
+        assert mock_connection.sync_options.call_args_list == [
+            call(digest),
+            call(digest, var_options={"ansible_host": "192.0.2.1"}),
+        ]
+        mock_connection.load_platform_plugins.assert_not_called()
+
+    def test_init_with_current_connection(self):
+        """Test that nothing is sent when the connection options are current."""
+        mock_connection = MagicMock()
+        mock_connection.sync_options.return_value = True
+
+        DmeRequest(connection=mock_connection, task_vars={"ansible_host": "h"})
+
+        mock_connection.sync_options.assert_called_once()
+        mock_connection.load_platform_plugins.assert_not_called()
+        mock_connection.set_options.assert_not_called()
+
+    def test_init_loads_missing_platform_plugin(self):
+        """Test that the DME plugin is loaded when the connection has none."""
+        mock_connection = MagicMock()
+        mock_connection.sync_options.side_effect = [
+            ConnectionError("'Connection' object has no attribute 'sync_options'"),
+            True,
+        ]
+        var_options, digest = connection_vars({"ansible_host": "h"})
+
+        DmeRequest(connection=mock_connection, task_vars={"ansible_host": "h"})
+
+        mock_connection.load_platform_plugins.assert_called_once_with("cisco.dme.dme")
+        mock_connection.sync_options.assert_called_with(
+            digest,
+            var_options=var_options,
+        )
+
+    def test_connection_vars(self):
+        """Test that only variables configuring the connection are selected."""
+        task_vars = {
+            "inventory_hostname": "switch1",
+            "ansible_host": "192.0.2.1",
+            "ansible_httpapi_dme_response_cache": True,
+            "ansible_play_hosts": ["switch{0}".format(i) for i in range(500)],
+            "ansible_facts": {"a": 1},
+            "hostvars": {"switch1": {}},
+            "interfaces": ["eth1/1"],
+        }
+
+        var_options, digest = connection_vars(task_vars)
+
+        assert var_options == {
+            "inventory_hostname": "switch1",
+            "ansible_host": "192.0.2.1",
+            "ansible_httpapi_dme_response_cache": True,
+        }
+        assert digest == connection_vars(dict(reversed(list(task_vars.items()))))[1]
+        assert digest != connection_vars(dict(task_vars, ansible_host="h"))[1]
+
+
+def class_page(count, start=0, total=None):
+    """Build a class query response holding count l1PhysIf objects."""
+    return {
+        "imdata": [
+            {"l1PhysIf": {"attributes": {"dn": f"sys/intf/phys-[eth1/{i}]"}}}
+            for i in range(start, start + count)
+        ],
+        "totalCount": str(total if total is not None else count),
+    }
+
+
+class TestDmeRequestPagination:
+    """Test cases for DmeRequest.get_pages."""
+
+    @pytest.fixture
+    def dme_request(self):
+        """Create a DmeRequest bound to a mock connection."""
+        return DmeRequest(connection=MagicMock())
+
+    def test_get_pages_yields_each_page(self, dme_request):
+        """Test that pages are requested until the class is exhausted."""
+        dme_request.connection.send_request.side_effect = [
+            (200, class_page(2, 0, total=5)),
+            (200, class_page(2, 2, total=5)),
+            (200, class_page(1, 4, total=5)),
+        ]
+
+        pages = list(
+            dme_request.get_pages("/api/node/class/l1PhysIf.json", 2, "l1PhysIf.dn"),
+        )
+
+        assert [code for code, _ in pages] == [200, 200, 200]
+        assert [len(page["imdata"]) for _, page in pages] == [2, 2, 1]
+        calls = dme_request.connection.send_request.call_args_list
+        assert [call[1]["params"]["page"] for call in calls] == [0, 1, 2]
+        assert calls[0][1]["params"] == {
+            "order-by": "l1PhysIf.dn",
+            "page": 0,
+            "page-size": 2,
+        }
+
+    def test_get_pages_stops_at_total_count(self, dme_request):
+        """Test that no empty trailing page is requested."""
+        dme_request.connection.send_request.side_effect = [
+            (200, class_page(2, 0, total=4)),
+            (200, class_page(2, 2, total=4)),
+        ]
+
+        pages = list(
+            dme_request.get_pages("/api/node/class/l1PhysIf.json", 2, "l1PhysIf.dn"),
+        )
+
+        assert len(pages) == 2
+        assert dme_request.connection.send_request.call_count == 2
+
+    def test_get_pages_max_objects(self, dme_request):
+        """Test that max_objects truncates the last page and stops early."""
+        dme_request.connection.send_request.side_effect = [
+            (200, class_page(2, 0, total=10)),
+            (200, class_page(2, 2, total=10)),
+        ]
+
+        pages = list(
+            dme_request.get_pages(
+                "/api/node/class/l1PhysIf.json",
+                2,
+                "l1PhysIf.dn",
+                max_objects=3,
+            ),
+        )
+
+        assert [len(page["imdata"]) for _, page in pages] == [2, 1]
+        assert pages[-1][1]["totalCount"] == "10"
+        assert dme_request.connection.send_request.call_count == 2
+
+    def test_get_pages_is_lazy(self, dme_request):
+        """Test that pages are only fetched as the generator is consumed."""
+        dme_request.connection.send_request.return_value = (
+            200,
+            class_page(2, 0, total=100),
+        )
+
+        pages = dme_request.get_pages(
+            "/api/node/class/l1PhysIf.json",
+            2,
+            "l1PhysIf.dn",
+        )
+        dme_request.connection.send_request.assert_not_called()
+
+        next(pages)
+        assert dme_request.connection.send_request.call_count == 1
+
+    def test_get_pages_http_error(self, dme_request):
+        """Test that a failing page is yielded and ends the iteration."""
+        dme_request.connection.send_request.side_effect = [
+            (200, class_page(2, 0, total=6)),
+            (503, {"error": "busy"}),
+        ]
+
+        pages = list(
+            dme_request.get_pages(
+                "/api/node/class/l1PhysIf.json",
+                2,
+                "l1PhysIf.dn",
+            ),
+        )
+
+        assert pages[-1] == (503, {"error": "busy"})
+        assert len(pages) == 2
+        assert dme_request.connection.send_request.call_count == 2
+
+    def test_get_pages_with_module(self, mock_module):
+        """Test that pages are plain responses when used from a module."""
+        with patch(
+            "ansible_collections.cisco.dme.plugins.module_utils.dme.Connection",
+        ) as mock_conn_class:
+            mock_conn_class.return_value.send_request.side_effect = [
+                (200, class_page(2, 0, total=3)),
+                (200, class_page(1, 2, total=3)),
+            ]
+            dme_request = DmeRequest(module=mock_module)
+
+            pages = list(
+                dme_request.get_pages(
+                    "/api/node/class/l1PhysIf.json",
+                    2,
+                    "l1PhysIf.dn",
+                ),
+            )
+
+        assert [len(page["imdata"]) for page in pages] == [2, 1]
+
+
+def interface(name, mod_ts):
+    """Build an l1PhysIf imdata entry."""
+    return {
+        "l1PhysIf": {
+            "attributes": {"dn": f"sys/intf/phys-[{name}]", "modTs": mod_ts},
+        },
+    }
+
+
+class TestDmeObject:
+    """Test cases for DmeObject."""
+
+    def test_round_trip(self):
+        """Test that an object converts back to the imdata entry."""
+        entry = {
+            "l1PhysIf": {
+                "attributes": {"dn": "sys/intf/phys-[eth1/1]", "adminSt": "up"},
+                "children": [
+                    {"ethpmPhysIf": {"attributes": {"operSt": "down"}}},
+                ],
+            },
+        }
+
+        mo = DmeObject.from_dict(entry)
+
+        assert mo.class_name == "l1PhysIf"
+        assert mo.dn == "sys/intf/phys-[eth1/1]"
+        assert mo.get("adminSt") == "up"
+        assert mo.get("missing", "none") == "none"
+        assert mo.to_dict() == entry
+        assert len(mo.children) == 1
+        assert mo.to_dict() == entry
+
+    def test_names_shared(self):
+        """Test that objects with the same attributes share their names."""
+        first, second = DmeObject.from_imdata(
+            json.loads(
+                json.dumps(
+                    [interface("eth1/1", "never"), interface("eth1/2", "never")]
+                ),
+            ),
+        )
+
+        assert first._index is second._index
+        assert first.get("modTs") is second.get("modTs")
+        assert first.class_name is second.class_name
+
+    def test_children_converted_on_access(self):
+        """Test that children stay as returned until they are accessed."""
+        child = {"ethpmPhysIf": {"attributes": {"operSt": "up"}}}
+        mo = DmeObject("l1PhysIf", {"dn": "sys/intf/phys-[eth1/1]"}, [child])
+
+        assert mo._children[0] is child
+        (converted,) = mo.children
+        assert isinstance(converted, DmeObject)
+        assert mo.children[0] is converted
+
+    def test_walk(self):
+        """Test that walk yields the subtree depth first."""
+        mo = DmeObject.from_dict(
+            {
+                "topSystem": {
+                    "attributes": {"dn": "sys"},
+                    "children": [
+                        {
+                            "interfaceEntity": {
+                                "attributes": {"dn": "sys/intf"},
+                                "children": [interface("eth1/1", "never")],
+                            },
+                        },
+                        interface("eth1/2", "never"),
+                    ],
+                },
+            },
+        )
+
+        assert [child.dn for child in mo.walk()] == [
+            "sys",
+            "sys/intf",
+            "sys/intf/phys-[eth1/1]",
+            "sys/intf/phys-[eth1/2]",
+        ]
+        assert len(list(mo.walk("l1PhysIf"))) == 2
+
+    def test_from_imdata_skips_errors(self):
+        """Test that errors and malformed entries are skipped."""
+        objects = DmeObject.from_imdata(
+            [
+                {"error": {"attributes": {"code": "400"}}},
+                {"a": {}, "b": {}},
+                interface("eth1/1", "never"),
+            ],
+        )
+
+        assert [mo.class_name for mo in objects] == ["l1PhysIf"]
+
+    def test_from_dict_invalid(self):
+        """Test that entries other than one object are rejected."""
+        with pytest.raises(ValueError):
+            DmeObject.from_dict({"l1PhysIf": "up"})
+
+    def test_smaller_than_dicts(self):
+        """Test that objects take a fraction of the memory of the dicts."""
+        document = json.dumps(
+            [
+                {
+                    "l1PhysIf": {
+                        "attributes": dict(
+                            ("attr{0}".format(idx), "up" if idx % 2 else str(idx))
+                            for idx in range(40)
+                        ),
+                    },
+                }
+                for _ in range(1000)
+            ],
+        )
+
+        tracemalloc.start()
+        try:
+            imdata = json.loads(document)
+            as_dicts = tracemalloc.get_traced_memory()[0]
+            objects = DmeObject.from_imdata(imdata)
+            del imdata
+            as_objects = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+        assert len(objects) == 1000
+        assert as_objects < as_dicts / 2
+
+
+class TestDmeSnapshot:
+    """Test cases for DmeSnapshot."""
+
+    def test_merge_tracks_newest_mod_ts(self, tmp_path):
+        """Test that the mark is the newest modTs of the merged objects."""
+        snapshot = DmeSnapshot(str(tmp_path / "snap.json"))
+
+        merged = snapshot.merge(
+            [
+                interface("eth1/1", "2025-09-22T15:08:12.420+00:00"),
+                interface("eth1/2", "2025-09-23T08:00:00.000+00:00"),
+                interface("eth1/3", "never"),
+            ],
+        )
+
+        assert merged == 3
+        assert snapshot.mark == "2025-09-23T08:00:00.000+00:00"
+        assert snapshot.query_filter("l1PhysIf") == (
+            'ge(l1PhysIf.modTs,"2025-09-23T08:00:00.000+00:00")'
+        )
+
+    def test_merge_replaces_changed_objects(self, tmp_path):
+        """Test that objects are replaced by DN."""
+        snapshot = DmeSnapshot(str(tmp_path / "snap.json"))
+        snapshot.merge([interface("eth1/1", "2025-01-01T00:00:00.000+00:00")])
+
+        snapshot.merge([interface("eth1/1", "2025-02-01T00:00:00.000+00:00")])
+
+        assert snapshot.imdata == [interface("eth1/1", "2025-02-01T00:00:00.000+00:00")]
+
+    def test_empty_snapshot_has_no_filter(self, tmp_path):
+        """Test that a missing snapshot requests a full fetch."""
+        snapshot = DmeSnapshot.load(str(tmp_path / "missing.json"))
+
+        assert snapshot.objects == {}
+        assert snapshot.query_filter("l1PhysIf") is None
+
+    def test_save_and_load(self, tmp_path):
+        """Test that a saved snapshot is loaded back."""
+        path = str(tmp_path / "dir" / "snap.json")
+        snapshot = DmeSnapshot(path)
+        snapshot.merge([interface("eth1/1", "2025-01-01T00:00:00.000+00:00")])
+        snapshot.save()
+
+        loaded = DmeSnapshot.load(path)
+
+        assert loaded.mark == snapshot.mark
+        assert loaded.imdata == snapshot.imdata
+        assert isinstance(loaded.objects["sys/intf/phys-[eth1/1]"], DmeObject)
+
+    def test_saved_one_object_per_line(self, tmp_path):
+        """Test that the mark and every object are written on their own line."""
+        path = tmp_path / "snap.json"
+        snapshot = DmeSnapshot(str(path))
+        snapshot.merge(
+            [
+                interface("eth1/1", "2025-01-01T00:00:00.000+00:00"),
+                interface("eth1/2", "2025-01-02T00:00:00.000+00:00"),
+            ],
+        )
+
+        snapshot.save()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert lines == [
+            {"mark": "2025-01-02T00:00:00.000+00:00"},
+            interface("eth1/1", "2025-01-01T00:00:00.000+00:00"),
+            interface("eth1/2", "2025-01-02T00:00:00.000+00:00"),
+        ]
+
+    def test_load_single_document(self, tmp_path):
+        """Test that snapshots saved as one JSON document are still loaded."""
+        path = tmp_path / "snap.json"
+        entry = interface("eth1/1", "2025-01-01T00:00:00.000+00:00")
+        path.write_text(
+            json.dumps(
+                {
+                    "mark": "2025-01-01T00:00:00.000+00:00",
+                    "objects": {"sys/intf/phys-[eth1/1]": entry},
+                },
+            ),
+        )
+
+        loaded = DmeSnapshot.load(str(path))
+
+        assert loaded.mark == "2025-01-01T00:00:00.000+00:00"
+        assert loaded.imdata == [entry]
+
+    def test_saved_for_user_only(self, tmp_path):
+        """Test that the snapshot directory and file are private to the user."""
+        path = tmp_path / "dir" / "snap.json"
+        snapshot = DmeSnapshot(str(path))
+        snapshot.merge([interface("eth1/1", "2025-01-01T00:00:00.000+00:00")])
+
+        snapshot.save()
+
+        assert stat.S_IMODE(os.stat(str(path.parent)).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o600
+
+    def test_corrupt_snapshot_ignored(self, tmp_path):
+        """Test that an unreadable snapshot starts over."""
+        path = tmp_path / "snap.json"
+        path.write_text("{not json")
+
+        assert DmeSnapshot.load(str(path)).mark is None
+
+
+class TestDmeRequestCount:
+    """Test cases for DmeRequest.get_count."""
+
+    def test_count_from_response(self):
+        """Test reading the count of a count query."""
+        response = {"imdata": [{"moCount": {"attributes": {"count": "42"}}}]}
+
+        assert count_from_response(response) == 42
+        assert count_from_response({"imdata": []}) is None
+
+    def test_get_count(self):
+        """Test that the count query adds rsp-subtree-include=count."""
+        dme_request = DmeRequest(connection=MagicMock())
+        dme_request.connection.send_request.return_value = (
+            200,
+            {"imdata": [{"moCount": {"attributes": {"count": "7"}}}]},
+        )
+
+        assert dme_request.get_count(
+            "/api/node/class/l1PhysIf.json",
+            params={"query-target-filter": 'eq(l1PhysIf.adminSt,"down")'},
+        ) == (200, 7)
+        assert dme_request.connection.send_request.call_args[1]["params"] == {
+            "query-target-filter": 'eq(l1PhysIf.adminSt,"down")',
+            "rsp-subtree-include": "count",
+        }
+
+    def test_get_count_http_error(self):
+        """Test that an error response is returned with its code."""
+        dme_request = DmeRequest(connection=MagicMock())
+        dme_request.connection.send_request.return_value = (400, {"error": "bad"})
+
+        assert dme_request.get_count("/api/node/class/foo.json") == (
+            400,
+            {"error": "bad"},
+        )
+
+    def test_get_count_without_count(self):
+        """Test that a response without a count is rejected."""
+        dme_request = DmeRequest(connection=MagicMock())
+        dme_request.connection.send_request.return_value = (200, {"imdata": []})
+
+        with pytest.raises(ValueError, match="No object count"):
+            dme_request.get_count("/api/node/class/l1PhysIf.json")
+
+
+class TestDmeFilter:
+    """Test cases for building and validating DME query options."""
+
+    def test_dme_filter_from_dictionary(self):
+        """Test that nested expressions are rendered in DME syntax."""
+        expression = {
+            "and": [
+                {"eq": ["l1PhysIf.adminSt", "up"]},
+                {
+                    "or": [
+                        {"gt": ["l1PhysIf.mtu", 1500]},
+                        {"wcard": ["l1PhysIf.descr", "^up"]},
+                    ],
+                },
+                {"not": {"bw": ["l1PhysIf.speed", "1000", "10000"]}},
+            ],
+        }
+
+        assert dme_filter(expression) == (
+            'and(eq(l1PhysIf.adminSt,"up"),'
+            'or(gt(l1PhysIf.mtu,"1500"),wcard(l1PhysIf.descr,"^up")),'
+            'not(bw(l1PhysIf.speed,"1000","10000")))'
+        )
+
+    def test_dme_filter_from_string(self):
+        """Test that filter strings are parsed and normalized."""
+        text = 'or( eq(l2BD.id,"100"), ne(l2BD.name, "vlan 200") )'
+
+        assert parse_filter(text) == {
+            "or": [{"eq": ["l2BD.id", "100"]}, {"ne": ["l2BD.name", "vlan 200"]}],
+        }
+        assert dme_filter(text) == 'or(eq(l2BD.id,"100"),ne(l2BD.name,"vlan 200"))'
+
+    @pytest.mark.parametrize(
+        "expression, message",
+        [
+            ({"like": ["l1PhysIf.id", "x"]}, "Unknown filter operator"),
+            ({"eq": ["l1PhysIf", "up"]}, "Invalid filter property"),
+            ({"eq": ["l1PhysIf.id"]}, "takes a list of a class property and 1 value"),
+            ({"bw": ["l1PhysIf.mtu", 1]}, "and 2 values"),
+            ({"eq": ["l1PhysIf.id", True]}, "quote values"),
+            ({"eq": ["l1PhysIf.id", 'a"b']}, "double quotes"),
+            ({"and": []}, "takes a list of filter expressions"),
+            ({"eq": ["a.b", "1"], "ne": ["a.b", "2"]}, "one operator"),
+            ('eq(l1PhysIf.id,"a"', "expected )"),
+            ('eq(l1PhysIf.id,"a"))', "Unexpected text"),
+            ("eq(l1PhysIf.id,up)", "expected string"),
+            ('eq(l1PhysIf.id;"a")', "Invalid filter expression"),
+        ],
+    )
+    def test_dme_filter_invalid(self, expression, message):
+        """Test that invalid expressions are rejected."""
+        with pytest.raises(ValueError, match=re.escape(message)):
+            dme_filter(expression)
+
+    def test_filter_and(self):
+        """Test combining optional filters."""
+        assert filter_and(None, None) is None
+        assert filter_and('eq(a.b,"1")', None) == 'eq(a.b,"1")'
+        assert filter_and('eq(a.b,"1")', 'ge(a.c,"2")') == (
+            'and(eq(a.b,"1"),ge(a.c,"2"))'
+        )
+
+    def test_dme_order_by(self):
+        """Test validating order-by."""
+        assert dme_order_by("l1PhysIf.id|desc, l1PhysIf.mtu") == (
+            "l1PhysIf.id|desc,l1PhysIf.mtu"
+        )
+        with pytest.raises(ValueError, match="Invalid order_by"):
+            dme_order_by("l1PhysIf.id desc")
+
+    def test_dme_class_names(self):
+        """Test validating class name lists."""
+        assert dme_class_names(["l1PhysIf", "ethpmPhysIf"]) == "l1PhysIf,ethpmPhysIf"
+        assert dme_class_names("l1PhysIf, l3Inst") == "l1PhysIf,l3Inst"
+        with pytest.raises(ValueError, match="Invalid DME class name"):
+            dme_class_names(["sys/intf"])
+
+
+class TestProjectAttributes:
+    """Test cases for trimming DME objects to attributes."""
+
+    RESPONSE = {
+        "totalCount": "1",
+        "imdata": [
+            {
+                "l1PhysIf": {
+                    "attributes": {"dn": "sys/intf/phys-[eth1/1]", "id": "eth1/1"},
+                    "children": [
+                        {
+                            "ethpmPhysIf": {
+                                "attributes": {"operSt": "up", "operSpeed": "10G"},
+                            },
+                        },
+                        {"rmonIfIn": {"attributes": {"ucastPkts": "42"}}},
+                    ],
+                },
+            },
+        ],
+    }
+
+    def test_project_attributes(self):
+        """Test that plain names apply to all objects, qualified names to one class."""
+        projected = project_attributes(self.RESPONSE, ["id", "ethpmPhysIf.operSt"])
+
+        assert projected == {
+            "totalCount": "1",
+            "imdata": [
+                {
+                    "l1PhysIf": {
+                        "attributes": {"id": "eth1/1"},
+                        "children": [
+                            {"ethpmPhysIf": {"attributes": {"operSt": "up"}}},
+                            {"rmonIfIn": {"attributes": {}}},
+                        ],
+                    },
+                },
+            ],
+        }
+        assert self.RESPONSE["imdata"][0]["l1PhysIf"]["attributes"]["dn"]
+
+    def test_errors_and_other_responses_kept(self):
+        """Test that only DME objects are trimmed."""
+        error = {"imdata": [{"error": {"attributes": {"text": "bad"}}}]}
+
+        assert project_attributes(error, ["dn"]) == error
+        assert project_attributes("text", ["dn"]) == "text"
+
+    def test_dme_attributes(self):
+        """Test validating attribute names."""
+        assert dme_attributes(["dn", " l1PhysIf.id"]) == ["dn", "l1PhysIf.id"]
+        with pytest.raises(ValueError, match="Invalid attribute"):
+            dme_attributes(["a.b.c"])
+
+
+class TestDmeRequestGetMany:
+    """Test cases for DmeRequest.get_many."""
+
+    def test_get_many(self):
+        """Test that all requests go to the connection in one call."""
+        dme_request = DmeRequest(connection=MagicMock())
+        dme_request.connection.send_requests.return_value = [
+            [200, {"imdata": [{"topSystem": {}}]}],
+            [404, {"imdata": [{"error": {}}]}],
+        ]
+
+        responses = dme_request.get_many(
+            [
+                ("/api/mo/sys.json", None),
+                ("/api/node/class/l1PhysIf.json", {"rsp-prop-include": "config-only"}),
+            ],
+        )
+
+        assert responses == [
+            (200, {"imdata": [{"topSystem": {}}]}),
+            (404, {"imdata": [{"error": {}}]}),
+        ]
+        dme_request.connection.send_requests.assert_called_once_with(
+            [
+                {"request_method": "GET", "url": "/api/mo/sys.json", "params": None},
+                {
+                    "request_method": "GET",
+                    "url": "/api/node/class/l1PhysIf.json",
+                    "params": {"rsp-prop-include": "config-only"},
+                },
+            ],
+        )
+        assert dme_request._rpc_calls == 1
+
+    def test_get_many_with_attributes(self):
+        """Test that attributes are passed on for the connection to trim."""
+        dme_request = DmeRequest(connection=MagicMock())
+        dme_request.connection.send_requests.return_value = [[200, {"imdata": []}]]
+
+        dme_request.get_many([("/api/mo/sys.json", None, ["dn", "name"])])
+
+        dme_request.connection.send_requests.assert_called_once_with(
+            [
+                {
+                    "request_method": "GET",
+                    "url": "/api/mo/sys.json",
+                    "params": None,
+                    "attributes": ["dn", "name"],
+                },
+            ],
+        )
+
+    def test_get_many_resends_requests_not_sent(self):
+        """Test that requests the connection had no time for go in another call."""
+        dme_request = DmeRequest(connection=MagicMock())
+        dme_request.connection.send_requests.side_effect = [
+            [[200, {"url": "a"}], None, None],
+            [[200, {"url": "b"}], [200, {"url": "c"}]],
+        ]
+
+        responses = dme_request.get_many(
+            [
+                (url, None)
+                for url in ("/api/mo/a.json", "/api/mo/b.json", "/api/mo/c.json")
+            ],
+        )
+
+        assert responses == [(200, {"url": url}) for url in ("a", "b", "c")]
+        second_call = dme_request.connection.send_requests.call_args_list[1]
+        assert [request["url"] for request in second_call[0][0]] == [
+            "/api/mo/b.json",
+            "/api/mo/c.json",
+        ]
+        assert dme_request._rpc_calls == 2
+
+    def test_get_many_without_requests(self):
+        """Test that an empty batch does not call the connection."""
+        dme_request = DmeRequest(connection=MagicMock())
+
+        assert dme_request.get_many([]) == []
+        dme_request.connection.send_requests.assert_not_called()
+
+    def test_get_many_connection_error(self):
+        """Test that connection errors name the size of the batch."""
+        dme_request = DmeRequest(connection=MagicMock())
+        dme_request.connection.send_requests.side_effect = ConnectionError("reset")
+
+        with pytest.raises(ConnectionError, match="calling GET on 2 URLs: reset"):
+            dme_request.get_many([("/api/mo/a.json", None), ("/api/mo/b.json", None)])
+
+
+class TestDmeRequestMetrics:
+    """Test cases for collecting request metrics."""
+
+    @pytest.fixture(autouse=True)
+    def no_metrics_env(self, monkeypatch):
+        """Run without ANSIBLE_DME_METRICS from the environment."""
+        monkeypatch.delenv("ANSIBLE_DME_METRICS", raising=False)
+
+    @pytest.mark.parametrize(
+        "task_vars, env, expected",
+        [
+            ({}, None, False),
+            ({"ansible_httpapi_dme_metrics": True}, None, True),
+            ({"ansible_httpapi_dme_metrics": "yes"}, None, True),
+            ({}, "true", True),
+            ({"ansible_httpapi_dme_metrics": False}, "true", False),
+        ],
+    )
+    def test_metrics_enabled(self, monkeypatch, task_vars, env, expected):
+        """Test that the variable takes precedence over the environment."""
+        if env is not None:
+            monkeypatch.setenv("ANSIBLE_DME_METRICS", env)
+
+        assert metrics_enabled(task_vars) is expected
+
+    def test_metrics_disabled(self):
+        """Test that the connection is not asked for metrics by default."""
+        dme_request = DmeRequest(connection=MagicMock(), task_vars={})
+
+        assert dme_request.metrics() is None
+        dme_request.connection.pop_metrics.assert_not_called()
+
+    def test_metrics_collected(self):
+        """Test that connection metrics are returned with the RPC timings."""
+        connection = MagicMock()
+        connection.send_request.return_value = (200, {"imdata": []})
+        connection.send_validate_request.return_value = (200, {"dme_data": {}})
+        connection.pop_metrics.return_value = [{"path": "/api/mo/sys.json"}]
+        dme_request = DmeRequest(
+            connection=connection,
+            task_vars={"ansible_httpapi_dme_metrics": True},
+        )
+
+        dme_request.get("/api/mo/sys.json")
+        dme_request.rpc_get("/ins")
+        metrics = dme_request.metrics()
+
+        assert metrics["requests"] == [{"path": "/api/mo/sys.json"}]
+        assert metrics["rpc_calls"] == 2
+        assert metrics["rpc_time"] > 0
+
+
+class TestJsonBackends:
+    """Test cases for the JSON encode and decode helpers."""
+
+    DOCUMENT = {
+        "imdata": [
+            {
+                "l1PhysIf": {
+                    "attributes": {"dn": "sys/intf/phys-[eth1/1]", "descr": "ünïcode"},
+                    "children": [],
+                },
+            },
+        ],
+        "totalCount": "1",
+    }
+
+    @pytest.mark.parametrize("backend", sorted(json_backends()))
+    def test_backend_round_trip(self, backend):
+        """Test that every available backend produces and reads the same JSON."""
+        loads, dumps = json_backends()[backend]
+
+        encoded = dumps(self.DOCUMENT)
+
+        assert isinstance(encoded, bytes)
+        assert b"sys/intf/phys-[eth1/1]" in encoded
+        assert loads(encoded) == self.DOCUMENT
+        assert loads(encoded.decode("utf-8")) == self.DOCUMENT
+
+    def test_fastest_backend_selected(self):
+        """Test that the fastest importable backend is used."""
+        expected = next(
+            (
+                name
+                for name in ("orjson", "ujson")
+                if importlib.util.find_spec(name) is not None
+            ),
+            "json",
+        )
+
+        assert json_backend() == expected
+
+    def test_loads_lone_surrogates(self):
+        """Test that text the fast backends reject is decoded by the stdlib."""
+        assert json_loads('{"descr": "\udcff"}') == {"descr": "\udcff"}
+
+    def test_loads_invalid_json(self):
+        """Test that invalid JSON raises ValueError."""
+        with pytest.raises(ValueError):
+            json_loads("not json")
+
+    def test_dumps_integer_keys(self):
+        """Test that documents the fast backend cannot encode still encode."""
+        assert json_loads(json_dumps({1: "a"})) == {"1": "a"}
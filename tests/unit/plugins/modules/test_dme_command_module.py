@@ -6,6 +6,9 @@
 """Unit tests for modules.dme_command module."""
 
 import pytest
+from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
+    AnsibleArgSpecValidator,
+)
 from ansible_collections.cisco.dme.plugins.modules import dme_command
 
 
@@ -167,3 +170,15 @@ class TestDmeCommandModule:
         # Check for realistic response options
         assert "config-only" in examples
         assert "full" in examples
+
+    def test_argument_spec_matches_documentation(self):
+        """Test that ARGUMENT_SPEC is the argspec DOCUMENTATION describes."""
+        aav = AnsibleArgSpecValidator(
+            data={},
+            schema=dme_command.DOCUMENTATION,
+            schema_format="doc",
+            name="dme_command",
+        )
+        aav._convert_doc_to_schema()
+
+        assert dme_command.ARGUMENT_SPEC == aav._schema["argument_spec"]
@@ -6,6 +6,9 @@
 """Unit tests for modules.dme_config module."""
 
 import pytest
+from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
+    AnsibleArgSpecValidator,
+)
 from ansible_collections.cisco.dme.plugins.modules import dme_config
 
 
@@ -193,3 +196,15 @@ class TestDmeConfigModule:
         assert "configuration" in description.lower()
         assert "dme" in description.lower()
         assert "model" in description.lower()
+
+    def test_argument_spec_matches_documentation(self):
+        """Test that ARGUMENT_SPEC is the argspec DOCUMENTATION describes."""
+        aav = AnsibleArgSpecValidator(
+            data={},
+            schema=dme_config.DOCUMENTATION,
+            schema_format="doc",
+            name="dme_config",
+        )
+        aav._convert_doc_to_schema()
+
+        assert dme_config.ARGUMENT_SPEC == aav._schema["argument_spec"]
@@ -6,6 +6,9 @@
 """Unit tests for modules.dme_validate module."""
 
 import pytest
+from ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate import (
+    AnsibleArgSpecValidator,
+)
 from ansible_collections.cisco.dme.plugins.modules import dme_validate
 
 
@@ -259,3 +262,15 @@ class TestDmeValidateModule:
     #     assert "full path" in src_desc
     #     assert "relative path" in src_desc
     #     assert "playbook" in src_desc or "role" in src_desc
+
+    def test_argument_spec_matches_documentation(self):
+        """Test that ARGUMENT_SPEC is the argspec DOCUMENTATION describes."""
+        aav = AnsibleArgSpecValidator(
+            data={},
+            schema=dme_validate.DOCUMENTATION,
+            schema_format="doc",
+            name="dme_validate",
+        )
+        aav._convert_doc_to_schema()
+
+        assert dme_validate.ARGUMENT_SPEC == aav._schema["argument_spec"]
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Unit tests for plugin_utils.profiling."""
+
+import os
+import pstats
+import tracemalloc
+from unittest.mock import MagicMock
+
+import pytest
+from ansible_collections.cisco.dme.plugins.plugin_utils.profiling import (
+    PROFILE_MODES,
+    profile_modes,
+    profiled,
+)
+
+
+class FakeAction(object):
+    """Stand-in for an action plugin."""
+
+    def __init__(self, error=None):
+        self._task = MagicMock()
+        self._task.action = "cisco.dme.dme_command"
+        self._task._uuid = "0242ac12-0002-0000-0000-000000000010"
+        self.error = error
+
+    @profiled
+    def run(self, tmp=None, task_vars=None):
+        if self.error:
+            raise self.error
+        return {"changed": False, "data": [str(idx) for idx in range(1000)]}
+
+
+@pytest.fixture(autouse=True)
+def no_profile_env(monkeypatch):
+    """Run without the profiling environment variables."""
+    monkeypatch.delenv("ANSIBLE_DME_PROFILE", raising=False)
+    monkeypatch.delenv("ANSIBLE_DME_PROFILE_DIR", raising=False)
+
+
+@pytest.fixture
+def task_vars(tmp_path):
+    """Task variables enabling both profilers."""
+    return {
+        "inventory_hostname": "switch/1",
+        "ansible_dme_profile": "cpu,memory",
+        "ansible_dme_profile_dir": str(tmp_path),
+    }
+
+
+class TestProfileModes:
+    """Test cases for selecting the profilers."""
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("", ()),
+            ("false", ()),
+            (False, ()),
+            (True, PROFILE_MODES),
+            ("yes", PROFILE_MODES),
+            ("all", PROFILE_MODES),
+            ("cpu", ("cpu",)),
+            ("memory", ("memory",)),
+            ("Memory, CPU", ("cpu", "memory")),
+            ("unknown", ()),
+        ],
+    )
+    def test_profile_modes(self, value, expected):
+        """Test the accepted values of ansible_dme_profile."""
+        assert profile_modes({"ansible_dme_profile": value}) == expected
+
+    def test_variable_overrides_environment(self, monkeypatch):
+        """Test that the variable takes precedence over the environment."""
+        monkeypatch.setenv("ANSIBLE_DME_PROFILE", "cpu")
+
+        assert profile_modes({}) == ("cpu",)
+        assert profile_modes({"ansible_dme_profile": "memory"}) == ("memory",)
+
+
+class TestProfiled:
+    """Test cases for the run() wrapper."""
+
+    def test_disabled_by_default(self):
+        """Test that run() is not profiled by default."""
+        result = FakeAction().run(task_vars={})
+
+        assert "dme_profile" not in result
+
+    def test_profiles_written(self, task_vars, tmp_path):
+        """Test that cProfile stats and a tracemalloc snapshot are written."""
+        result = FakeAction().run(task_vars=task_vars)
+
+        prof, snapshot = result["dme_profile"]["files"]
+        assert os.path.dirname(prof) == str(tmp_path)
+        assert os.path.basename(prof).startswith(
+            "switch-1_cisco.dme.dme_command_0242ac12-0002-0000-0000-000000000010_",
+        )
+        assert prof.endswith(".prof")
+        assert snapshot.endswith(".tracemalloc")
+        assert pstats.Stats(prof).total_calls > 0
+        assert tracemalloc.Snapshot.load(snapshot).traces
+        assert result["dme_profile"]["peak_memory"] > 0
+        assert not tracemalloc.is_tracing()
+
+    def test_cpu_only(self, task_vars):
+        """Test that only the selected profiler runs."""
+        task_vars["ansible_dme_profile"] = "cpu"
+
+        result = FakeAction().run(task_vars=task_vars)
+
+        (prof,) = result["dme_profile"]["files"]
+        assert prof.endswith(".prof")
+        assert "peak_memory" not in result["dme_profile"]
+
+    def test_profile_written_on_error(self, task_vars, tmp_path):
+        """Test that a failing run() is still profiled."""
+        with pytest.raises(ValueError):
+            FakeAction(error=ValueError("boom")).run(task_vars=task_vars)
+
+        assert sorted(os.path.splitext(name)[1] for name in os.listdir(tmp_path)) == [
+            ".prof",
+            ".tracemalloc",
+        ]
+
+    def test_unwritable_directory_warns(self, task_vars, tmp_path):
+        """Test that profiles that cannot be written do not fail the task."""
+        blocker = tmp_path / "blocker"
+        blocker.write_text("")
+        task_vars["ansible_dme_profile_dir"] = str(blocker / "profiles")
+
+        result = FakeAction().run(task_vars=task_vars)
+
+        assert result["changed"] is False
+        assert result["dme_profile"]["files"] == []
+        assert result["warnings"][0].startswith("Unable to write DME profile")
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Copyright 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Unit tests for plugin_utils.websocket."""
+
+import pytest
+from ansible_collections.cisco.dme.plugins.plugin_utils.websocket import (
+    OPCODE_CLOSE,
+    OPCODE_PONG,
+    OPCODE_TEXT,
+    WebSocket,
+    WebSocketError,
+    accept_key,
+    encode_frame,
+)
+from ansible_collections.cisco.dme.tests.unit.fixtures.websocket_server import (
+    WebSocketServer,
+)
+
+
+@pytest.fixture
+def server():
+    """Start a stand-in websocket server."""
+    server = WebSocketServer().start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    """Connect a websocket client to the stand-in server."""
+    client = WebSocket.connect(
+        "127.0.0.1",
+        server.port,
+        "/socketTOKEN",
+        use_ssl=False,
+        timeout=5,
+    )
+    assert server.connected.wait(5)
+    yield client
+    client.close()
+
+
+class TestWebSocketFraming:
+    """Test cases for frame encoding."""
+
+    def test_accept_key(self):
+        """Test the accept key against the example of RFC 6455."""
+        assert accept_key("dGhlIHNhbXBsZSBub25jZQ==") == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
+
+    @pytest.mark.parametrize("length", [0, 125, 126, 65535, 65536])
+    def test_masked_frame_round_trip(self, length):
+        """Test that masked frames of every length encoding decode again."""
+        payload = bytes(range(256)) * (length // 256) + bytes(range(length % 256))
+        frame = encode_frame(OPCODE_TEXT, payload)
+
+        class FakeSocket:
+            def recv(self, size):
+                return b""
+
+        decoded = WebSocket(FakeSocket(), frame)._read_frame()
+
+        assert decoded == (True, OPCODE_TEXT, payload)
+
+
+class TestWebSocketClient:
+    """Test cases for the websocket client against a local server."""
+
+    def test_handshake_path(self, server, client):
+        """Test that the handshake requests the given path."""
+        assert server.path == "/socketTOKEN"
+
+    def test_receive_text(self, server, client):
+        """Test that text messages are returned."""
+        server.send_text('{"imdata": []}')
+
+        assert client.recv() == '{"imdata": []}'
+
+    def test_receive_fragmented_text(self, server, client):
+        """Test that fragmented messages are reassembled."""
+        server.send_fragmented("hello world", 5)
+
+        assert client.recv() == "hello world"
+
+    def test_ping_answered(self, server, client):
+        """Test that pings are answered with a pong carrying the same payload."""
+        server.ping(b"are you there")
+        server.send_text("after ping")
+
+        assert client.recv() == "after ping"
+        assert server.wait_received(OPCODE_PONG) == b"are you there"
+
+    def test_server_close(self, server, client):
+        """Test that recv returns None once the server closed."""
+        server.close()
+
+        assert client.recv() is None
+        assert client.closed
+
+    def test_client_close(self, server, client):
+        """Test that closing sends a close frame."""
+        client.close()
+
+        assert server.wait_received(OPCODE_CLOSE) == b""
+
+    def test_upgrade_refused(self):
+        """Test that a refused upgrade raises WebSocketError."""
+        server = WebSocketServer(accept=False).start()
+        try:
+            with pytest.raises(WebSocketError, match="403"):
+                WebSocket.connect(
+                    "127.0.0.1",
+                    server.port,
+                    "/socketTOKEN",
+                    use_ssl=False,
+                    timeout=5,
+                )
+        finally:
+            server.close()
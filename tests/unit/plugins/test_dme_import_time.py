@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Copyright 2025 Sagar Paul (@KB-perByte)
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Import cost of the collection's plugins, measured with python -X importtime."""
+
+import functools
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Already imported by ansible before it loads any plugin of the collection
+BASELINE = (
+    "ansible.module_utils.connection",
+    "ansible.plugins.action",
+    "ansible.plugins.httpapi",
+)
+BASELINE_MARKER = "-- baseline imported --"
+
+# Cumulative import time allowed per plugin, in microseconds. It leaves room
+# for slow CI machines, the module checks catch most regressions first.
+IMPORT_BUDGET_US = 50000
+
+# Modules a plugin must not load on import, they are needed on first use or never
+NOT_IMPORTED = (
+    "requests",
+    "urllib3",
+    "orjson",
+    "ujson",
+)
+ACTION_NOT_IMPORTED = NOT_IMPORTED + (
+    "cProfile",
+    "ssl",
+    "tracemalloc",
+    "ansible_collections.ansible.utils.plugins.module_utils.common.argspec_validate",
+)
+
+PLUGINS = {
+    "ansible_collections.cisco.dme.plugins.action.dme_command": ACTION_NOT_IMPORTED,
+    "ansible_collections.cisco.dme.plugins.action.dme_config": ACTION_NOT_IMPORTED,
+    "ansible_collections.cisco.dme.plugins.action.dme_validate": ACTION_NOT_IMPORTED,
+    "ansible_collections.cisco.dme.plugins.httpapi.dme": NOT_IMPORTED
+    + (
+        "concurrent.futures",
+        "ansible_collections.cisco.dme.plugins.plugin_utils.websocket",
+    ),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def import_times(module):
+    """
+    Import module in a fresh interpreter after the baseline.
+
+    Returns:
+        Dictionary of every module the import loaded to its cumulative
+        import time in microseconds
+    """
+    code = "import sys, {0}; sys.stderr.write({1!r}); import {2}".format(
+        ", ".join(BASELINE),
+        BASELINE_MARKER + "\n",
+        module,
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    # The first run may still be compiling bytecode
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    times = {}
+    for line in result.stderr.split(BASELINE_MARKER, 1)[1].splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.partition(":")[2].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("plugin", sorted(PLUGINS))
+def test_heavy_modules_not_imported(plugin):
+    """Test that importing a plugin leaves heavy modules to first use."""
+    loaded = set(import_times(plugin))
+
+    assert plugin in loaded
+    assert not loaded.intersection(PLUGINS[plugin])
+
+
+@pytest.mark.parametrize("plugin", sorted(PLUGINS))
+def test_import_budget(plugin):
+    """Test that importing a plugin stays within the import time budget."""
+    assert import_times(plugin)[plugin] < IMPORT_BUDGET_US